@@ -18,7 +18,7 @@ ndarray = NDArray
 dtype   = dshape
 
 from params import params
-from toplevel import open, zeros, ones, fromiter
+from toplevel import open, zeros, ones, fromiter, loadcsv
 from toplevel import (blaze_all as all,
                       blaze_any as any,
                       blaze_abs as abs,
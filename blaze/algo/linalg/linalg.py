@@ -12,16 +12,62 @@ The operations are being done with out-of-core algorithms.
 """
 
 import sys, math
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 import blaze
+from blaze.carray.toplevel import detect_number_of_cores
 
 
-# The default size for OOC operation
+# The default size for OOC operation (the memory budget for tiles)
 OOC_BUFFER_SIZE = 2**25
 
 
-def dot(a, b, out=None, outname='out'):
+class TileCache(object):
+    """A LRU cache for the tiles of an operand, bounded by `maxbytes`.
+
+    Reading a tile out of a compressed array means decompressing it, so
+    tiles that are used more than once during an operation are kept in
+    memory while they fit in the budget.
+    """
+
+    def __init__(self, array, maxbytes):
+        self.array = array
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = self.misses = 0
+        self._tiles = OrderedDict()
+
+    def get(self, rows, cols):
+        """Return the tile at ``array[rows, cols]`` (two slices)."""
+        key = (rows.start, rows.stop, cols.start, cols.stop)
+        tile = self._tiles.pop(key, None)
+        if tile is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            tile = np.ascontiguousarray(self.array[rows, cols])
+            self.nbytes += tile.nbytes
+            # Evict the least recently used tiles
+            while self.nbytes > self.maxbytes and self._tiles:
+                _, old = self._tiles.popitem(last=False)
+                self.nbytes -= old.nbytes
+        self._tiles[key] = tile
+        return tile
+
+
+def _accumulate(args):
+    """Add the product of the (a0, b0) tiles to the `acc` accumulator."""
+    acc, (a0, b0) = args
+    # np.dot releases the GIL, so the tiles do run in parallel
+    if acc is None:
+        return np.dot(a0, b0)
+    acc += np.dot(a0, b0)
+    return acc
+
+
+def dot(a, b, out=None, outname='out', nthreads=None):
     """
     Matrix multiplication of two 2-D arrays.
 
@@ -42,6 +88,9 @@ def dot(a, b, out=None, outname='out'):
     outname : str, optional
        If provided this will be the name for the output matrix storage.
        This parameter is only used when `out` is not provided.
+    nthreads : int, optional
+       The number of threads computing output tiles in parallel.  The
+       default is the number of cores in the system.
 
     Returns
     -------
@@ -51,6 +100,15 @@ def dot(a, b, out=None, outname='out'):
         otherwise an array is returned.
         If `out` is given, then it is returned.
 
+    Notes
+    -----
+    The product is computed in square tiles sized after
+    `OOC_BUFFER_SIZE`.  Half of this budget is used for caching the
+    tiles of `a` and `b` (so that they are not decompressed again for
+    every output tile) and the other half for the output tiles being
+    computed.  The products for an output tile are accumulated in
+    memory, so every output tile is written exactly once.
+
     Raises
     ------
     ValueError
@@ -81,16 +139,45 @@ def dot(a, b, out=None, outname='out'):
         out = blaze.zeros(dshape, parms)
 
 
-    # Compute a good block size
+    if nthreads is None:
+        nthreads = detect_number_of_cores()
+    nthreads = max(1, nthreads)
+
+    # Compute a good block size, so that the `nthreads` output tiles
+    # being computed (the accumulators, their operand tiles and the
+    # temporaries) fit in half of the budget
     out_dtype = out.datashape.parameters[-1].to_dtype()
-    bl = math.sqrt(OOC_BUFFER_SIZE / out_dtype.itemsize)
-    bl = 2**int(math.log(bl, 2))
-    for i in range(0, l, bl):
-        for j in range(0, n, bl):
-            for k in range(0, m, bl):
-                a0 = a[i:min(i+bl, l), k:min(k+bl, m)]
-                b0 = b[k:min(k+bl, m), j:min(j+bl, n)]
-                out[i:i+bl, j:j+bl] += np.dot(a0, b0)
+    bl = math.sqrt(OOC_BUFFER_SIZE / (2 * 4 * nthreads * out_dtype.itemsize))
+    bl = max(2**int(math.log(bl, 2)), 1)
+    a_cache = TileCache(a, OOC_BUFFER_SIZE // 4)
+    b_cache = TileCache(b, OOC_BUFFER_SIZE // 4)
+
+    # The output tiles, in row-major order (so that the row panel of
+    # `a` stays in the cache)
+    otiles = [(slice(i, min(i+bl, l)), slice(j, min(j+bl, n)))
+              for i in xrange(0, l, bl) for j in xrange(0, n, bl)]
+    ksl = [slice(k, min(k+bl, m)) for k in xrange(0, m, bl)]
+
+    pool = ThreadPool(nthreads) if nthreads > 1 else None
+    mapper = pool.map if pool is not None else map
+    try:
+        # Run the output tiles in waves of `nthreads`.  The operands are
+        # read (and decompressed) and the output is written from this
+        # thread only; the threads just do the multiplications.
+        for w in xrange(0, len(otiles), nthreads):
+            wave = otiles[w:w+nthreads]
+            accs = [None] * len(wave)
+            for ks in ksl:
+                tiles = [(a_cache.get(rows, ks), b_cache.get(ks, cols))
+                         for rows, cols in wave]
+                accs = mapper(_accumulate, zip(accs, tiles))
+            # Every output tile is written exactly once
+            for (rows, cols), acc in zip(wave, accs):
+                out[rows, cols] = acc
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
     return out
 
@@ -26,27 +26,60 @@ def generic1d_loop(table, label):
         # logic
 
 #------------------------------------------------------------------------
-# Columwise Standard Deviation
+# Columns
 #------------------------------------------------------------------------
 
-# Calculate the sum and sum of squares in one pass
-@cython.boundscheck(False)
-@cython.wraparound(False)
-cdef sqsum(np.ndarray[np.int32_t, ndim=1] a):
+# The length of the blocks columns in NumPy arrays are reduced in
+BLOCKLEN = 2**16
+
+cdef column(table, label):
+    data = table.data
+    if hasattr(data, 'ca'):
+        return data.ca[label]
+    # Mapped files and other NumPy backed sources
+    return data.na[label]
+
+#------------------------------------------------------------------------
+# Chunk Partials
+#------------------------------------------------------------------------
+
+# Get the sum and sum of squares of a column in one pass.  Complete
+# chunks are reduced through their (cached) partial aggregates, so
+# constant chunks and chunks reduced before are never decompressed.
+cdef sqsum(col):
     cdef:
-        Py_ssize_t length = a.shape[0]
+        Py_ssize_t nchunk, nchunks, start
+
+        np.float64_t asum  = 0
+        np.float64_t assum = 0
 
-        np.int64_t ai    = 0
-        np.int64_t asum  = 0
-        np.int64_t assum = 0
+    if isinstance(col, np.ndarray):
+        # Blocks of views, converted a block at a time
+        for start from 0 <= start < len(col) by BLOCKLEN:
+            block = col[start:start+BLOCKLEN].astype(np.float64)
+            asum  += block.sum()
+            assum += np.vdot(block, block)
+        return asum, assum
 
-    for i from 0 <= i < length:
-        ai = a[i]
-        asum  += ai
-        assum += ai * ai
+    nchunks = col.nchunks
+
+    for nchunk from 0 <= nchunk < nchunks:
+        _asum, _assum, _, _ = col.partials(nchunk)
+        asum  += _asum
+        assum += _assum
+
+    leftover = col.len - nchunks * col.chunklen
+    if leftover:
+        leftover_arr = col.leftover_array[:leftover].astype(np.float64)
+        asum  += leftover_arr.sum()
+        assum += np.vdot(leftover_arr, leftover_arr)
 
     return asum, assum
 
+#------------------------------------------------------------------------
+# Columwise Standard Deviation
+#------------------------------------------------------------------------
+
 def std(table, label):
     """ Columnwise out of core standard devaiation
 
@@ -64,29 +97,15 @@ def std(table, label):
 
     """
     cdef:
-        Py_ssize_t nchunk, nchunks
-
         Py_ssize_t count = 0
         np.float64_t asum   = 0
         np.float64_t asumsq = 0
         np.float64_t amean  = 0
 
-    col = table.data.ca[label]
-    nchunks = col.nchunks
-    count = col.len
-
-    for nchunk from 0 <= nchunk < nchunks:
-        _asum, _assum = sqsum(col.chunks[nchunk][:])
-        asum   += _asum
-        asumsq += _assum
+    col = column(table, label)
+    count = len(col)
 
-    if col.leftovers:
-        leftover = col.len - nchunks * col.chunklen
-        leftover_arr = col.leftover_array[:leftover]
-
-        _asum, _assum = sqsum(leftover_arr)
-        asum   += _asum
-        asumsq += _assum
+    asum, asumsq = sqsum(col)
 
     if count > 0:
         amean = cython.cdiv(asum, count)
@@ -118,26 +137,14 @@ def mean(table, label):
     """
 
     cdef:
-        Py_ssize_t nchunk, nchunks
-
         Py_ssize_t count = 0
-        np.float64_t asum   = 0
-        np.float64_t amean  = 0
 
-
-    col = table.data.ca[label]
-    nchunks = col.nchunks
-    count = col.len
-
-    for nchunk from 0 <= nchunk < nchunks:
-        asum += col.chunks[nchunk][:].sum(dtype=col.dtype)
-
-    if col.leftovers:
-        leftover = col.len - nchunks * col.chunklen
-        asum += col.leftover_array[:leftover].sum(dtype=col.dtype)
+    col = column(table, label)
+    count = len(col)
 
     if count > 0:
-        return np.float64(asum / count)
+        # carray.sum() reuses the partial aggregates of the chunks
+        return np.float64(col.sum() / np.float64(count))
     else:
         return np.float64(nan)
 
@@ -1,5 +1,5 @@
 from parse import parse, AtermSyntaxError
-from matching import match, build
+from matching import match, matches, build
 from terms import (
     aterm,
     aappl,
@@ -91,11 +91,17 @@ def aterm_splice(a, elts):
     else:
         raise NotImplementedError
 
+def asterm(term):
+    """ Terms can be given either as term objects or as strings. """
+    if isinstance(term, basestring):
+        return parse(term)
+    return term
+
 def match(pattern, subject, *captures):
     captures = []
 
-    p = parse(pattern)
-    s = parse(subject)
+    p = asterm(pattern)
+    s = asterm(subject)
 
     for matches, capture in aterm_zip(p,s):
         if not matches:
@@ -105,8 +111,8 @@ def match(pattern, subject, *captures):
     return True, captures
 
 def matches(pattern, subject):
-    p = pattern
-    s = subject
+    p = asterm(pattern)
+    s = asterm(subject)
 
     for matches, capture in aterm_zip(p,s):
         if not matches:
@@ -114,5 +120,5 @@ def matches(pattern, subject):
     return True
 
 def build(pattern, values):
-    p = parse(pattern)
+    p = asterm(pattern)
     return list(aterm_splice(p,values))
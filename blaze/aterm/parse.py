@@ -20,6 +20,7 @@ import os
 import sys
 
 from functools import partial
+from threading import Lock
 
 from terms import *
 
@@ -253,9 +254,28 @@ def load_parser(debug=False):
         # curry the lexer into the parser
         return partial(parser.parse, lexer=lexer)
 
+# The maximum number of source strings whose terms are cached
+PARSE_CACHE_SIZE = 4096
+
+_parse_cache = {}
+# The prebuilt parser is shared, and PLY parsers are not reentrant
+_parse_lock = Lock()
+
 def parse(pattern):
-    parser = load_parser()
-    return parser(pattern)
+    # Terms are immutable (and hash-consed), so they can be shared
+    try:
+        return _parse_cache[pattern]
+    except KeyError:
+        pass
+
+    with _parse_lock:
+        parser = load_parser()
+        term = parser(pattern)
+
+    if len(_parse_cache) >= PARSE_CACHE_SIZE:
+        _parse_cache.clear()
+    _parse_cache[pattern] = term
+    return term
 
 
 if __name__ == '__main__':
@@ -2,126 +2,130 @@
 # Terms
 #------------------------------------------------------------------------
 
-class ATerm(object):
-
-    def __init__(self, term, annotation=None):
-        self.term = term
-        self.annotation = annotation
-
-    def __str__(self):
-        if self.annotation is not None:
-            return str(self.term) + arepr([self.annotation], '{', '}')
-        else:
-            return str(self.term)
+from threading import Lock
+from weakref import WeakValueDictionary
+
+# Terms are hash-consed: structurally equal terms are a single shared
+# (immutable) object, so that equality is a pointer compare and the
+# hash is computed once.  The table only keeps weak references, terms
+# not used anymore are collected as usual.
+_interned = WeakValueDictionary()
+_intern_lock = Lock()
+
+def hashcons(cls, key, **fields):
+    """ Return the unique instance of ``cls`` for the ``key`` of its
+    fields, creating it with ``fields`` if it does not exist yet. """
+    key = (cls,) + key
+    term = _interned.get(key)
+    if term is None:
+        with _intern_lock:
+            term = _interned.get(key)
+            if term is None:
+                term = object.__new__(cls)
+                term.__dict__.update(fields)
+                term._hash = hash(key)
+                _interned[key] = term
+    return term
+
+def aslist(args):
+    """ The immutable form of the arguments of a term. """
+    return tuple(args) if args is not None else ()
+
+class HashCons(object):
+    """ Base class of the hash-consed terms. """
 
     def __eq__(self, other):
-        if isinstance(other, ATerm):
-            return self.term == other.term
-        else:
-            raise ValueError()
+        return self is other
 
     def __ne__(self, other):
-        if isinstance(other, ATerm):
-            return self.term != other.term
-        else:
-            raise ValueError()
+        return self is not other
+
+    def __hash__(self):
+        return self._hash
 
     def __repr__(self):
         return str(self)
 
-class AAppl(object):
+class ATerm(HashCons):
 
-    def __init__(self, spine, args):
+    def __new__(cls, term, annotation=None):
+        return hashcons(cls, (term, annotation),
+                      term=term, annotation=annotation)
+
+    def __str__(self):
+        if self.annotation is not None:
+            return str(self.term) + arepr([self.annotation], '{', '}')
+        else:
+            return str(self.term)
+
+class AAppl(HashCons):
+
+    def __new__(cls, spine, args):
         assert isinstance(spine, ATerm)
-        self.spine = spine
-        self.args = args
+        args = aslist(args)
+        return hashcons(cls, (spine, args), spine=spine, args=args)
 
     def __str__(self):
         return str(self.spine) + arepr(self.args, '(', ')')
 
-    def __repr__(self):
-        return str(self)
+class AString(HashCons):
 
-class AString(object):
-    def __init__(self, val):
+    def __new__(cls, val):
         assert isinstance(val, str)
-        self.val = val
+        return hashcons(cls, (val,), val=val)
 
     def __str__(self):
         return '"%s"' % (self.val)
 
-    def __repr__(self):
-        return str(self)
+class AInt(HashCons):
 
-class AInt(object):
-    def __init__(self, val):
-        self.val = val
+    def __new__(cls, val):
+        return hashcons(cls, (val,), val=val)
 
     def __str__(self):
         return str(self.val)
 
-    def __eq__(self, other):
-        if isinstance(other, AInt):
-            return self.val == other.val
-        else:
-            raise ValueError()
-
-    def __ne__(self, other):
-        if isinstance(other, AInt):
-            return self.val != other.val
-        else:
-            raise ValueError()
-
-    def __repr__(self):
-        return str(self)
+class AReal(HashCons):
 
-class AReal(object):
-    def __init__(self, val):
-        self.val = val
+    def __new__(cls, val):
+        return hashcons(cls, (val,), val=val)
 
     def __str__(self):
         return str(self.val)
 
-    def __repr__(self):
-        return str(self)
+class AList(HashCons):
 
-class AList(object):
-    def __init__(self, args):
-        assert isinstance(args, list)
-        self.args = args or []
+    def __new__(cls, args):
+        assert isinstance(args, (list, tuple))
+        args = aslist(args)
+        return hashcons(cls, (args,), args=args)
 
     def __str__(self):
         return arepr(self.args, '[', ']')
 
-    def __repr__(self):
-        return str(self)
+class ATuple(HashCons):
 
-class ATuple(object):
-    def __init__(self, args):
-        assert isinstance(args, list)
-        self.args = args or []
+    def __new__(cls, args):
+        assert isinstance(args, (list, tuple))
+        args = aslist(args)
+        return hashcons(cls, (args,), args=args)
 
     def __str__(self):
         return arepr(self.args, '(', ')')
 
-    def __repr__(self):
-        return str(self)
-
-class APlaceholder(object):
+class APlaceholder(HashCons):
 
-    def __init__(self, type, args):
-        self.type = type
-        self.args = args
+    def __new__(cls, type, args):
+        if args is not None:
+            args = aslist(args)
+        return hashcons(cls, (type, args), type=type, args=args)
 
     def __str__(self):
         if self.args is not None:
-            return '<%s(%r)>' % (self.type, self.args)
+            return '<%s%s>' % (self.type, arepr(self.args, '(', ')'))
         else:
             return arepr([self.type], '<', '>')
 
-    def __repr__(self):
-        return str(self)
-
 #------------------------------------------------------------------------
 # Pretty Printing
 #------------------------------------------------------------------------
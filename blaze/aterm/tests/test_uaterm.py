@@ -82,3 +82,23 @@ def test_build():
     build('f(<int>)', [aint(1)])
     build('f(x, y, g(<int>,<int>))', [aint(1), aint(2)])
     build('<appl(x,y)>', [aterm('x')])
+
+def test_hash_consing():
+    a = parse('f(x, g(1, "foo"){dshape("int")})')
+    b = aappl(aterm('f'), [aterm('x'),
+              aterm(aappl(aterm('g'), [aint(1), astr('foo')]),
+                    (aappl(aterm('dshape'), [astr('int')]),))])
+
+    # Structurally equal terms are the same object
+    assert a is b
+    assert a == b
+    assert hash(a) == hash(b)
+    assert parse('f(x)') is parse(' f( x ) ')
+    assert parse('f(x)') != parse('f(y)')
+    assert aint(1) != areal(1.0)
+
+def test_matching_terms():
+    assert match(parse('f(<int>,g(x,y))'), parse('f(1,g(x,y))'))[0]
+    assert not match(parse('f(<str>,g(x,y))'), 'f(1,g(x,y))')[0]
+    assert matches('f(1,<appl(x,<term>)>)', parse('f(1,g(x,3))'))
+    assert build(parse('f(<int>)'), [aint(1)]) == [parse('f(1)')]
@@ -1,5 +1,7 @@
 from .passes import compile, CompileError
-from .exc import Context, execute
+from .exc import Context, execute, parallel_for, parallel_reduce, \
+    chunked_execute, use_runtime
+from .cache import compile_bitcode, compile_many, load_module
 from .errors import log
 
 def bitcode(env):
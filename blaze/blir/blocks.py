@@ -1,3 +1,5 @@
+from itertools import count
+
 BASIC  = 0
 IFELSE = 1
 WHILE  = 2
@@ -8,15 +10,15 @@ FOR    = 3
 #------------------------------------------------------------------------
 
 class Block(object):
-    _count = 0
+    # next() on a counter is atomic, blocks are built from several
+    # compiler threads
+    _count = count()
 
     def __init__(self, label=None):
         self.instrs = []
         self.next_block = None
         self.label = label or self.__class__.__name__
-        self.bid = Block._count
-
-        Block._count = Block._count + 1
+        self.bid = next(Block._count)
 
     @property
     def kind(self):
@@ -67,3 +69,10 @@ class ForBlock(Block):
         self.body = None
         self.var = None
         self.bounds = None
+
+class ParallelForBlock(ForBlock):
+    """ A ``parallel_range`` loop, its body is outlined into a kernel. """
+
+    def __init__(self):
+        super(ParallelForBlock,self).__init__()
+        self.reductions = {} # variable -> operator
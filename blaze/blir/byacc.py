@@ -5,9 +5,9 @@ _tabversion = '3.2'
 
 _lr_method = 'LALR'
 
-_lr_signature = '\xcf\x18T\xe3\xfb\xdcA\x13s1N_&Z\x7f\xa8'
+_lr_signature = '9\xd8\x91\xba\xf8\x91D:2\xfe--*FG\x15'
     
-_lr_action_items = {'DIVIDE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,81,-62,81,81,81,-39,-38,-37,81,81,81,-60,81,81,-52,81,81,81,81,-42,81,81,81,81,81,81,81,-43,-59,-70,-71,81,81,]),'LNOT':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,]),'CONST':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[1,-16,1,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,1,-58,1,1,-30,-36,1,-22,-29,-19,-31,-21,-18,-34,-32,1,-20,1,-35,-33,]),'ARROW':([115,138,],[136,149,]),'FOREIGN':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[2,-16,2,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,2,-58,2,2,-30,-36,2,-22,-29,-19,-31,-21,-18,-34,-32,2,-20,2,-35,-33,]),'LBRACKET':([25,44,56,57,122,143,148,151,155,],[58,68,88,-75,88,-74,88,88,88,]),'WHILE':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[3,-16,3,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,3,-58,3,3,-30,-36,3,-22,-29,-19,-31,-21,-18,-34,-32,3,-20,3,-35,-33,]),'COLON':([118,],[140,]),'PRINT':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[5,-16,5,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,5,-58,5,5,-30,-36,5,-22,-29,-19,-31,-21,-18,-34,-32,5,-20,5,-35,-33,]),'RETURN':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[6,-16,6,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,6,-58,6,6,-30,-36,6,-22,-29,-19,-31,-21,-18,-34,-32,6,-20,6,-35,-33,]),'TRUE':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,]),'MINUS':([3,5,6,12,34,35,36,37,38,39,40,41,42,43,44,45,46,47,48,49,52,55,58,59,60,62,64,65,66,67,68,69,71,72,73,74,75,76,77,78,79,80,81,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,124,126,128,129,133,134,144,146,],[36,36,36,36,36,-64,36,36,-55,-61,-63,-53,-54,36,-66,-65,79,-62,79,79,79,36,36,36,36,36,-39,-38,-37,79,36,36,36,36,36,36,36,36,36,36,36,36,36,79,79,-60,79,79,-52,79,79,79,79,-42,79,79,-40,79,79,-41,79,-43,36,36,36,-59,-70,-71,79,79,]),'DEF':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,33,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[7,-16,7,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,7,7,-58,7,7,-30,-36,7,-22,-29,-19,-31,-21,-18,-34,-32,7,-20,7,-35,-33,]),'RBRACE':([4,8,9,10,11,13,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,96,98,103,119,121,123,130,131,132,135,141,142,153,154,156,157,158,159,],[-16,-2,-13,-10,-17,-3,-9,-8,-12,-5,-15,-6,-11,-7,-14,-4,-58,-76,-76,-30,-36,-76,131,-22,135,141,-29,-19,-31,-21,-18,-34,-32,-76,157,-20,-76,-35,159,-33,]),'LE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,75,-62,75,75,75,-39,-38,-37,75,75,75,-60,75,75,-52,75,None,None,None,-42,75,None,-40,75,None,-41,None,-43,-59,-70,-71,75,75,]),'RPAREN':([35,38,39,40,41,42,44,45,47,57,59,64,65,66,67,84,92,93,94,95,99,102,104,105,106,107,108,109,110,111,112,113,114,116,117,129,133,134,143,147,150,151,],[-64,-55,-61,-63,-53,-54,-66,-65,-62,-75,92,-39,-38,-37,99,115,-60,129,-57,130,-52,-46,-47,-44,-42,-50,-45,-40,-51,-48,-41,-49,-43,-27,138,-59,-70,-71,-74,-56,-26,-28,]),'SEMI':([19,35,38,39,40,41,42,44,45,47,48,49,57,63,64,65,66,87,89,92,97,99,102,104,105,106,107,108,109,110,111,112,113,114,115,129,133,134,137,143,144,148,155,],[54,-64,-55,-61,-63,-53,-54,-66,-65,-62,82,83,-75,98,-39,-38,-37,121,123,-60,132,-52,-46,-47,-44,-42,-50,-45,-40,-51,-48,-41,-49,-43,-76,-59,-70,-71,-25,-74,154,-24,-23,]),'NE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,80,-62,80,80,80,-39,-38,-37,80,80,80,-60,80,80,-52,80,None,None,None,-42,80,None,-40,80,None,-41,None,-43,-59,-70,-71,80,80,]),'LT':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,72,-62,72,72,72,-39,-38,-37,72,72,72,-60,72,72,-52,72,None,None,None,-42,72,None,-40,72,None,-41,None,-43,-59,-70,-71,72,72,]),'PLUS':([3,5,6,12,34,35,36,37,38,39,40,41,42,43,44,45,46,47,48,49,52,55,58,59,60,62,64,65,66,67,68,69,71,72,73,74,75,76,77,78,79,80,81,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,124,126,128,129,133,134,144,146,],[37,37,37,37,37,-64,37,37,-55,-61,-63,-53,-54,37,-66,-65,76,-62,76,76,76,37,37,37,37,37,-39,-38,-37,76,37,37,37,37,37,37,37,37,37,37,37,37,37,76,76,-60,76,76,-52,76,76,76,76,-42,76,76,-40,76,76,-41,76,-43,37,37,37,-59,-70,-71,76,76,]),'INTEGER':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,]),'ASSIGN':([20,25,32,89,125,127,],[55,-67,62,124,-72,-73,]),'$end':([0,4,8,9,10,11,13,14,15,16,18,21,22,24,26,27,29,30,51,54,82,83,98,121,123,130,131,132,135,141,154,157,159,],[-76,-16,-2,-13,-10,-17,-3,-1,-9,-8,-12,-5,-15,-6,0,-11,-7,-14,-4,-58,-30,-36,-22,-29,-19,-31,-21,-18,-34,-32,-20,-35,-33,]),'GT':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,69,-62,69,69,69,-39,-38,-37,69,69,69,-60,69,69,-52,69,None,None,None,-42,69,None,-40,69,None,-41,None,-43,-59,-70,-71,69,69,]),'STRING':([2,3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[33,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,]),'FOR':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[17,-16,17,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,17,-58,17,17,-30,-36,17,-22,-29,-19,-31,-21,-18,-34,-32,17,-20,17,-35,-33,]),'TIMES':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,73,-62,73,73,73,-39,-38,-37,73,73,73,-60,73,73,-52,73,73,73,73,-42,73,73,73,73,73,73,73,-43,-59,-70,-71,73,73,]),'RANGE':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,86,98,121,123,130,131,132,135,141,142,154,156,157,159,],[28,-16,28,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,28,-58,28,28,-30,-36,28,28,-22,-29,-19,-31,-21,-18,-34,-32,28,-20,28,-35,-33,]),'LAND':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,77,-62,77,77,77,-39,-38,-37,77,77,77,-60,77,77,-52,77,-46,-47,-44,-42,77,-45,-40,-51,-48,-41,-49,-43,-59,-70,-71,77,77,]),'LPAREN':([3,5,6,12,25,28,34,36,37,43,44,50,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[43,43,43,43,59,60,43,43,43,43,59,84,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,]),'IN':([53,],[86,]),'VAR':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[23,-16,23,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,23,-58,23,23,-30,-36,23,-22,-29,-19,-31,-21,-18,-34,-32,23,-20,23,-35,-33,]),'ELSE':([141,],[152,]),'EQ':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,78,-62,78,78,78,-39,-38,-37,78,78,78,-60,78,78,-52,78,None,None,None,-42,78,None,-40,78,None,-41,None,-43,-59,-70,-71,78,78,]),'ID':([0,1,3,4,5,6,7,8,9,10,11,12,15,16,17,18,21,22,23,24,27,29,30,34,36,37,43,51,54,55,56,57,58,59,60,61,62,68,69,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,88,98,121,123,124,126,128,130,131,132,135,136,139,140,141,142,143,149,154,156,157,159,],[25,32,44,-16,44,44,50,25,-13,-10,-17,44,-9,-8,53,-12,-5,-15,57,-6,-11,-7,-14,44,44,44,44,25,-58,44,89,-75,44,44,44,25,44,44,44,25,44,44,44,44,44,44,44,44,44,44,44,-30,-36,118,25,57,-22,-29,-19,44,44,44,-31,-21,-18,-34,57,118,57,-32,25,-74,57,-20,25,-35,-33,]),'IF':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,121,123,130,131,132,135,141,142,154,156,157,159,],[12,-16,12,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,12,-58,12,12,-30,-36,12,-22,-29,-19,-31,-21,-18,-34,-32,12,-20,12,-35,-33,]),'LOR':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,74,-62,74,74,74,-39,-38,-37,74,74,74,-60,74,74,-52,74,-46,-47,-44,-42,-50,-45,-40,-51,-48,-41,-49,-43,-59,-70,-71,74,74,]),'LBRACE':([31,35,38,39,40,41,42,44,45,46,47,52,57,64,65,66,92,99,102,104,105,106,107,108,109,110,111,112,113,114,115,120,129,130,133,134,137,143,148,152,155,],[61,-64,-55,-61,-63,-53,-54,-66,-65,70,-62,85,-75,-39,-38,-37,-60,-52,-46,-47,-44,-42,-50,-45,-40,-51,-48,-41,-49,-43,-76,142,-59,-31,-70,-71,-25,-74,-24,156,-23,]),'FALSE':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,]),'FLOAT':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,]),'GE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,129,133,134,144,146,],[-64,-55,-61,-63,-53,-54,-66,-65,71,-62,71,71,71,-39,-38,-37,71,71,71,-60,71,71,-52,71,None,None,None,-42,71,None,-40,71,None,-41,None,-43,-59,-70,-71,71,71,]),'RBRACKET':([35,38,39,40,41,42,44,45,47,57,64,65,66,90,91,92,99,100,101,102,104,105,106,107,108,109,110,111,112,113,114,122,129,133,134,143,145,146,],[-64,-55,-61,-63,-53,-54,-66,-65,-62,-75,-39,-38,-37,125,127,-60,-52,133,134,-46,-47,-44,-42,-50,-45,-40,-51,-48,-41,-49,-43,143,-59,-70,-71,-74,-68,-69,]),'COMMA':([35,38,39,40,41,42,44,45,47,57,64,65,66,90,91,92,93,94,95,99,100,101,102,104,105,106,107,108,109,110,111,112,113,114,116,117,129,133,134,143,145,146,147,150,151,],[-64,-55,-61,-63,-53,-54,-66,-65,-62,-75,-39,-38,-37,126,-69,-60,128,-57,128,-52,126,-69,-46,-47,-44,-42,-50,-45,-40,-51,-48,-41,-49,-43,-27,139,-59,-70,-71,-74,126,-69,128,-26,-28,]),}
+_lr_action_items = {'DIVIDE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,81,-63,81,81,81,-40,-39,-38,81,81,81,-61,81,81,-53,81,81,81,81,-43,81,81,81,81,81,81,81,-44,-60,-71,-72,81,81,]),'LNOT':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,]),'CONST':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[1,-16,1,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,1,-59,1,1,-30,-37,1,-22,-29,-19,-31,-21,-18,-34,-32,1,1,-20,1,-36,-35,-33,]),'ARROW':([115,140,],[138,152,]),'FOREIGN':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[2,-16,2,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,2,-59,2,2,-30,-37,2,-22,-29,-19,-31,-21,-18,-34,-32,2,2,-20,2,-36,-35,-33,]),'LBRACKET':([25,44,56,57,124,146,151,154,159,],[58,68,88,-76,88,-75,88,88,88,]),'WHILE':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[3,-16,3,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,3,-59,3,3,-30,-37,3,-22,-29,-19,-31,-21,-18,-34,-32,3,3,-20,3,-36,-35,-33,]),'COLON':([118,],[142,]),'PRINT':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[5,-16,5,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,5,-59,5,5,-30,-37,5,-22,-29,-19,-31,-21,-18,-34,-32,5,5,-20,5,-36,-35,-33,]),'RETURN':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[6,-16,6,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,6,-59,6,6,-30,-37,6,-22,-29,-19,-31,-21,-18,-34,-32,6,6,-20,6,-36,-35,-33,]),'TRUE':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,]),'MINUS':([3,5,6,12,34,35,36,37,38,39,40,41,42,43,44,45,46,47,48,49,52,55,58,59,60,62,64,65,66,67,68,69,71,72,73,74,75,76,77,78,79,80,81,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,126,128,130,131,135,136,147,149,],[36,36,36,36,36,-65,36,36,-56,-62,-64,-54,-55,36,-67,-66,79,-63,79,79,79,36,36,36,36,36,-40,-39,-38,79,36,36,36,36,36,36,36,36,36,36,36,36,36,79,79,-61,79,79,-53,79,79,79,79,-43,79,79,-41,79,79,-42,79,-44,36,36,36,-60,-71,-72,79,79,]),'DEF':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,33,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[7,-16,7,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,7,7,-59,7,7,-30,-37,7,-22,-29,-19,-31,-21,-18,-34,-32,7,7,-20,7,-36,-35,-33,]),'RBRACE':([4,8,9,10,11,13,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,96,98,103,119,123,125,132,133,134,137,143,144,145,156,157,158,160,161,162,163,164,],[-16,-2,-13,-10,-17,-3,-9,-8,-12,-5,-15,-6,-11,-7,-14,-4,-59,-77,-77,-30,-37,-77,133,-22,137,143,-29,-19,-31,-21,-18,-34,-32,-77,-77,161,162,-20,-77,-36,-35,164,-33,]),'LE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,75,-63,75,75,75,-40,-39,-38,75,75,75,-61,75,75,-53,75,None,None,None,-43,75,None,-41,75,None,-42,None,-44,-60,-71,-72,75,75,]),'RPAREN':([35,38,39,40,41,42,44,45,47,57,59,64,65,66,67,84,92,93,94,95,99,102,104,105,106,107,108,109,110,111,112,113,114,116,117,131,135,136,146,150,153,154,],[-65,-56,-62,-64,-54,-55,-67,-66,-63,-76,92,-40,-39,-38,99,115,-61,131,-58,132,-53,-47,-48,-45,-43,-51,-46,-41,-52,-49,-42,-50,-44,-27,140,-60,-71,-72,-75,-57,-26,-28,]),'SEMI':([19,35,38,39,40,41,42,44,45,47,48,49,57,63,64,65,66,87,89,92,97,99,102,104,105,106,107,108,109,110,111,112,113,114,115,131,135,136,139,146,147,151,159,],[54,-65,-56,-62,-64,-54,-55,-67,-66,-63,82,83,-76,98,-40,-39,-38,123,125,-61,134,-53,-47,-48,-45,-43,-51,-46,-41,-52,-49,-42,-50,-44,-77,-60,-71,-72,-25,-75,158,-24,-23,]),'NE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,80,-63,80,80,80,-40,-39,-38,80,80,80,-61,80,80,-53,80,None,None,None,-43,80,None,-41,80,None,-42,None,-44,-60,-71,-72,80,80,]),'LT':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,72,-63,72,72,72,-40,-39,-38,72,72,72,-61,72,72,-53,72,None,None,None,-43,72,None,-41,72,None,-42,None,-44,-60,-71,-72,72,72,]),'PLUS':([3,5,6,12,34,35,36,37,38,39,40,41,42,43,44,45,46,47,48,49,52,55,58,59,60,62,64,65,66,67,68,69,71,72,73,74,75,76,77,78,79,80,81,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,126,128,130,131,135,136,147,149,],[37,37,37,37,37,-65,37,37,-56,-62,-64,-54,-55,37,-67,-66,76,-63,76,76,76,37,37,37,37,37,-40,-39,-38,76,37,37,37,37,37,37,37,37,37,37,37,37,37,76,76,-61,76,76,-53,76,76,76,76,-43,76,76,-41,76,76,-42,76,-44,37,37,37,-60,-71,-72,76,76,]),'INTEGER':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,]),'ASSIGN':([20,25,32,89,127,129,],[55,-68,62,126,-73,-74,]),'$end':([0,4,8,9,10,11,13,14,15,16,18,21,22,24,26,27,29,30,51,54,82,83,98,123,125,132,133,134,137,143,158,161,162,164,],[-77,-16,-2,-13,-10,-17,-3,-1,-9,-8,-12,-5,-15,-6,0,-11,-7,-14,-4,-59,-30,-37,-22,-29,-19,-31,-21,-18,-34,-32,-20,-36,-35,-33,]),'GT':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,69,-63,69,69,69,-40,-39,-38,69,69,69,-61,69,69,-53,69,None,None,None,-43,69,None,-41,69,None,-42,None,-44,-60,-71,-72,69,69,]),'STRING':([2,3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[33,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,]),'FOR':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[17,-16,17,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,17,-59,17,17,-30,-37,17,-22,-29,-19,-31,-21,-18,-34,-32,17,17,-20,17,-36,-35,-33,]),'TIMES':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,73,-63,73,73,73,-40,-39,-38,73,73,73,-61,73,73,-53,73,73,73,73,-43,73,73,73,73,73,73,73,-44,-60,-71,-72,73,73,]),'RANGE':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,86,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[28,-16,28,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,28,-59,28,28,-30,-37,28,28,-22,-29,-19,-31,-21,-18,-34,-32,28,28,-20,28,-36,-35,-33,]),'LAND':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,77,-63,77,77,77,-40,-39,-38,77,77,77,-61,77,77,-53,77,-47,-48,-45,-43,77,-46,-41,-52,-49,-42,-50,-44,-60,-71,-72,77,77,]),'LPAREN':([3,5,6,12,25,28,34,36,37,43,44,50,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,122,126,128,130,],[43,43,43,43,59,60,43,43,43,43,59,84,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,59,43,43,43,]),'IN':([53,],[86,]),'VAR':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[23,-16,23,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,23,-59,23,23,-30,-37,23,-22,-29,-19,-31,-21,-18,-34,-32,23,23,-20,23,-36,-35,-33,]),'ELSE':([143,],[155,]),'EQ':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,78,-63,78,78,78,-40,-39,-38,78,78,78,-61,78,78,-53,78,None,None,None,-43,78,None,-41,78,None,-42,None,-44,-60,-71,-72,78,78,]),'ID':([0,1,3,4,5,6,7,8,9,10,11,12,15,16,17,18,21,22,23,24,27,29,30,34,36,37,43,51,54,55,56,57,58,59,60,61,62,68,69,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,88,98,123,125,126,128,130,132,133,134,137,138,141,142,143,144,145,146,152,158,160,161,162,164,],[25,32,44,-16,44,44,50,25,-13,-10,-17,44,-9,-8,53,-12,-5,-15,57,-6,-11,-7,-14,44,44,44,44,25,-59,44,89,-76,44,44,44,25,44,44,44,25,44,44,44,44,44,44,44,44,44,44,44,-30,-37,118,25,122,57,-22,-29,-19,44,44,44,-31,-21,-18,-34,57,118,57,-32,25,25,-75,57,-20,25,-36,-35,-33,]),'IF':([0,4,8,9,10,11,15,16,18,21,22,24,27,29,30,51,54,61,70,82,83,85,98,123,125,132,133,134,137,143,144,145,158,160,161,162,164,],[12,-16,12,-13,-10,-17,-9,-8,-12,-5,-15,-6,-11,-7,-14,12,-59,12,12,-30,-37,12,-22,-29,-19,-31,-21,-18,-34,-32,12,12,-20,12,-36,-35,-33,]),'LOR':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,74,-63,74,74,74,-40,-39,-38,74,74,74,-61,74,74,-53,74,-47,-48,-45,-43,-51,-46,-41,-52,-49,-42,-50,-44,-60,-71,-72,74,74,]),'LBRACE':([31,35,38,39,40,41,42,44,45,46,47,52,57,64,65,66,92,99,102,104,105,106,107,108,109,110,111,112,113,114,115,120,121,131,132,135,136,139,146,151,155,159,],[61,-65,-56,-62,-64,-54,-55,-67,-66,70,-63,85,-76,-40,-39,-38,-61,-53,-47,-48,-45,-43,-51,-46,-41,-52,-49,-42,-50,-44,-77,144,145,-60,-31,-71,-72,-25,-75,-24,160,-23,]),'FALSE':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,]),'FLOAT':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,]),'GE':([35,38,39,40,41,42,44,45,46,47,48,49,52,64,65,66,67,87,91,92,94,97,99,101,102,104,105,106,107,108,109,110,111,112,113,114,131,135,136,147,149,],[-65,-56,-62,-64,-54,-55,-67,-66,71,-63,71,71,71,-40,-39,-38,71,71,71,-61,71,71,-53,71,None,None,None,-43,71,None,-41,71,None,-42,None,-44,-60,-71,-72,71,71,]),'RBRACKET':([35,38,39,40,41,42,44,45,47,57,64,65,66,90,91,92,99,100,101,102,104,105,106,107,108,109,110,111,112,113,114,124,131,135,136,146,148,149,],[-65,-56,-62,-64,-54,-55,-67,-66,-63,-76,-40,-39,-38,127,129,-61,-53,135,136,-47,-48,-45,-43,-51,-46,-41,-52,-49,-42,-50,-44,146,-60,-71,-72,-75,-69,-70,]),'COMMA':([35,38,39,40,41,42,44,45,47,57,64,65,66,90,91,92,93,94,95,99,100,101,102,104,105,106,107,108,109,110,111,112,113,114,116,117,131,135,136,146,148,149,150,153,154,],[-65,-56,-62,-64,-54,-55,-67,-66,-63,-76,-40,-39,-38,128,-70,-61,130,-58,130,-53,128,-70,-47,-48,-45,-43,-51,-46,-41,-52,-49,-42,-50,-44,-27,141,-60,-71,-72,-75,128,-70,130,-26,-28,]),}
 
 _lr_action = { }
 for _k, _v in _lr_action_items.items():
@@ -16,7 +16,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'return_stmt':([0,8,51,61,70,85,142,156,],[4,4,4,4,4,4,4,4,]),'load_location':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,]),'stmts':([0,8,51,61,70,85,142,156,],[8,51,51,8,8,8,8,8,]),'range_stmt':([0,8,51,61,70,85,86,142,156,],[30,30,30,30,30,30,120,30,30,]),'param':([84,139,],[116,150,]),'assign_stmt':([0,8,51,61,70,85,142,156,],[10,10,10,10,10,10,10,10,]),'print_stmt':([0,8,51,61,70,85,142,156,],[11,11,11,11,11,11,11,11,]),'literal':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,]),'params':([84,],[117,]),'type':([23,88,136,140,149,],[56,122,148,151,155,]),'empty':([0,61,70,85,115,142,156,],[13,13,13,13,137,13,13,]),'body':([0,61,70,85,142,156,],[14,96,103,119,153,158,]),'foreign_decl':([0,8,51,61,70,85,142,156,],[15,15,15,15,15,15,15,15,]),'func_decl':([0,8,51,61,70,85,142,156,],[16,16,16,16,16,16,16,16,]),'tuple':([58,68,126,],[90,100,145,]),'call_stmt':([0,8,51,61,70,85,142,156,],[18,18,18,18,18,18,18,18,]),'call_expr':([0,3,5,6,8,12,34,36,37,43,51,55,58,59,60,61,62,68,69,70,71,72,73,74,75,76,77,78,79,80,81,85,124,126,128,142,156,],[19,41,41,41,19,41,41,41,41,41,19,41,41,41,41,19,41,41,41,19,41,41,41,41,41,41,41,41,41,41,41,19,41,41,41,19,19,]),'store_location':([0,8,51,61,70,85,142,156,],[20,20,20,20,20,20,20,20,]),'stmt':([0,8,51,61,70,85,142,156,],[21,21,21,21,21,21,21,21,]),'for_stmt':([0,8,51,61,70,85,142,156,],[22,22,22,22,22,22,22,22,]),'const_decl':([0,8,51,61,70,85,142,156,],[24,24,24,24,24,24,24,24,]),'exprlist':([59,60,128,],[93,95,147,]),'mod':([0,],[26,]),'if_stmt':([0,8,51,61,70,85,142,156,],[27,27,27,27,27,27,27,27,]),'expr':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,124,126,128,],[46,48,49,52,64,65,66,67,87,91,94,94,97,101,102,104,105,106,107,108,109,110,111,112,113,114,144,146,94,]),'var_decl':([0,8,51,61,70,85,142,156,],[29,29,29,29,29,29,29,29,]),'while_stmt':([0,8,51,61,70,85,142,156,],[9,9,9,9,9,9,9,9,]),'signature':([0,8,33,51,61,70,85,142,156,],[31,31,63,31,31,31,31,31,31,]),}
+_lr_goto_items = {'return_stmt':([0,8,51,61,70,85,144,145,160,],[4,4,4,4,4,4,4,4,4,]),'load_location':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,]),'stmts':([0,8,51,61,70,85,144,145,160,],[8,51,51,8,8,8,8,8,8,]),'range_stmt':([0,8,51,61,70,85,86,144,145,160,],[30,30,30,30,30,30,121,30,30,30,]),'param':([84,141,],[116,153,]),'assign_stmt':([0,8,51,61,70,85,144,145,160,],[10,10,10,10,10,10,10,10,10,]),'print_stmt':([0,8,51,61,70,85,144,145,160,],[11,11,11,11,11,11,11,11,11,]),'literal':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,]),'params':([84,],[117,]),'type':([23,88,138,142,152,],[56,124,151,154,159,]),'empty':([0,61,70,85,115,144,145,160,],[13,13,13,13,139,13,13,13,]),'body':([0,61,70,85,144,145,160,],[14,96,103,119,156,157,163,]),'foreign_decl':([0,8,51,61,70,85,144,145,160,],[15,15,15,15,15,15,15,15,15,]),'func_decl':([0,8,51,61,70,85,144,145,160,],[16,16,16,16,16,16,16,16,16,]),'tuple':([58,68,128,],[90,100,148,]),'call_stmt':([0,8,51,61,70,85,144,145,160,],[18,18,18,18,18,18,18,18,18,]),'call_expr':([0,3,5,6,8,12,34,36,37,43,51,55,58,59,60,61,62,68,69,70,71,72,73,74,75,76,77,78,79,80,81,85,86,126,128,130,144,145,160,],[19,41,41,41,19,41,41,41,41,41,19,41,41,41,41,19,41,41,41,19,41,41,41,41,41,41,41,41,41,41,41,19,120,41,41,41,19,19,19,]),'store_location':([0,8,51,61,70,85,144,145,160,],[20,20,20,20,20,20,20,20,20,]),'stmt':([0,8,51,61,70,85,144,145,160,],[21,21,21,21,21,21,21,21,21,]),'for_stmt':([0,8,51,61,70,85,144,145,160,],[22,22,22,22,22,22,22,22,22,]),'const_decl':([0,8,51,61,70,85,144,145,160,],[24,24,24,24,24,24,24,24,24,]),'exprlist':([59,60,130,],[93,95,150,]),'mod':([0,],[26,]),'if_stmt':([0,8,51,61,70,85,144,145,160,],[27,27,27,27,27,27,27,27,27,]),'expr':([3,5,6,12,34,36,37,43,55,58,59,60,62,68,69,71,72,73,74,75,76,77,78,79,80,81,126,128,130,],[46,48,49,52,64,65,66,67,87,91,94,94,97,101,102,104,105,106,107,108,109,110,111,112,113,114,147,149,94,]),'var_decl':([0,8,51,61,70,85,144,145,160,],[29,29,29,29,29,29,29,29,29,]),'while_stmt':([0,8,51,61,70,85,144,145,160,],[9,9,9,9,9,9,9,9,9,]),'signature':([0,8,33,51,61,70,85,144,145,160,],[31,31,63,31,31,31,31,31,31,31,]),}
 
 _lr_goto = { }
 for _k, _v in _lr_goto_items.items():
@@ -26,80 +26,81 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> mod","S'",1,None,None,None),
-  ('mod -> body','mod',1,'p_mod','',20),
-  ('body -> stmts','body',1,'p_body','',28),
-  ('body -> empty','body',1,'p_body_empty','',34),
-  ('stmts -> stmts stmts','stmts',2,'p_stmts','',40),
-  ('stmts -> stmt','stmts',1,'p_stmt_single','',46),
-  ('stmt -> const_decl','stmt',1,'p_stmt_decl','',52),
-  ('stmt -> var_decl','stmt',1,'p_stmt_decl','',53),
-  ('stmt -> func_decl','stmt',1,'p_stmt_decl','',54),
-  ('stmt -> foreign_decl','stmt',1,'p_stmt_decl','',55),
-  ('stmt -> assign_stmt','stmt',1,'p_stmt_logic','',61),
-  ('stmt -> if_stmt','stmt',1,'p_stmt_logic','',62),
-  ('stmt -> call_stmt','stmt',1,'p_stmt_logic','',63),
-  ('stmt -> while_stmt','stmt',1,'p_stmt_logic','',64),
-  ('stmt -> range_stmt','stmt',1,'p_stmt_logic','',65),
-  ('stmt -> for_stmt','stmt',1,'p_stmt_logic','',66),
-  ('stmt -> return_stmt','stmt',1,'p_stmt_logic','',67),
-  ('stmt -> print_stmt','stmt',1,'p_stmt_logic','',68),
-  ('const_decl -> CONST ID ASSIGN expr SEMI','const_decl',5,'p_const_decl','',76),
-  ('var_decl -> VAR type ID SEMI','var_decl',4,'p_var_decl','',82),
-  ('var_decl -> VAR type ID ASSIGN expr SEMI','var_decl',6,'p_var_decl_expr','',88),
-  ('func_decl -> signature LBRACE body RBRACE','func_decl',4,'p_func_decl','',94),
-  ('foreign_decl -> FOREIGN STRING signature SEMI','foreign_decl',4,'p_foreign_decl','',100),
-  ('signature -> DEF ID LPAREN params RPAREN ARROW type','signature',7,'p_signature','',106),
-  ('signature -> DEF ID LPAREN RPAREN ARROW type','signature',6,'p_signature_empty','',112),
-  ('signature -> DEF ID LPAREN RPAREN empty','signature',5,'p_signature_void','',118),
-  ('params -> params COMMA param','params',3,'p_params','',126),
-  ('params -> param','params',1,'p_params_single','',133),
-  ('param -> ID COLON type','param',3,'p_param_decl','',139),
-  ('assign_stmt -> store_location ASSIGN expr SEMI','assign_stmt',4,'p_assign_stmt','',147),
-  ('print_stmt -> PRINT expr SEMI','print_stmt',3,'p_print_stmt','',155),
-  ('range_stmt -> RANGE LPAREN exprlist RPAREN','range_stmt',4,'p_range_stmt','',161),
-  ('if_stmt -> IF expr LBRACE body RBRACE','if_stmt',5,'p_if_stmt','',175),
-  ('if_stmt -> IF expr LBRACE body RBRACE ELSE LBRACE body RBRACE','if_stmt',9,'p_ifelse_stmt','',181),
-  ('while_stmt -> WHILE expr LBRACE body RBRACE','while_stmt',5,'p_while_stmt','',187),
-  ('for_stmt -> FOR ID IN range_stmt LBRACE body RBRACE','for_stmt',7,'p_for_stmt','',193),
-  ('return_stmt -> RETURN expr SEMI','return_stmt',3,'p_return_stmt','',199),
-  ('expr -> PLUS expr','expr',2,'p_expr_unary','',207),
-  ('expr -> MINUS expr','expr',2,'p_expr_unary','',208),
-  ('expr -> LNOT expr','expr',2,'p_expr_unary','',209),
-  ('expr -> expr PLUS expr','expr',3,'p_expr_binary','',215),
-  ('expr -> expr MINUS expr','expr',3,'p_expr_binary','',216),
-  ('expr -> expr TIMES expr','expr',3,'p_expr_binary','',217),
-  ('expr -> expr DIVIDE expr','expr',3,'p_expr_binary','',218),
-  ('expr -> expr LT expr','expr',3,'p_relational_expr_binary','',224),
-  ('expr -> expr LE expr','expr',3,'p_relational_expr_binary','',225),
-  ('expr -> expr GT expr','expr',3,'p_relational_expr_binary','',226),
-  ('expr -> expr GE expr','expr',3,'p_relational_expr_binary','',227),
-  ('expr -> expr EQ expr','expr',3,'p_relational_expr_binary','',228),
-  ('expr -> expr NE expr','expr',3,'p_relational_expr_binary','',229),
-  ('expr -> expr LOR expr','expr',3,'p_relational_expr_binary','',230),
-  ('expr -> expr LAND expr','expr',3,'p_relational_expr_binary','',231),
-  ('expr -> LPAREN expr RPAREN','expr',3,'p_expr_group','',239),
-  ('expr -> call_expr','expr',1,'p_expr_func_call','',244),
-  ('expr -> load_location','expr',1,'p_expr_location','',249),
-  ('expr -> literal','expr',1,'p_expr_literal','',255),
-  ('exprlist -> exprlist COMMA exprlist','exprlist',3,'p_exprlist','',261),
-  ('exprlist -> expr','exprlist',1,'p_exprlist_single','',267),
-  ('call_stmt -> call_expr SEMI','call_stmt',2,'p_call_stmt','',275),
-  ('call_expr -> ID LPAREN exprlist RPAREN','call_expr',4,'p_function_call1','',281),
-  ('call_expr -> ID LPAREN RPAREN','call_expr',3,'p_function_call2','',287),
-  ('literal -> INTEGER','literal',1,'p_literal','',295),
-  ('literal -> FLOAT','literal',1,'p_literal','',296),
-  ('literal -> STRING','literal',1,'p_literal','',297),
-  ('literal -> TRUE','literal',1,'p_literal_bool','',303),
-  ('literal -> FALSE','literal',1,'p_literal_bool','',304),
-  ('load_location -> ID','load_location',1,'p_load_location_var','',316),
-  ('store_location -> ID','store_location',1,'p_store_location_var','',322),
-  ('tuple -> tuple COMMA tuple','tuple',3,'p_tuple1','',330),
-  ('tuple -> expr','tuple',1,'p_tuple2','',336),
-  ('load_location -> ID LBRACKET tuple RBRACKET','load_location',4,'p_load_location_index','',344),
-  ('load_location -> ID LBRACKET expr RBRACKET','load_location',4,'p_load_location_index','',345),
-  ('store_location -> ID LBRACKET tuple RBRACKET','store_location',4,'p_store_location_index','',351),
-  ('store_location -> ID LBRACKET expr RBRACKET','store_location',4,'p_store_location_index','',352),
-  ('type -> type LBRACKET type RBRACKET','type',4,'p_paramtype','',360),
-  ('type -> ID','type',1,'p_typename','',366),
-  ('empty -> <empty>','empty',0,'p_empty','',374),
+  ('mod -> body','mod',1,'p_mod','',22),
+  ('body -> stmts','body',1,'p_body','',30),
+  ('body -> empty','body',1,'p_body_empty','',36),
+  ('stmts -> stmts stmts','stmts',2,'p_stmts','',42),
+  ('stmts -> stmt','stmts',1,'p_stmt_single','',48),
+  ('stmt -> const_decl','stmt',1,'p_stmt_decl','',54),
+  ('stmt -> var_decl','stmt',1,'p_stmt_decl','',55),
+  ('stmt -> func_decl','stmt',1,'p_stmt_decl','',56),
+  ('stmt -> foreign_decl','stmt',1,'p_stmt_decl','',57),
+  ('stmt -> assign_stmt','stmt',1,'p_stmt_logic','',63),
+  ('stmt -> if_stmt','stmt',1,'p_stmt_logic','',64),
+  ('stmt -> call_stmt','stmt',1,'p_stmt_logic','',65),
+  ('stmt -> while_stmt','stmt',1,'p_stmt_logic','',66),
+  ('stmt -> range_stmt','stmt',1,'p_stmt_logic','',67),
+  ('stmt -> for_stmt','stmt',1,'p_stmt_logic','',68),
+  ('stmt -> return_stmt','stmt',1,'p_stmt_logic','',69),
+  ('stmt -> print_stmt','stmt',1,'p_stmt_logic','',70),
+  ('const_decl -> CONST ID ASSIGN expr SEMI','const_decl',5,'p_const_decl','',78),
+  ('var_decl -> VAR type ID SEMI','var_decl',4,'p_var_decl','',84),
+  ('var_decl -> VAR type ID ASSIGN expr SEMI','var_decl',6,'p_var_decl_expr','',90),
+  ('func_decl -> signature LBRACE body RBRACE','func_decl',4,'p_func_decl','',96),
+  ('foreign_decl -> FOREIGN STRING signature SEMI','foreign_decl',4,'p_foreign_decl','',102),
+  ('signature -> DEF ID LPAREN params RPAREN ARROW type','signature',7,'p_signature','',108),
+  ('signature -> DEF ID LPAREN RPAREN ARROW type','signature',6,'p_signature_empty','',114),
+  ('signature -> DEF ID LPAREN RPAREN empty','signature',5,'p_signature_void','',120),
+  ('params -> params COMMA param','params',3,'p_params','',128),
+  ('params -> param','params',1,'p_params_single','',135),
+  ('param -> ID COLON type','param',3,'p_param_decl','',141),
+  ('assign_stmt -> store_location ASSIGN expr SEMI','assign_stmt',4,'p_assign_stmt','',149),
+  ('print_stmt -> PRINT expr SEMI','print_stmt',3,'p_print_stmt','',157),
+  ('range_stmt -> RANGE LPAREN exprlist RPAREN','range_stmt',4,'p_range_stmt','',163),
+  ('if_stmt -> IF expr LBRACE body RBRACE','if_stmt',5,'p_if_stmt','',177),
+  ('if_stmt -> IF expr LBRACE body RBRACE ELSE LBRACE body RBRACE','if_stmt',9,'p_ifelse_stmt','',183),
+  ('while_stmt -> WHILE expr LBRACE body RBRACE','while_stmt',5,'p_while_stmt','',189),
+  ('for_stmt -> FOR ID IN range_stmt LBRACE body RBRACE','for_stmt',7,'p_for_stmt','',195),
+  ('for_stmt -> FOR ID IN call_expr LBRACE body RBRACE','for_stmt',7,'p_for_intrinsic_stmt','',201),
+  ('return_stmt -> RETURN expr SEMI','return_stmt',3,'p_return_stmt','',221),
+  ('expr -> PLUS expr','expr',2,'p_expr_unary','',229),
+  ('expr -> MINUS expr','expr',2,'p_expr_unary','',230),
+  ('expr -> LNOT expr','expr',2,'p_expr_unary','',231),
+  ('expr -> expr PLUS expr','expr',3,'p_expr_binary','',237),
+  ('expr -> expr MINUS expr','expr',3,'p_expr_binary','',238),
+  ('expr -> expr TIMES expr','expr',3,'p_expr_binary','',239),
+  ('expr -> expr DIVIDE expr','expr',3,'p_expr_binary','',240),
+  ('expr -> expr LT expr','expr',3,'p_relational_expr_binary','',246),
+  ('expr -> expr LE expr','expr',3,'p_relational_expr_binary','',247),
+  ('expr -> expr GT expr','expr',3,'p_relational_expr_binary','',248),
+  ('expr -> expr GE expr','expr',3,'p_relational_expr_binary','',249),
+  ('expr -> expr EQ expr','expr',3,'p_relational_expr_binary','',250),
+  ('expr -> expr NE expr','expr',3,'p_relational_expr_binary','',251),
+  ('expr -> expr LOR expr','expr',3,'p_relational_expr_binary','',252),
+  ('expr -> expr LAND expr','expr',3,'p_relational_expr_binary','',253),
+  ('expr -> LPAREN expr RPAREN','expr',3,'p_expr_group','',261),
+  ('expr -> call_expr','expr',1,'p_expr_func_call','',266),
+  ('expr -> load_location','expr',1,'p_expr_location','',271),
+  ('expr -> literal','expr',1,'p_expr_literal','',277),
+  ('exprlist -> exprlist COMMA exprlist','exprlist',3,'p_exprlist','',283),
+  ('exprlist -> expr','exprlist',1,'p_exprlist_single','',289),
+  ('call_stmt -> call_expr SEMI','call_stmt',2,'p_call_stmt','',297),
+  ('call_expr -> ID LPAREN exprlist RPAREN','call_expr',4,'p_function_call1','',303),
+  ('call_expr -> ID LPAREN RPAREN','call_expr',3,'p_function_call2','',309),
+  ('literal -> INTEGER','literal',1,'p_literal','',317),
+  ('literal -> FLOAT','literal',1,'p_literal','',318),
+  ('literal -> STRING','literal',1,'p_literal','',319),
+  ('literal -> TRUE','literal',1,'p_literal_bool','',325),
+  ('literal -> FALSE','literal',1,'p_literal_bool','',326),
+  ('load_location -> ID','load_location',1,'p_load_location_var','',338),
+  ('store_location -> ID','store_location',1,'p_store_location_var','',344),
+  ('tuple -> tuple COMMA tuple','tuple',3,'p_tuple1','',352),
+  ('tuple -> expr','tuple',1,'p_tuple2','',358),
+  ('load_location -> ID LBRACKET tuple RBRACKET','load_location',4,'p_load_location_index','',366),
+  ('load_location -> ID LBRACKET expr RBRACKET','load_location',4,'p_load_location_index','',367),
+  ('store_location -> ID LBRACKET tuple RBRACKET','store_location',4,'p_store_location_index','',373),
+  ('store_location -> ID LBRACKET expr RBRACKET','store_location',4,'p_store_location_index','',374),
+  ('type -> type LBRACKET type RBRACKET','type',4,'p_paramtype','',382),
+  ('type -> ID','type',1,'p_typename','',388),
+  ('empty -> <empty>','empty',0,'p_empty','',396),
 ]
@@ -0,0 +1,181 @@
+"""
+Content-addressed cache of compiled BLIR modules.
+
+The optimized LLVM bitcode of a module is keyed by its source text, the
+compiler options and the target, and kept both in memory and on disk,
+so the same kernels are not compiled again in every process.
+"""
+
+import os
+import io
+import hashlib
+import tempfile
+from types import ModuleType
+from multiprocessing import Pool, cpu_count
+
+import llvm
+import llvm.ee as le
+from llvm.workaround.avx_support import detect_avx_support
+
+from passes import compile
+from bind import wrap_llvm_bitcode
+
+# Bump this whenever the code generation changes in a way that makes
+# the cached bitcode stale.
+CACHE_VERSION = 1
+
+def default_cachedir():
+    """ The directory of the on-disk cache, ``$BLIR_CACHE_DIR`` if set.
+    An empty ``$BLIR_CACHE_DIR`` disables the on-disk cache. """
+    path = os.environ.get('BLIR_CACHE_DIR')
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'), '.blaze', 'blir')
+    return path or None
+
+def target():
+    """ A description of the target the bitcode is generated for. """
+    return '%s-%s' % (le.get_default_triple(),
+                      'avx' if detect_avx_support() else 'noavx')
+
+#------------------------------------------------------------------------
+# Cache
+#------------------------------------------------------------------------
+
+class BitcodeCache(object):
+
+    def __init__(self, cachedir=None):
+        self.memory = {}
+        self.cachedir = cachedir
+        self.hits = self.misses = 0
+
+    def makedirs(self):
+        """ Create the cache directory, on the first write. Returns
+        whether the on-disk cache is usable. """
+        if self.cachedir and not os.path.isdir(self.cachedir):
+            try:
+                os.makedirs(self.cachedir)
+            except OSError:
+                # Read-only filesystem or the like, stay in memory
+                if not os.path.isdir(self.cachedir):
+                    self.cachedir = None
+        return bool(self.cachedir)
+
+    def key(self, source, opts):
+        """ The content address of a module. """
+        h = hashlib.sha1()
+        h.update('%d\0%s\0%s\0' % (CACHE_VERSION, llvm.__version__, target()))
+        h.update(repr(sorted(opts.items())))
+        h.update('\0')
+        h.update(source)
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cachedir, key + '.bc')
+
+    def get(self, key):
+        """ The bitcode stored for ``key``, or None. """
+        bitcode = self.memory.get(key)
+        if bitcode is None and self.cachedir:
+            try:
+                with open(self.path(key), 'rb') as fd:
+                    bitcode = fd.read()
+            except IOError:
+                return None
+            self.memory[key] = bitcode
+        return bitcode
+
+    def put(self, key, bitcode):
+        self.memory[key] = bitcode
+        if self.makedirs():
+            # Write to a temporary file and rename it, so concurrent
+            # processes never see a partial entry
+            fd, tmpname = tempfile.mkstemp(dir=self.cachedir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(bitcode)
+                os.rename(tmpname, self.path(key))
+            except (IOError, OSError):
+                if os.path.exists(tmpname):
+                    os.remove(tmpname)
+
+    def compile(self, source, **opts):
+        """ The optimized bitcode for the given source, compiling it
+        only if it is not in the cache. """
+        opts.setdefault('O', 2)
+        key = self.key(source, opts)
+
+        bitcode = self.get(key)
+        if bitcode is not None:
+            self.hits += 1
+            return bitcode
+
+        self.misses += 1
+        ast, env = compile(source, **opts)
+        buf = io.BytesIO()
+        env['lmodule'].to_bitcode(buf)
+        bitcode = buf.getvalue()
+
+        self.put(key, bitcode)
+        return bitcode
+
+    def clear(self):
+        """ Drop all the entries, both in memory and on disk. """
+        self.memory.clear()
+        if self.cachedir and os.path.isdir(self.cachedir):
+            for fname in os.listdir(self.cachedir):
+                if fname.endswith('.bc'):
+                    os.remove(os.path.join(self.cachedir, fname))
+
+bitcode_cache = BitcodeCache(default_cachedir())
+
+#------------------------------------------------------------------------
+# Toplevel
+#------------------------------------------------------------------------
+
+def compile_bitcode(source, **opts):
+    """ Compile BLIR source into optimized LLVM bitcode, going through
+    the cache. """
+    return bitcode_cache.compile(source, **opts)
+
+def _compile_worker(args):
+    source, opts = args
+    return compile_bitcode(source, **opts)
+
+def compile_many(sources, processes=None, **opts):
+    """ Compile a batch of BLIR sources into optimized LLVM bitcode,
+    compiling the ones not in the cache in parallel worker processes.
+    Returns the list of bitcodes, in the order of ``sources``. """
+    opts.setdefault('O', 2)
+    sources = list(sources)
+    keys = [bitcode_cache.key(source, opts) for source in sources]
+
+    bitcodes = [bitcode_cache.get(key) for key in keys]
+    missing = [i for i, bitcode in enumerate(bitcodes) if bitcode is None]
+
+    if len(missing) > 1:
+        pool = Pool(min(processes or cpu_count(), len(missing)))
+        try:
+            compiled = pool.map(_compile_worker,
+                                [(sources[i], opts) for i in missing])
+        finally:
+            pool.close()
+            pool.join()
+        # The workers already stored them on disk
+        for i, bitcode in zip(missing, compiled):
+            bitcode_cache.memory[keys[i]] = bitcode
+            bitcodes[i] = bitcode
+    else:
+        for i in missing:
+            bitcodes[i] = compile_bitcode(sources[i], **opts)
+
+    return bitcodes
+
+def load_module(source, libs=None, **opts):
+    """ Compile BLIR source ( or fetch it from the cache ) and return a
+    Python module with ctypes wrappers for its public functions. """
+    from exc import load_libs
+
+    load_libs(libs)
+    mod = ModuleType('blir_wrapper')
+    wrap_llvm_bitcode(compile_bitcode(source, **opts), mod)
+    return mod
@@ -242,8 +242,14 @@ class SSARewrite(NodeVisitor):
         self.visit(node.start)
         self.visit(node.stop)
 
+    def visit_ParallelRange(self, node):
+        self.visit_Range(node)
+
     def visit_ForStatement(self, node):
-        forblock = blocks.ForBlock()
+        if isinstance(node.iter, syntax.ParallelRange):
+            forblock = blocks.ParallelForBlock()
+        else:
+            forblock = blocks.ForBlock()
         self.block.next_block = forblock
         self.block = forblock
 
@@ -254,6 +260,8 @@ class SSARewrite(NodeVisitor):
         forblock.start_var = node.iter.start.ssa_name
         forblock.stop_var = node.iter.stop.ssa_name
         forblock.var = node.var
+        if isinstance(forblock, blocks.ParallelForBlock):
+            forblock.reductions = node.reductions
 
         # Generate blocks for the body
         forblock.body = blocks.BasicBlock()
@@ -357,6 +365,8 @@ class BlockDebug(object):
         self.visit_BasicBlock(block)
         self.visit(block.body)
 
+    visit_ParallelForBlock = visit_ForBlock
+
     def visit_WhileBlock(self,block):
         self.visit_BasicBlock(block)
         self.visit(block.body)
@@ -1,4 +1,5 @@
 import btypes
+import blocks
 import ctypes
 import errors
 
@@ -6,7 +7,9 @@ import llvm.ee as le
 import llvm.core as lc
 import llvm.passes as lp
 
+from inspect import getargspec
 from llvm import LLVMException
+from llvm.workaround.avx_support import detect_avx_support
 from llvm.core import Module, Builder, Function, Type, Constant, GlobalVariable
 
 from collections import defaultdict
@@ -103,12 +106,19 @@ logic_instrs = { '&&', '||' }
 # Prelude
 #------------------------------------------------------------------------
 
+# void kernel(int start, int stop, void *env)
+kernel_type = Type.function(void_type, [int_type, int_type, string_type], False)
+
 prelude = {
     'show_int'    : Type.function(void_type, [int_type], False),
     'show_float'  : Type.function(void_type, [float_type], False),
     'show_bool'   : Type.function(void_type, [bool_type], False),
     'show_string' : Type.function(void_type, [string_type], False),
     'show_array' : Type.function(void_type,  [any_type], False),
+    'parallel_range' : Type.function(void_type, [pointer(kernel_type),
+                        int_type, int_type, string_type], False),
+    'parallel_combine_begin' : Type.function(void_type, [], False),
+    'parallel_combine_end'   : Type.function(void_type, [], False),
 }
 
 
@@ -131,18 +141,46 @@ def build_intrinsics(mod):
     #mod.verify()
     return mod, ins
 
+#------------------------------------------------------------------------
+# Reductions
+#------------------------------------------------------------------------
+
+def reduction_identity(ty, op):
+    """ The neutral element of the reduction ``op`` over ``ty``. """
+    value = {'+': 0, '*': 1}[op]
+    if ty == float_type:
+        return Constant.real(float_type, float(value))
+    return Constant.int(ty, value)
+
+def reduction_combine(builder, op, left, right):
+    """ Combine two partial results of the reduction ``op``. """
+    if left.type == float_type:
+        combine = {'+': builder.fadd, '*': builder.fmul}[op]
+    else:
+        combine = {'+': builder.add, '*': builder.mul}[op]
+    return combine(left, right)
+
 #------------------------------------------------------------------------
 # Function Level Codegen
 #------------------------------------------------------------------------
 
 CONSTANT_NAMING = '.conststr.%x'
 MODULE_NAMING   = '.module.%x'
+KERNEL_NAMING   = '%s.parallel.%d'
 
 class LLVMEmitter(object):
-    """ LLVM backend for Blir opcodes. """
+    """ LLVM backend for Blir opcodes.
+
+    If ``noalias`` is set the array arguments of the functions are
+    assumed not to overlap, and ``align`` is the alignment ( in bytes )
+    assumed for the elements loaded from and stored into arrays.
+    Both let the vectorizers emit SIMD code without runtime checks.
+    """
 
-    def __init__(self, name="blirkernel"):
+    def __init__(self, name="blirkernel", noalias=False, align=None):
         self.module = Module.new(name)
+        self.noalias = noalias
+        self.align = align or 0
 
         # this is a stack based visitor
         self.function = None
@@ -153,6 +191,8 @@ class LLVMEmitter(object):
         self.locals = {}
         self.stack = {} # stack allocated referred by ssa ref
         self.refs = defaultdict(dict) # opaque referencse
+        self.kernels = 0 # outlined parallel loops
+        self.reductions = [] # (shared, private, operator) of the kernel
 
         self.intrinsics = {}
         self.add_prelude()
@@ -178,6 +218,13 @@ class LLVMEmitter(object):
 
         self.function = Function.new(self.module, func_type, name)
 
+        if self.noalias:
+            for arg in self.function.args:
+                # array and blaze arguments are pointers to structs
+                if (arg.type.kind == lc.TYPE_POINTER and
+                    arg.type.pointee.kind == lc.TYPE_STRUCT):
+                    arg.add_attribute(lc.ATTR_NO_ALIAS)
+
         self.block = self.function.append_basic_block("entry")
         self.builder = Builder.new(self.block)
         self.exit_block = self.function.append_basic_block("exit")
@@ -199,6 +246,89 @@ class LLVMEmitter(object):
         else:
             self.builder.ret_void()
 
+    def start_kernel(self, var, reductions):
+        """ Start a kernel outlining the body of a parallel loop over
+        ``var``. The variables of the current function are shared with
+        the kernel through an environment of pointers to them, built in
+        the current function. The ``reductions`` variables ( a dict of
+        their operators ) are private to each call of the kernel, and
+        combined with the shared ones when it returns.
+
+        Returns the environment ( a ``void*`` ) and the state of the
+        current function, for ``end_kernel``.
+        """
+        # the loop variable is private to the kernel, the return
+        # value is not reachable from it
+        names = sorted(name for name in self.locals
+                       if name not in (var, 'retval'))
+        # arrays are shared as their struct, the rest are pointers
+        arrays = dict((name, self.locals[name]) for name in names
+                      if isinstance(self.locals[name], dict))
+        captured = [arrays[name]['_struct'] if name in arrays
+                    else self.locals[name] for name in names]
+
+        env_type = Type.struct([value.type for value in captured])
+        env = self.builder.alloca(env_type, 'env')
+        for i, value in enumerate(captured):
+            self.builder.store(value, self.builder.gep(env, [zero, self.const(i)]))
+        env = self.builder.bitcast(env, string_type)
+
+        state = (self.function, self.block, self.builder, self.exit_block,
+                 self.locals, self.stack, self.refs, self.reductions)
+
+        self.kernels += 1
+        name = KERNEL_NAMING % (self.function.name, self.kernels)
+        self.function = Function.new(self.module, kernel_type, name)
+        self.function.linkage = lc.LINKAGE_INTERNAL
+
+        self.block = self.function.append_basic_block("entry")
+        self.builder = Builder.new(self.block)
+        self.exit_block = self.function.append_basic_block("exit")
+        self.locals = {}
+        self.stack = {}
+        self.refs = defaultdict(dict)
+        self.reductions = []
+
+        # unpack the environment
+        envp = self.builder.bitcast(self.function.args[2], pointer(env_type))
+        for i, name in enumerate(names):
+            ptr = self.builder.load(self.builder.gep(envp, [zero, self.const(i)]))
+            if name in arrays:
+                self.load_array(name, ptr, arrays[name]['_dtype'])
+            elif name in reductions:
+                op = reductions[name]
+                private = self.builder.alloca(ptr.type.pointee, name)
+                self.builder.store(reduction_identity(ptr.type.pointee, op),
+                                   private)
+                self.reductions.append((ptr, private, op))
+                self.locals[name] = private
+            else:
+                self.locals[name] = ptr
+
+        return env, state
+
+    def end_kernel(self, state):
+        """ Finish the kernel started by ``start_kernel``, and return to
+        the function it was started from. """
+        kernel = self.function
+        self.builder.branch(self.exit_block)
+        self.builder.position_at_end(self.exit_block)
+
+        # combine the partial results of this chunk of the range
+        if self.reductions:
+            self.call('parallel_combine_begin', [])
+            for shared, private, op in self.reductions:
+                value = reduction_combine(self.builder, op,
+                                          self.builder.load(shared),
+                                          self.builder.load(private))
+                self.builder.store(value, shared)
+            self.call('parallel_combine_end', [])
+        self.builder.ret_void()
+
+        (self.function, self.block, self.builder, self.exit_block,
+         self.locals, self.stack, self.refs, self.reductions) = state
+        return kernel
+
     def add_prelude(self):
         for name, function in prelude.iteritems():
             self.intrinsics[name] = Function.new(
@@ -342,7 +472,7 @@ class LLVMEmitter(object):
             offset = self.stack[index]
 
         val = self.builder.gep(data_ptr, [offset])
-        elt = self.builder.load(val)
+        elt = self.builder.load(val, align=self.align)
         self.stack[target] = elt
 
     def op_ARRAYSTORE(self, source, index, target, cc=False):
@@ -366,7 +496,7 @@ class LLVMEmitter(object):
             offset = self.stack[index]
 
         val = self.builder.gep(data_ptr, [offset])
-        self.builder.store(self.stack[target], val)
+        self.builder.store(self.stack[target], val, align=self.align)
 
     def op_BINARY_ADD(self, ty, left, right, val):
         lv = self.stack[left]
@@ -520,23 +650,7 @@ class LLVMEmitter(object):
             # NumPy ndarray
             # -------------
             else:
-                struct_ptr = arg
-
-                zero = self.const(0)
-                one  = self.const(1)
-                two  = self.const(2)
-
-                data    = self.builder.gep(struct_ptr, [zero, zero], name=(name + '_data'))
-                dims    = self.builder.gep(struct_ptr, [zero, one], name=(name + '_dims'))
-                strides = self.builder.gep(struct_ptr, [zero, two], name=(name + '_strides'))
-
-                self.refs[name]['_struct'] = struct_ptr
-                self.refs[name]['_dtype'] = typemap[ty.arg.type.name]
-                self.refs[name]['data']    = self.builder.load(data)
-                self.refs[name]['dims']    = self.builder.load(dims)
-                self.refs[name]['strides'] = self.builder.load(strides)
-
-                self.locals[name] = self.refs[name]
+                self.load_array(name, arg, typemap[ty.arg.type.name])
 
         # opaque any types
         elif arg.type == any_type:
@@ -548,14 +662,49 @@ class LLVMEmitter(object):
             self.builder.store(arg, var)
             self.locals[name] = var
 
+    def load_array(self, name, struct_ptr, dtype):
+        zero = self.const(0)
+        one  = self.const(1)
+        two  = self.const(2)
+
+        data    = self.builder.gep(struct_ptr, [zero, zero], name=(name + '_data'))
+        dims    = self.builder.gep(struct_ptr, [zero, one], name=(name + '_dims'))
+        strides = self.builder.gep(struct_ptr, [zero, two], name=(name + '_strides'))
+
+        self.refs[name]['_struct'] = struct_ptr
+        self.refs[name]['_dtype'] = dtype
+        self.refs[name]['data']    = self.builder.load(data)
+        self.refs[name]['dims']    = self.builder.load(dims)
+        self.refs[name]['strides'] = self.builder.load(strides)
+
+        self.locals[name] = self.refs[name]
+
 #------------------------------------------------------------------------
 # Module Level Codegen
 #------------------------------------------------------------------------
 
+def innermost(block):
+    """ Whether a chain of blocks does not contain any loop. """
+    while block is not None:
+        if isinstance(block, (blocks.ForBlock, blocks.WhileBlock)):
+            return False
+        if isinstance(block, blocks.IfBlock):
+            if not (innermost(block.true_branch) and
+                    innermost(block.false_branch)):
+                return False
+        block = block.next_block
+    return True
+
 class BlockEmitter(object):
+    """ Emits the control flow of the blocks of a function.
+
+    Innermost ``for`` loops are unrolled ``unroll`` times, followed by
+    a loop for the remaining iterations.
+    """
 
-    def __init__(self, generator):
+    def __init__(self, generator, unroll=None):
         self.cgen = generator
+        self.unroll = unroll or 1
 
     def visit(self, block):
         while block is not None:
@@ -596,13 +745,29 @@ class BlockEmitter(object):
 
     def visit_ForBlock(self, block):
         self.cgen.visit_op(block)
+        self.emit_loop(block, self.cgen.stack[block.start_var],
+                       self.cgen.stack[block.stop_var])
 
+    def visit_ParallelForBlock(self, block):
+        """ The body of the loop is outlined into a kernel looping over
+        a chunk of the range, and the prelude runs the kernel over the
+        whole range across the threads of the runtime. """
+        self.cgen.visit_op(block)
+        start = self.cgen.stack[block.start_var]
+        stop  = self.cgen.stack[block.stop_var]
+
+        env, state = self.cgen.start_kernel(block.var, block.reductions)
+        args = self.cgen.function.args
+        self.emit_loop(block, args[0], args[1])
+        kernel = self.cgen.end_kernel(state)
+
+        self.cgen.call('parallel_range', [kernel, start, stop, env])
+
+    def emit_loop(self, block, startv, stopv):
         # convienance aliases for the cgen parent
         builder = self.cgen.builder
         const   = self.cgen.const
 
-        start = block.start_var
-        stop  = block.stop_var
         step  = 1
 
         init_block = self.cgen.add_block('for.init')
@@ -617,13 +782,33 @@ class BlockEmitter(object):
         varname = block.var
         inc = builder.alloca(int_type, varname)
         self.cgen.locals[varname] = inc
-        builder.store(self.cgen.stack[start], inc)
+        builder.store(startv, inc)
         # ------------------------------------------
         self.cgen.branch(test_block)
         self.cgen.set_block(test_block)
         # ------------------------------------------
 
-        stopv = self.cgen.stack[stop]
+        unroll = self.unroll
+        if unroll > 1 and innermost(block.body):
+            ubody_block = self.cgen.add_block('for.unrolled.body')
+            rtest_block = self.cgen.add_block('for.cond')
+
+            # while i + (unroll - 1) < stop: unroll copies of the body
+            last = builder.add(const(unroll - 1), builder.load(inc))
+            cond = builder.icmp(lc.ICMP_SLT, last, stopv)
+            builder.cbranch(cond, ubody_block, rtest_block)
+
+            self.cgen.set_block(ubody_block)
+            for i in range(unroll):
+                self.visit(block.body)
+                succ = builder.add(const(step), builder.load(inc))
+                builder.store(succ, inc)
+            self.cgen.branch(test_block)
+
+            # The remaining iterations
+            test_block = rtest_block
+            self.cgen.set_block(test_block)
+
         cond = builder.icmp(lc.ICMP_SLT, builder.load(inc), stopv)
         builder.cbranch(cond, body_block, end_block)
 
@@ -662,12 +847,29 @@ class BlockEmitter(object):
 # Optimizer
 #------------------------------------------------------------------------
 
-class LLVMOptimizer(object):
+def host_target(cpu=None):
+    """ A target machine for the host CPU, with its features. """
+    if cpu is None:
+        cpu = getattr(le, 'get_host_cpu_name', lambda: '')()
+    features = '' if detect_avx_support() else '-avx'
+    return le.TargetMachine.new(cpu=cpu, features=features,
+                                cm=le.CM_JITDEFAULT)
 
-    def __init__(self, module, opt_level=3):
-        tc = le.TargetMachine.new(features='', cm=le.CM_JITDEFAULT)
-        self.pm, self.fpm = lp.build_pass_managers(tc, loop_vectorize=False,
-                vectorize=True, fpm=False, mod=module)
+class LLVMOptimizer(object):
+    """ Module level optimizer.
+
+    ``vectorize`` enables the LLVM loop vectorizer ( and the SLP
+    vectorizer on the LLVM versions that have it ), which generates
+    code for the SIMD units of the host CPU ( or ``cpu`` ).
+    """
+
+    def __init__(self, module, opt_level=3, vectorize=False, cpu=None):
+        tc = host_target(cpu)
+        kwargs = dict(opt=opt_level, loop_vectorize=vectorize,
+                      vectorize=True, fpm=False, mod=module)
+        if 'slp_vectorize' in getargspec(lp.build_pass_managers).args:
+            kwargs['slp_vectorize'] = vectorize
+        self.pm, self.fpm = lp.build_pass_managers(tc, **kwargs)
 
     def runmodule(self, module):
         self.pm.run(module)
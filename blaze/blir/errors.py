@@ -1,49 +1,53 @@
 import sys
+from threading import local
 from contextlib import contextmanager
 
 _listeners = []
-_errlog = []
-_count = 0
+
+# The errors of a compile are tracked per thread, so that concurrent
+# compiles do not see each other failures.
+_state = local()
+
+def _errors():
+    if not hasattr(_state, 'errlog'):
+        _state.errlog = []
+        _state.count = 0
+    return _state
 
 #------------------------------------------------------------------------
 # Error Reporting
 #------------------------------------------------------------------------
 
 def error(lineno, message, filename=None):
-    global _count, _errlog
+    state = _errors()
     if not filename:
         errmsg = "{}: {}".format(lineno, message)
     else:
         errmsg = "{}:{}: {}".format(filename, lineno, message)
     for listener in _listeners:
         listener(errmsg)
-    _errlog.append(errmsg)
-    _count += 1
+    state.errlog.append(errmsg)
+    state.count += 1
 
 def _default_handler(msg):
     sys.stderr.write(msg+"\n")
     return None
 
 def reset():
-    global _count
-    global _errlog
-    _count = 0
+    _errors().count = 0
 
 def log():
-    global _errlog
-    return _errlog
+    return _errors().errlog
 
 #------------------------------------------------------------------------
 # Toplevel
 #------------------------------------------------------------------------
 
 def occurred():
-    global _count
-    return _count > 0
+    return _errors().count > 0
 
 def reported():
-    global _count
-    return _count
+    return _errors().count
 
 @contextmanager
 def listen(handler=_default_handler):
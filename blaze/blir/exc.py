@@ -110,22 +110,37 @@ def wrap_arguments(fn, args):
 # Toplevel
 #------------------------------------------------------------------------
 
+_libs = {}
+
+def load_libs(libs=None):
+    """ Load the shared libraries compiled modules are linked against. """
+    libs = libs or ['prelude']
+
+    for lib in libs:
+        if lib in _libs:
+            continue
+        if 'darwin' in sys.platform:
+            prelude = join(dirname(realpath(__file__)), lib + '.dylib')
+        elif 'linux' in sys.platform:
+            prelude = join(dirname(realpath(__file__)), lib+ '.so')
+        else:
+            raise NotImplementedError
+
+        _libs[lib] = ctypes.CDLL(prelude, ctypes.RTLD_GLOBAL)
+
+        if lib == 'prelude' and _loop_runtime is None:
+            try:
+                use_runtime()
+            except ImportError:
+                # The runtime is not built, the parallel_range loops
+                # run in the calling thread
+                pass
+
 class Context(object):
 
     def __init__(self, env, libs=None):
         self.destroyed = False
-        libs = libs or ['prelude']
-
-        for lib in libs:
-            if 'darwin' in sys.platform:
-                prelude = join(dirname(realpath(__file__)), lib + '.dylib')
-            elif 'linux' in sys.platform:
-                prelude = join(dirname(realpath(__file__)), lib+ '.so')
-            else:
-                raise NotImplementedError
-
-            # XXX: yeah, don't do this
-            ctypes._dlopen(prelude, ctypes.RTLD_GLOBAL)
+        load_libs(libs)
 
         cgen = env['cgen']
 
@@ -193,3 +208,111 @@ def execute(ctx, args=None, fname=None, timing=False):
         print 'Time %.6f' % (time.time() - start)
 
     return res
+
+#------------------------------------------------------------------------
+# Parallel Execution
+#------------------------------------------------------------------------
+
+_runtime = None
+_loop_runtime = None
+
+def use_runtime(rts=None):
+    """
+    Run the ``parallel_range`` loops of compiled modules across the
+    threads of ``rts``, a new runtime with a thread per core by default.
+    The runtime should not be given to ``parallel_for`` as well.
+    """
+    global _loop_runtime
+    from multiprocessing import cpu_count
+    from blaze.rts.wrapper import Runtime, RUN_RANGE
+
+    load_libs(['prelude'])
+    rts = rts or Runtime(cpu_count())
+    # Waits for the running loop, if any
+    _libs['prelude'].Blir_SetRuntime(ctypes.c_void_p(RUN_RANGE),
+                                     ctypes.c_void_p(rts.handle))
+    previous, _loop_runtime = _loop_runtime, rts
+    if previous is not None and previous is not rts:
+        previous.close()
+    return rts
+
+def runtime():
+    """ The default thread pool runtime, with a thread per core. """
+    global _runtime
+    if _runtime is None:
+        from multiprocessing import cpu_count
+        from blaze.rts.wrapper import Runtime
+        _runtime = Runtime(cpu_count())
+    return _runtime
+
+def _kernel_args(ctx, fname, arg):
+    lfn = ctx.lookup_fn(fname)
+    if len(lfn.argtypes) != 3:
+        raise TypeError('Parallel kernels take (start : int, stop : int, '
+                        'args) arguments, %s has %d' % (fname, len(lfn.argtypes)))
+
+    if arg is None:
+        return None, 0
+    carg = adapt(lfn.argtypes[2], arg)
+    if isinstance(carg, ctypes.Structure):
+        # by reference, the struct is kept alive by the caller
+        return carg, ctypes.addressof(carg)
+    return carg, ctypes.cast(carg, ctypes.c_void_p).value
+
+def parallel_for(ctx, fname, start, stop, arg=None, chunk=0, rts=None):
+    """
+    Run the loop body ``fname`` over the [start, stop) range across the
+    cores. Loops written with the ``parallel_range`` intrinsic are
+    outlined by the compiler, the body here is a BLIR function like::
+
+        def body(start : int, stop : int, x : array[float]) -> void {
+            for i in range(start, stop) { ... }
+        }
+
+    that is called on chunks of the range, with ``arg`` as its last
+    argument. Returns once the whole range is done.
+    """
+    carg, argptr = _kernel_args(ctx, fname, arg)
+    rts = rts or runtime()
+    rts.run(ctx.lookup_fnptr(fname), start, stop, argptr, chunk=chunk)
+
+def parallel_reduce(ctx, fname, start, stop, arg=None, op='sum', chunk=0,
+                    rts=None):
+    """
+    Like ``parallel_for``, but the body returns a float with the partial
+    result of its chunk, and the partial results are combined with
+    ``op`` ( 'sum', 'prod', 'min' or 'max' ).
+    """
+    carg, argptr = _kernel_args(ctx, fname, arg)
+    rts = rts or runtime()
+    return rts.reduce(ctx.lookup_fnptr(fname), start, stop, argptr,
+                      op=op, chunk=chunk)
+
+#------------------------------------------------------------------------
+# Chunked Execution
+#------------------------------------------------------------------------
+
+def chunked_execute(ctx, fname, inputs, output):
+    """
+    Run the kernel ``fname`` over the chunks of the ``inputs`` data
+    descriptors, appending the results to the carray of the ``output``
+    data descriptor. The kernel is a BLIR function like::
+
+        def add(n : int, a : array[float], b : array[float],
+                out : array[float]) -> void {
+            var int i;
+            for i in range(0, n) {
+                out[i] = a[i] + b[i];
+            }
+        }
+
+    that is called with every decompressed chunk, from C.
+    """
+    from blaze.desc.llexecutor import execute_chunked
+
+    lfn = ctx.lookup_fn(fname)
+    if len(lfn.argtypes) != len(inputs) + 2:
+        raise TypeError('%s takes %d arguments, a chunked kernel over %d '
+                        'inputs takes %d' % (fname, len(lfn.argtypes),
+                                             len(inputs), len(inputs) + 2))
+    execute_chunked(ctx.lookup_fnptr(fname), inputs, output)
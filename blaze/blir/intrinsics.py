@@ -1,6 +1,7 @@
 import llvm.core as lc
 
 from btypes import int_type, float_type
+from syntax import ParallelRange
 
 #------------------------------------------------------------------------
 # Signatures
@@ -49,3 +50,18 @@ llvm_intrinsics = {
     'sqrt' : lc.INTR_SQRT,
     'abs'  : lc.INTR_FABS,
 }
+
+#------------------------------------------------------------------------
+# Loop Intrinsics
+#------------------------------------------------------------------------
+
+# Iterators of ``for`` loops besides ``range``. The body of a
+#
+#     for i in parallel_range(start, stop) { ... }
+#
+# loop is outlined into a kernel ``void (int start, int stop, void *env)``
+# run over chunks of the range by the threads of the runtime, the
+# variables of the enclosing function are shared through ``env``.
+loop_intrinsics = {
+    'parallel_range' : ParallelRange,
+}
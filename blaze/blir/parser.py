@@ -1,6 +1,8 @@
 from ply import yacc
 from errors import error
 
+import intrinsics
+
 from lexer import tokens
 from syntax import *
 
@@ -194,6 +196,26 @@ def p_for_stmt(p):
     '''
     p[0] = ForStatement(p[2], p[4], p[6], lineno=p.lineno(1))
 
+def p_for_intrinsic_stmt(p):
+    '''
+    for_stmt : FOR ID IN call_expr LBRACE body RBRACE
+    '''
+    call = p[4]
+    bounds = call.arglist
+    if call.name not in intrinsics.loop_intrinsics:
+        error(p.lineno(1), "Syntax Error: cannot iterate over '%s'" % call.name)
+    elif len(bounds) not in (1, 2):
+        error(p.lineno(1), "Type Error: %s takes 1 or 2 arguments, %d given"
+              % (call.name, len(bounds)))
+    else:
+        if len(bounds) == 2:
+            start, stop = bounds
+        else:
+            start, stop = Const(0), bounds[0]
+        cons = intrinsics.loop_intrinsics[call.name]
+        p[0] = ForStatement(p[2], cons(start, stop, lineno=p.lineno(4)),
+                            p[6], lineno=p.lineno(1))
+
 def p_return_stmt(p):
     '''
     return_stmt : RETURN expr SEMI
@@ -399,7 +421,10 @@ def make_parser(debug=False):
     lexer = lexfrom(lexer, blex)
     parser = yaccfrom(module, byacc, lexer)
 
-    return partial(parser.parse, lexer=lexer)
+    # The prebuilt tables are shared, but the lexer keeps the state of
+    # the input being parsed, so every parse gets its own copy to
+    # allow concurrent compiles.
+    return partial(parser.parse, lexer=lexer.clone())
 
 #------------------------------------------------------------------------
 # --ddump-parse
@@ -12,6 +12,8 @@ import exc
 
 from threading import Lock
 
+# Serializes the stages touching LLVM ( code generation and optimization
+# ), the rest of the pipeline runs concurrently.
 compilelock = Lock()
 
 #------------------------------------------------------------------------
@@ -86,8 +88,10 @@ def ssa_pass(ast, env):
 
 @ppass("Code generation")
 def codegen_pass(ast, env):
-    cgen = codegen.LLVMEmitter()
-    blockgen = codegen.BlockEmitter(cgen)
+    args = env['args']
+    cgen = codegen.LLVMEmitter(noalias=args.get('noalias', False),
+                               align=args.get('align'))
+    blockgen = codegen.BlockEmitter(cgen, unroll=args.get('unroll'))
 
     env['cgen'] = cgen
     env['blockgen'] = blockgen
@@ -116,8 +120,11 @@ def optimizer_pass(ast, env):
     cgen = env['cgen']
     lfunctions = env['lfunctions']
 
-    opt_level = env['args']['O']
-    optimizer = codegen.LLVMOptimizer(cgen.module, opt_level)
+    args = env['args']
+    opt_level = args['O']
+    optimizer = codegen.LLVMOptimizer(cgen.module, opt_level,
+                                      vectorize=args.get('vectorize', False),
+                                      cpu=args.get('cpu'))
 
     # function-level optimize
     #for lfunc in lfunctions:
@@ -142,13 +149,14 @@ def linker_pass(ast, env):
 # Pipeline Structure
 #------------------------------------------------------------------------
 
+# Pure Python passes, no LLVM state is involved
 frontend = Pipeline('frontend', [parse_pass,
                                  typecheck_pass,
-                                 rewrite_pass
+                                 rewrite_pass,
+                                 ssa_pass,
                                  ])
 
-backend = Pipeline('backend', [ssa_pass,
-                               codegen_pass,
+backend = Pipeline('backend', [codegen_pass,
                                optimizer_pass,
                                linker_pass,
                                ])
@@ -162,10 +170,23 @@ compiler = Pipeline('compile', [frontend,
 #------------------------------------------------------------------------
 
 def compile(source, **opts):
+    """ Compile BLIR source, returns the ast and the environment with the
+    LLVM module ( ``env['lmodule']`` ).
+
+    Options:
+
+        O         : LLVM optimization level ( default 2 )
+        vectorize : enable the loop and SLP vectorizers
+        cpu       : target CPU ( default is the host CPU )
+        unroll    : unroll factor for the innermost loops
+        noalias   : assume array arguments do not overlap
+        align     : alignment of array elements, in bytes
+    """
     opts.setdefault('O', 2)
     env = {'args': opts}
+    ast, env = frontend(source, env)
     with compilelock:
-        ast, env = compiler(source, env)
+        ast, env = backend(ast, env)
     return ast, env
 
 #------------------------------------------------------------------------
@@ -182,6 +203,11 @@ def main():
     argp.add_argument('--ddump-blocks', action='store_true', help='Dump the block structure')
     argp.add_argument('--ddump-tc', action='store_true', help='Dump the type checker state')
     argp.add_argument('--ddump-optimizer', action='store_true', help='Dump diff of the LLVM optimizer pass')
+    argp.add_argument('--vectorize', action='store_true', help='Enable the loop and SLP vectorizers')
+    argp.add_argument('--cpu', metavar="cpu", help='Target CPU (default is the host)')
+    argp.add_argument('--unroll', metavar="factor", type=int, help='Unroll factor for innermost loops')
+    argp.add_argument('--noalias', action='store_true', help='Assume array arguments do not overlap')
+    argp.add_argument('--align', metavar="bytes", type=int, help='Alignment of array elements')
     argp.add_argument('--noprelude', action='store_true', help='Don\'t link against the prelude')
     argp.add_argument('--nooptimize', action='store_true', help='Don\'t run LLVM optimization pass')
     argp.add_argument('--emit-llvm', action='store_true', help=' Generate output files in LLVM formats ')
@@ -1,6 +1,7 @@
 #include <stdio.h>
 #include <string.h>
 #include <stdlib.h>
+#include <pthread.h>
 
 //#include <mkl.h>
 //#include <mkl_types.h>
@@ -43,6 +44,61 @@ void Blir_Finalize()
     initialized = 0;
 }
 
+// ------------------------------------------------------------------------
+// Parallel Loops
+// ------------------------------------------------------------------------
+
+// The outlined body of a parallel_range loop, run over [start, stop)
+typedef void (*kernel_t) (int start, int stop, void *env);
+
+// run_range() of the thread pool runtime ( blaze/rts/runtime.c )
+typedef void (*runner_t) (void *rts, kernel_t kernel, int start, int stop,
+                          int chunk, void *env);
+
+static runner_t parallel_runner = NULL;
+static void *parallel_rts = NULL;
+static pthread_mutex_t parallel_lock = PTHREAD_MUTEX_INITIALIZER;
+
+void Blir_SetRuntime(runner_t runner, void *rts)
+{
+    pthread_mutex_lock(&parallel_lock);
+    parallel_runner = runner;
+    parallel_rts = rts;
+    pthread_mutex_unlock(&parallel_lock);
+}
+
+void parallel_range(kernel_t kernel, int start, int stop, void *env)
+{
+    if (start >= stop) {
+        return;
+    }
+    // The runtime runs one loop at a time, nested loops ( called from
+    // the workers ) and concurrent ones run in the calling thread
+    if (pthread_mutex_trylock(&parallel_lock) == 0) {
+        if (parallel_runner != NULL) {
+            parallel_runner(parallel_rts, kernel, start, stop, 0, env);
+            pthread_mutex_unlock(&parallel_lock);
+            return;
+        }
+        pthread_mutex_unlock(&parallel_lock);
+    }
+    kernel(start, stop, env);
+}
+
+// The kernels combine the partial results of their reductions into the
+// shared variables between these calls
+static pthread_mutex_t combine_lock = PTHREAD_MUTEX_INITIALIZER;
+
+void parallel_combine_begin()
+{
+    pthread_mutex_lock(&combine_lock);
+}
+
+void parallel_combine_end()
+{
+    pthread_mutex_unlock(&combine_lock);
+}
+
 // ------------------------------------------------------------------------
 // Datashape Operations
 // ------------------------------------------------------------------------
@@ -93,6 +93,12 @@ class Range(AST):
     def __repr__(self):
         return "Range(%s, %s)" % (repr(self.start),repr(self.stop))
 
+class ParallelRange(AST):
+    _fields = ['start', 'stop']
+
+    def __repr__(self):
+        return "ParallelRange(%s, %s)" % (repr(self.start),repr(self.stop))
+
 class Statements(AST):
     _fields = ['statements']
 
@@ -58,6 +58,31 @@ class SymbolTable(object):
         else:
             return self._globals.get(symbol) or self._locals[scope].get(symbol)
 
+#------------------------------------------------------------------------
+# Parallel Loops
+#------------------------------------------------------------------------
+
+# The operators a variable can be reduced with in a parallel loop
+REDUCTIONS = { '+', '*' }
+
+class ParallelLoop(object):
+    """ The body of a parallel_range loop runs concurrently in several
+    threads, so the variables declared outside of it ( ``shared`` ) can
+    only be read in it, or reduced with an assignment like ``s = s + e``
+    whose partial results are combined at the end of each chunk. """
+
+    def __init__(self, shared):
+        self.shared = shared
+        self.reductions = {} # name -> operator
+        self.loads = defaultdict(list)
+        self.reduced = set() # the loads reading the reduced variable
+
+    def check(self):
+        for name in self.reductions:
+            for load in self.loads[name]:
+                if id(load) not in self.reduced:
+                    error(load.lineno, "Syntax Error: '%s' is reduced in the parallel_range loop and cannot be read in it" % name)
+
 #------------------------------------------------------------------------
 # Type Checker
 #------------------------------------------------------------------------
@@ -68,6 +93,7 @@ class TypeChecker(NodeVisitor):
         self.symtab = SymbolTable()
         self.can_declare = True
         self.has_return = False
+        self.parallel = [] # the enclosing parallel loops
         self.verbose = verbose
 
         # mutated by visits
@@ -151,6 +177,36 @@ class TypeChecker(NodeVisitor):
                 error(node.lineno,"Type Error: Assignment not possible %s != %s" % (node.store_location.type.name, node.expr.type.name))
             node.store_location.expr = node.expr
 
+            if isinstance(node.store_location, StoreVariable):
+                for loop in self.parallel:
+                    self.check_shared_store(loop, node)
+
+    def check_shared_store(self, loop, node):
+        name = node.store_location.name
+        sym = node.store_location.sym
+
+        if getattr(sym, 'is_global', False):
+            error(node.lineno, "Syntax Error: cannot assign to global '%s' inside parallel_range loop" % name)
+            return
+        if name not in loop.shared:
+            return
+
+        # s = s op e, or s = e op s
+        expr = node.expr
+        operand = None
+        if isinstance(expr, BinOp) and expr.op in REDUCTIONS:
+            for side in (expr.left, expr.right):
+                if isinstance(side, LoadVariable) and side.name == name:
+                    operand = side
+                    break
+
+        if operand is None or node.store_location.type not in (btypes.int_type, btypes.float_type):
+            error(node.lineno, "Syntax Error: '%s' is shared by the parallel_range loop, it can only be reduced in it ( %s = %s + ... )" % (name, name, name))
+        elif loop.reductions.setdefault(name, expr.op) != expr.op:
+            error(node.lineno, "Syntax Error: '%s' is reduced with both %s and %s" % (name, loop.reductions[name], expr.op))
+        else:
+            loop.reduced.add(id(operand))
+
     def visit_ConstDecl(self, node):
         # We follow the C-- convention in that constants do not need
         # to be explictly type and just infer from the literal token.
@@ -240,6 +296,10 @@ class TypeChecker(NodeVisitor):
         # Annotate with the type
         node.sym = sym
 
+        for loop in self.parallel:
+            if node.name in loop.shared:
+                loop.loads[node.name].append(node)
+
     def visit_StoreVariable(self, node):
         sym = self.symtab.lookup(node.name, self.scope)
 
@@ -360,16 +420,31 @@ class TypeChecker(NodeVisitor):
         if node.stop.type != btypes.int_type:
             error(node.lineno, "Type Error: Bounds to range statement must be integers")
 
+    def visit_ParallelRange(self, node):
+        self.visit_Range(node)
+
     def visit_ForStatement(self, node):
         self.visit(node.iter)
         if self.scope is GLOBAL:
             error(node.lineno, "Syntax Error: for loop outside of function")
+        elif isinstance(node.iter, ParallelRange):
+            # the body of a parallel loop is outlined into a kernel,
+            # the loop variable is private to it
+            shared = set(self.symtab._locals[self.scope]) - set([node.var])
+            loop = ParallelLoop(shared)
+            self.parallel.append(loop)
+            self.visit(node.body)
+            self.parallel.pop()
+            loop.check()
+            node.reductions = loop.reductions
         else:
             self.visit(node.body)
 
     def visit_ReturnStatement(self, node):
         if self.scope is GLOBAL:
             error(node.lineno, "Syntax Error: return outside function")
+        elif self.parallel:
+            error(node.lineno, "Syntax Error: return inside parallel_range loop")
         else:
             self.visit(node.expr)
             fn = self._current_scope
@@ -15,8 +15,12 @@ from arrayprint import (
 from carrayExtension import (
     carray,
     chunk,
+    bufferpool,
+    chunkpool,
     # blosc_version, _blosc_set_nthreads as blosc_set_nthreads
     )
 from ctable import ctable
+from vcarray import vcarray, concat
+from cview import cview
 from toplevel import cparams, open, zeros, ones, fromiter
 from version import __version__
@@ -27,6 +27,7 @@ DATA_DIR = 'data'
 META_DIR = 'meta'
 SIZES_FILE = 'sizes'
 STORAGE_FILE = 'storage'
+PARTIALS_FILE = 'partials'
 
 # For the persistence layer
 EXTENSION = '.blp'
@@ -37,6 +38,9 @@ FORMAT_VERSION = 1
 MAX_FORMAT_VERSION = 255
 MAX_CHUNKS = (2**63)-1
 
+# The (aprox) footprint of a chunk instance in bytes
+CHUNK_FOOTPRINT = 128
+
 # The type used for size values: indexes, coordinates, dimension
 # lengths, row numbers, shapes, chunk shapes, byte counts...
 SizeType = np.int64
@@ -53,7 +57,7 @@ from definitions cimport import_array, ndarray, dtype, \
      PyString_FromStringAndSize, \
      Py_BEGIN_ALLOW_THREADS, Py_END_ALLOW_THREADS, \
      PyArray_GETITEM, PyArray_SETITEM, \
-     npy_intp, PyBuffer_FromMemory, Py_uintptr_t
+     npy_intp, PyBuffer_FromMemory, Py_uintptr_t, PyObject_AsReadBuffer
 
 #-----------------------------------------------------------------
 
@@ -63,6 +67,7 @@ cdef extern from "blosc.h":
 
   cdef enum:
     BLOSC_MAX_OVERHEAD,
+    BLOSC_MEMCPYED,
     BLOSC_VERSION_STRING,
     BLOSC_VERSION_DATE
 
@@ -81,6 +86,21 @@ cdef extern from "blosc.h":
   void blosc_set_blocksize(size_t blocksize)
 
 
+# Memory maps of the chunk files
+cdef extern from "sys/mman.h":
+
+  cdef enum:
+    PROT_READ,
+    MAP_SHARED
+
+  void *MAP_FAILED
+  void *mmap(void *addr, size_t length, int prot, int flags, int fd,
+             long offset)
+  int munmap(void *addr, size_t length)
+
+from libc.errno cimport errno
+
+
 #----------------------------------------------------------------------------
 
 # Initialization code
@@ -195,6 +215,143 @@ cdef int true_count(char *data, int nbytes):
 
 #-------------------------------------------------------------
 
+# Decompression buffers are aligned like this, for SIMD loads
+DEF BUFFER_ALIGNMENT = 64
+
+cdef ndarray aligned_empty(object dtype_, npy_intp length):
+  """Return an uninitialized, aligned array of `length` elements."""
+  cdef ndarray raw
+  cdef npy_intp nbytes, offset
+
+  dtype_ = np.dtype(dtype_)
+  nbytes = length * dtype_.itemsize
+  raw = np.empty(nbytes + BUFFER_ALIGNMENT, dtype=np.uint8)
+  offset = <npy_intp>(<size_t>raw.data % BUFFER_ALIGNMENT)
+  if offset:
+    offset = BUFFER_ALIGNMENT - offset
+  return raw[offset:offset+nbytes].view(dtype_.base).reshape(
+    (length,) + dtype_.shape)
+
+cdef class bufferpool:
+  """
+  bufferpool(maxbuffers=4)
+
+  Pool of reusable buffers for decompressed chunks.
+
+  Buffers are aligned on 64 bytes and keyed by their dtype and length.
+  Chunk readers `borrow` a buffer, decompress into it and `giveback`
+  the buffer when they are done with it, instead of allocating a new
+  array for every chunk.  At most `maxbuffers` idle buffers are kept
+  for every key.
+
+  """
+  cdef object idle
+  cdef public int maxbuffers
+  cdef public npy_intp hits, misses
+
+  def __cinit__(self, maxbuffers=4):
+    self.idle = {}
+    self.maxbuffers = maxbuffers
+    self.hits = self.misses = 0
+
+  def borrow(self, object dtype, npy_intp length):
+    """
+    borrow(dtype, length)
+
+    Return an uninitialized buffer of `length` elements of `dtype`.
+
+    """
+    cdef object buffers
+
+    dtype = np.dtype(dtype)
+    buffers = self.idle.get((dtype.base, (length,) + dtype.shape))
+    if buffers:
+      self.hits += 1
+      return buffers.pop()
+    self.misses += 1
+    return aligned_empty(dtype, length)
+
+  def giveback(self, ndarray buf):
+    """
+    giveback(buf)
+
+    Return a borrowed buffer to the pool.  It must not be used anymore.
+
+    """
+    cdef object buffers
+
+    buffers = self.idle.setdefault((buf.dtype, buf.shape), [])
+    if len(buffers) < self.maxbuffers:
+      buffers.append(buf)
+
+  def clear(self):
+    """Drop the idle buffers."""
+    self.idle.clear()
+
+# The pool of the chunk readers
+chunkpool = bufferpool()
+
+#-------------------------------------------------------------
+
+# Chunks stored uncompressed are mapped from disk, instead of read
+MMAP_CHUNKS = os.name == 'posix'
+
+cdef class chunkmap:
+  """
+  chunkmap(fd, size, offset)
+
+  Read-only memory map of the first `size` bytes of the file `fd`,
+  exposing the data starting at `offset`.
+
+  Unlike `mmap.mmap`, that keeps a duplicate of the file descriptor
+  for as long as the map lives, the file can be closed once it is
+  mapped, so that the live views of chunks do not hold descriptors.
+
+  """
+  cdef char *addr
+  cdef size_t size, offset
+
+  def __cinit__(self, int fd, size_t size, size_t offset):
+    cdef void *addr
+
+    addr = mmap(NULL, size, PROT_READ, MAP_SHARED, fd, 0)
+    if addr == MAP_FAILED:
+      raise OSError(errno, os.strerror(errno))
+    self.addr = <char *>addr
+    self.size = size
+    self.offset = offset
+
+  def __dealloc__(self):
+    if self.addr != NULL:
+      munmap(self.addr, self.size)
+      self.addr = NULL
+
+cdef char *buffer_of(object obj) except NULL:
+  """Return the data of a string, a chunk map or a read-only buffer."""
+  cdef void *data
+  cdef Py_ssize_t size
+
+  if isinstance(obj, chunkmap):
+    return (<chunkmap>obj).addr + (<chunkmap>obj).offset
+  if PyObject_AsReadBuffer(obj, &data, &size) < 0:
+    raise TypeError("expected a string or a buffer")
+  return <char *>data
+
+class _chunkview(object):
+  """Expose the data of `owner` to NumPy, keeping `owner` alive."""
+
+  def __init__(self, owner, Py_uintptr_t address, shape, atom):
+    self.owner = owner
+    self.__array_interface__ = {
+      'version': 3,
+      'shape': tuple(shape) + atom.shape,
+      'typestr': atom.base.str,
+      'descr': atom.base.descr,
+      'data': (address, True),    # read-only
+      }
+
+#-------------------------------------------------------------
+
 # For member defintions see carrayExtension.pxd ~Stephen
 cdef class chunk:
   """
@@ -238,7 +395,8 @@ cdef class chunk:
 
     if _compr:
       # Data comes in an already compressed state inside a Python String
-      self.data = PyString_AsString(dobject)
+      # (or a buffer of a mapped chunk file)
+      self.data = buffer_of(dobject)
       # Increment the reference so that data don't go away
       self.dobject = dobject 
       # Set size info for the instance
@@ -252,7 +410,7 @@ cdef class chunk:
       # Compress the data object (a NumPy object)
       nbytes, cbytes, blocksize, footprint = self.compress_arrdata(
         dobject, cparams, _memory)
-    footprint += 128  # add the (aprox) footprint of this instance in bytes
+    footprint += CHUNK_FOOTPRINT  # add the footprint of this instance
 
     # Fill instance data
     self.nbytes = nbytes
@@ -345,16 +503,53 @@ cdef class chunk:
     """Get an uncompressed string out of this chunk (for 'O'bject types)."""
     cdef int ret
     cdef char *dest
+    cdef ndarray buf
 
-    dest = <char *>malloc(self.nbytes)
-    # Fill dest with uncompressed data
-    with nogil:
-      ret = blosc_decompress(self.data, dest, self.nbytes)
-    if ret < 0:
-      raise RuntimeError, "fatal error during Blosc decompression: %d" % ret
-    string = PyString_FromStringAndSize(dest, <Py_ssize_t>self.nbytes)
+    buf = chunkpool.borrow(np.uint8, self.nbytes)
+    dest = buf.data
+    try:
+      # Fill dest with uncompressed data
+      with nogil:
+        ret = blosc_decompress(self.data, dest, self.nbytes)
+      if ret < 0:
+        raise RuntimeError, "fatal error during Blosc decompression: %d" % ret
+      string = PyString_FromStringAndSize(dest, <Py_ssize_t>self.nbytes)
+    finally:
+      chunkpool.giveback(buf)
     return string
 
+  def read_into(self, ndarray out):
+    """
+    read_into(out)
+
+    Decompress the whole chunk into `out`, a contiguous array with room
+    for all of its elements.
+
+    """
+    if not out.flags.c_contiguous or out.nbytes < self.nbytes:
+      raise ValueError("`out` must be contiguous and hold %d bytes" %
+                       self.nbytes)
+    self._getitem(0, cython.cdiv(self.nbytes, self.atomsize), out.data)
+    return out
+
+  def borrow(self, bufferpool pool=None):
+    """
+    borrow(pool=None)
+
+    Decompress the chunk into a buffer borrowed from `pool` (the
+    `chunkpool` by default) and return it.  Give the buffer back with
+    `pool.giveback` once done with it.
+
+    """
+    if pool is None:
+      pool = chunkpool
+    buf = pool.borrow(self.dtype, cython.cdiv(self.nbytes, self.atomsize))
+    try:
+      return self.read_into(buf)
+    except:
+      pool.giveback(buf)
+      raise
+
   cdef void _getitem(self, int start, int stop, char *dest):
     """Read data from `start` to `stop` and return it as a numpy array."""
     cdef int ret, bsize, blen, nitems, nstart
@@ -421,6 +616,56 @@ cdef class chunk:
       return array[::step]
     return array
 
+  def view(self):
+    """
+    view()
+
+    Return a read-only NumPy view of the chunk data if it is stored
+    uncompressed (e.g. with `clevel=0`), else None.  The view keeps the
+    chunk alive.
+
+    """
+    cdef size_t typesize
+    cdef int flags
+
+    if self.isconstant or self.atom.base.char == 'O':
+      return None
+    blosc_cbuffer_metainfo(self.data, &typesize, &flags)
+    if not (flags & BLOSC_MEMCPYED):
+      return None
+    return np.asarray(_chunkview(
+      self, <Py_uintptr_t>self.data + BLOSC_MAX_OVERHEAD,
+      (cython.cdiv(self.nbytes, self.atomsize),), self.atom))
+
+  def partials(self, object dtype):
+    """
+    partials(dtype)
+
+    Return the (sum, sumsq, min, max) aggregates of this chunk.
+
+    `sum` is accumulated with `dtype`, `sumsq` always as a float64.
+    Constant chunks are resolved arithmetically, without any
+    decompression.
+
+    """
+    cdef npy_intp clen
+    cdef object arr, const
+
+    clen = cython.cdiv(self.nbytes, self.atomsize)
+    if self.isconstant:
+      const = np.array(self.constant, dtype=dtype)
+      return ((const * clen)[()].item(),
+              float(const) * float(const) * clen,
+              self.constant.item(), self.constant.item())
+
+    arr = self.borrow()
+    try:
+      farr = arr.astype(np.float64)
+      return (arr.sum(dtype=dtype).item(), np.vdot(farr, farr).item(),
+              arr.min().item(), arr.max().item())
+    finally:
+      chunkpool.giveback(arr)
+
   @property
   def pointer(self):
       return <Py_uintptr_t> self.data+BLOSCPACK_HEADER_LENGTH
@@ -603,7 +848,7 @@ cdef class chunks(object):
       if leftover:
         # Fill lastchunk with data on disk
         scomp = self.read_chunk(self.nchunks)
-        compressed = PyString_AsString(scomp)
+        compressed = buffer_of(scomp)
         with nogil:
           ret = blosc_decompress(compressed, lastchunk, chunksize)
         if ret < 0:
@@ -622,6 +867,12 @@ cdef class chunks(object):
       blosc_header = decode_blosc_header(blosc_header_raw)
       ctbytes = blosc_header['ctbytes']
       nbytes = blosc_header['nbytes']
+      if MMAP_CHUNKS and blosc_header['flags'] & BLOSC_MEMCPYED:
+        # The data is stored uncompressed, map it so that it can be
+        # viewed without reading it (the map outlives the file)
+        return chunkmap(schunk.fileno(),
+                        BLOSCPACK_HEADER_LENGTH + ctbytes,
+                        BLOSCPACK_HEADER_LENGTH)
       # seek back BLOSC_HEADER_LENGTH bytes in file relative to current
       # position
       schunk.seek(-BLOSC_HEADER_LENGTH, 1)
@@ -665,10 +916,16 @@ cdef class chunks(object):
     dname = "__%d%s" % (nchunk, EXTENSION)
     schunkfile = os.path.join(self.datadir, dname)
     bloscpack_header = create_bloscpack_header(1)
-    with open(schunkfile, 'wb') as schunk:
+    # Written aside and renamed, so that the chunks mapped from the
+    # former file stay valid
+    tmpfile = schunkfile + '.tmp'
+    with open(tmpfile, 'wb') as schunk:
       schunk.write(bloscpack_header)
       data = chunk_.getdata()
       schunk.write(data)
+    if not MMAP_CHUNKS and os.path.exists(schunkfile):
+      os.remove(schunkfile)
+    os.rename(tmpfile, schunkfile)
     # Mark the cache as dirty if needed
     if nchunk == self.nchunk_cached:
       self.nchunk_cached = -1
@@ -681,6 +938,24 @@ cdef class chunks(object):
     """Remove the last chunk and return it."""
     nchunk = self.nchunks - 1
     chunk_ = self.__getitem__(nchunk)
+    self._remove(nchunk)
+    return chunk_
+
+  def drop(self):
+    """Remove the last chunk without reading it.  Return its cbytes."""
+    nchunk = self.nchunks - 1
+    dname = "__%d%s" % (nchunk, EXTENSION)
+    schunkfile = os.path.join(self.datadir, dname)
+    if not os.path.exists(schunkfile):
+      raise RuntimeError("chunk filename %s does exist" % schunkfile)
+    cbytes = os.path.getsize(schunkfile) - BLOSCPACK_HEADER_LENGTH
+    if nchunk == self.nchunk_cached:
+      self.nchunk_cached = -1
+    self._remove(nchunk)
+    return cbytes + CHUNK_FOOTPRINT
+
+  cdef _remove(self, nchunk):
+    """Remove the file for the last chunk, `nchunk`."""
     dname = "__%d%s" % (nchunk, EXTENSION)
     schunkfile = os.path.join(self.datadir, dname)
     if not os.path.exists(schunkfile):
@@ -695,7 +970,6 @@ cdef class chunks(object):
       os.remove(schunkfile)
 
     self.nchunks -= 1
-    return chunk_
 
 
 cdef class carray:
@@ -762,7 +1036,11 @@ cdef class carray:
   cdef public object chunks
   cdef object _rootdir, datadir, metadir, _mode
   cdef object _attrs
+  # For per-chunk partial aggregates
+  cdef object _partials
+  cdef int _partials_dirty
   cdef ndarray iobuf, where_buf
+  cdef int iobuf_pooled
   # For block cache
   cdef int idxcache
   cdef ndarray blockcache
@@ -877,6 +1155,8 @@ cdef class carray:
     if mode not in ('r', 'w', 'a'):
       raise ValueError("mode should be 'r', 'w' or 'a'")
     self._mode = mode
+    self._partials = {}
+    self._partials_dirty = False
 
     if array is not None:
       self.create_carray(array, cparams, dtype, dflt,
@@ -942,6 +1222,9 @@ cdef class carray:
     if dtype is None:
       dtype = array_.dtype.base
 
+    # Apply the (lossy) precision filter, if requested
+    array_ = utils.trim_precision(array_, cparams.precision)
+
     # Multidimensional array.  The atom will have array_.shape[1:] dims.
     # atom dimensions will be stored in `self._dtype`, which is different
     # than `self.dtype` in that `self._dtype` dimensions are borrowed
@@ -1076,6 +1359,9 @@ cdef class carray:
     self._cbytes = cbytes
     self._nbytes = calen * self.atomsize
 
+    # Partial aggregates computed in previous sessions
+    self._partials = self._read_partials()
+
     if self._mode == "w":
       # Remove all entries when mode is 'w'
       self.resize(0)
@@ -1136,6 +1422,7 @@ cdef class carray:
           "cparams": {
             "clevel": self.cparams.clevel,
             "shuffle": self.cparams.shuffle,
+            "precision": self.cparams.precision,
             },
           "chunklen": self._chunklen,
           "expectedlen": self.expectedlen,
@@ -1165,7 +1452,8 @@ cdef class carray:
     chunklen = data["chunklen"]
     cparams = ca.cparams(
       clevel = data["cparams"]["clevel"],
-      shuffle = data["cparams"]["shuffle"])
+      shuffle = data["cparams"]["shuffle"],
+      precision = data["cparams"].get("precision"))
     expectedlen = data["expectedlen"]
     dflt = data["dflt"]
     return (shape, cparams, dtype_, dflt, expectedlen, cbytes, chunklen)
@@ -1210,6 +1498,7 @@ cdef class carray:
     arrcpy = utils.to_ndarray(array, self._dtype)
     if arrcpy.dtype != self._dtype.base:
       raise TypeError, "array dtype does not match with self"
+    arrcpy = utils.trim_precision(arrcpy, self._cparams.precision)
 
     # Object dtype requires special storage
     if arrcpy.dtype.char == 'O':
@@ -1335,9 +1624,14 @@ cdef class carray:
       # Remove complete chunks
       nchunk2 = lnchunk = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
       while nchunk2 > nchunk:
-        chunk_ = chunks.pop()
-        cbytes += chunk_.cbytes
+        if self._rootdir and (nchunk2 > nchunk + 1 or not leftover):
+          # The chunk data is not needed: do not read it from disk
+          cbytes += chunks.drop()
+        else:
+          chunk_ = chunks.pop()
+          cbytes += chunk_.cbytes
         nchunk2 -= 1
+      self._drop_partials(nchunk, lnchunk)
 
       # Finally, deal with the leftover
       if leftover:
@@ -1490,10 +1784,22 @@ cdef class carray:
     out : carray object
         The copy of this object.
 
+    Notes
+    -----
+    If neither `chunklen` nor `expectedlen` are passed, the copy keeps
+    the chunklen of this object.  When the copy ends with the same
+    chunklen, cparams and dtype than this object, the compressed chunks
+    are copied as they are (no decompression nor recompression at all),
+    and only the leftover is compressed again.
+
     """
-    cdef object chunklen
+    cdef object chunklen, start
+    cdef npy_intp nchunk, nchunks
+    cdef carray ccopy
 
     # Get defaults for some parameters
+    if 'chunklen' not in kwargs and 'expectedlen' not in kwargs:
+      kwargs['chunklen'] = self._chunklen
     cparams = kwargs.pop('cparams', self._cparams)
     expectedlen = kwargs.pop('expectedlen', self.len)
 
@@ -1503,14 +1809,71 @@ cdef class carray:
                    expectedlen=expectedlen,
                    **kwargs)
 
-    # Now copy the carray chunk by chunk
+    start = 0
+    if (ccopy._chunklen == self._chunklen and
+        ccopy._cparams == self._cparams and
+        ccopy._dtype == self._dtype and self._dtype.char != 'O'):
+      # Same layout: copy the compressed chunks verbatim
+      nchunks = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
+      for nchunk from 0 <= nchunk < nchunks:
+        ccopy._append_chunk(self.chunks[nchunk])
+      # The partial aggregates are still valid for the copied chunks
+      for nchunk, partials in self._partials.items():
+        ccopy._partials[nchunk] = partials
+        ccopy._partials_dirty = True
+      start = nchunks * self._chunklen
+
+    # Now copy the (rest of the) carray chunk by chunk
     chunklen = self._chunklen
-    for i from 0 <= i < self.len by chunklen:
+    for i from start <= i < self.len by chunklen:
       ccopy.append(self[i:i+chunklen])
     ccopy.flush()
 
     return ccopy
 
+  def view(self, start=0, stop=None, step=1):
+    """
+    view(start=0, stop=None, step=1)
+
+    Return a lazy view of the [start:stop:step] range of this object.
+
+    Parameters
+    ----------
+    start, stop, step : int
+        The range to be viewed.  `step` must be positive.
+
+    Returns
+    -------
+    out : cview object
+        A read-only view.  No data is read until its values are
+        requested (via iteration, queries, reductions or indexing).
+
+    See Also
+    --------
+    cview
+
+    """
+    return ca.cview(self, start, stop, step)
+
+  cdef _append_chunk(self, chunk chunk_):
+    """Append an already compressed `chunk_` to an object with no leftovers.
+
+    In-memory chunks are never modified in place, so `chunk_` can be
+    shared with other carrays.
+    """
+    cdef npy_intp clen
+
+    assert self.leftover == 0, "cannot append chunks after leftovers"
+    if self._rootdir is not None and chunk_.isconstant:
+      # Constant chunks do not have compressed data: compress them
+      clen = cython.cdiv(chunk_.nbytes, self.atomsize)
+      chunk_ = chunk(np.ndarray(clen, dtype=self._dtype,
+                                buffer=chunk_.constant, strides=(0,)),
+                     self._dtype, self._cparams, _memory=False)
+    self.chunks.append(chunk_)
+    self._cbytes += chunk_.cbytes
+    self._nbytes += chunk_.nbytes
+
   def sum(self, dtype=None):
     """
     sum(dtype=None)
@@ -1533,16 +1896,14 @@ cdef class carray:
     """
     cdef chunk chunk_
     cdef npy_intp nchunk, nchunks
-    cdef object result
+    cdef object result, usepartials, buf
 
     if dtype is None:
-      dtype = self._dtype.base
-      # Check if we have less precision than required for ints
-      # (mimick NumPy logic)
-      if dtype.kind in ('b', 'i') and dtype.itemsize < IntType.itemsize:
-        dtype = IntType
+      dtype = self._sum_dtype()
+      usepartials = self._partials_usable()
     else:
       dtype = np.dtype(dtype)
+      usepartials = dtype == self._sum_dtype() and self._partials_usable()
     if dtype.kind == 'S':
       raise TypeError, "cannot perform reduce with flexible type"
 
@@ -1550,20 +1911,165 @@ cdef class carray:
     result = np.zeros(1, dtype=dtype)[0]
 
     nchunks = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
-    for nchunk from 0 <= nchunk < nchunks:
-      chunk_ = self.chunks[nchunk]
-      if chunk_.isconstant:
-        result += chunk_.constant * self._chunklen
-      elif self._dtype.type == np.bool_:
-        result += chunk_.true_count
-      else:
-        result += chunk_[:].sum(dtype=dtype)
+    buf = None
+    try:
+      for nchunk from 0 <= nchunk < nchunks:
+        if usepartials:
+          # Use the (cached) partial aggregates of the chunk
+          result += self.partials(nchunk)[0]
+          continue
+        chunk_ = self.chunks[nchunk]
+        if chunk_.isconstant:
+          result += chunk_.constant * self._chunklen
+        elif self._dtype.type == np.bool_:
+          result += chunk_.true_count
+        else:
+          # Every chunk is decompressed into the same buffer
+          if buf is None:
+            buf = chunkpool.borrow(self._dtype, self._chunklen)
+          result += chunk_.read_into(buf).sum(dtype=dtype)
+    finally:
+      if buf is not None:
+        chunkpool.giveback(buf)
+    self._write_partials()
     if self.leftover:
       leftover = self.len - nchunks * self._chunklen
       result += self.lastchunkarr[:leftover].sum(dtype=dtype)
 
     return result
 
+  def min(self):
+    """
+    min()
+
+    Return the minimum of the array elements.
+
+    Return value
+    ------------
+    out : NumPy scalar with the dtype of `self`
+
+    See Also
+    --------
+    max, sum
+
+    """
+    return self._minmax(2)
+
+  def max(self):
+    """
+    max()
+
+    Return the maximum of the array elements.
+
+    Return value
+    ------------
+    out : NumPy scalar with the dtype of `self`
+
+    See Also
+    --------
+    min, sum
+
+    """
+    return self._minmax(3)
+
+  cdef _minmax(self, int which):
+    """Reduce with min (`which` == 2) or max (`which` == 3)."""
+    cdef npy_intp nchunk, nchunks, leftover
+    cdef object values, func, buf
+
+    if self._dtype.base.kind not in ('b', 'i', 'u', 'f'):
+      raise TypeError, "cannot perform reduce with flexible type"
+    if self.len == 0:
+      raise ValueError, "zero-size array to reduction operation"
+
+    func = np.min if which == 2 else np.max
+    values = []
+    nchunks = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
+    buf = None
+    try:
+      for nchunk from 0 <= nchunk < nchunks:
+        if self._partials_usable():
+          values.append(self.partials(nchunk)[which])
+        else:
+          if buf is None:
+            buf = chunkpool.borrow(self._dtype, self._chunklen)
+          values.append(func(self.chunks[nchunk].read_into(buf)))
+    finally:
+      if buf is not None:
+        chunkpool.giveback(buf)
+    self._write_partials()
+    if self.leftover:
+      leftover = self.len - nchunks * self._chunklen
+      values.append(func(self.lastchunkarr[:leftover]))
+
+    return self._dtype.base.type(func(values))
+
+  def partials(self, npy_intp nchunk):
+    """
+    partials(nchunk)
+
+    Return the (sum, sumsq, min, max) aggregates of chunk `nchunk`.
+
+    The aggregates are computed only once.  After that, they are
+    cached (and persisted for disk-based carrays) and reused, so that
+    reductions do not have to decompress the chunk anymore.
+
+    """
+    cdef chunk chunk_
+    cdef object partials
+
+    partials = self._partials.get(nchunk)
+    if partials is None:
+      chunk_ = self.chunks[nchunk]
+      partials = chunk_.partials(self._sum_dtype())
+      self._partials[nchunk] = partials
+      self._partials_dirty = True
+    return partials
+
+  def _sum_dtype(self):
+    """The dtype used for accumulating sums by default."""
+    dtype = self._dtype.base
+    # Check if we have less precision than required for ints
+    # (mimick NumPy logic)
+    if dtype.kind in ('b', 'i') and dtype.itemsize < IntType.itemsize:
+      dtype = IntType
+    return dtype
+
+  def _partials_usable(self):
+    """Whether partial aggregates are supported for this object."""
+    return (self._dtype.shape == () and
+            self._dtype.kind in ('b', 'i', 'u', 'f'))
+
+  cdef _drop_partials(self, npy_intp start, npy_intp stop):
+    """Invalidate the partial aggregates for chunks in [start, stop)."""
+    cdef object n
+
+    for n in self._partials.keys():
+      if start <= n < stop:
+        del self._partials[n]
+        self._partials_dirty = True
+
+  def _read_partials(self):
+    """Read the persisted partial aggregates (if any)."""
+    partialsf = os.path.join(self.metadir, PARTIALS_FILE)
+    if not os.path.exists(partialsf):
+      return {}
+    with open(partialsf, 'rb') as partialsfh:
+      data = json.loads(partialsfh.read())
+    return dict((int(n), tuple(p)) for n, p in data.items())
+
+  def _write_partials(self):
+    """Persist the partial aggregates (only if they changed)."""
+    if not self._partials_dirty:
+      return
+    self._partials_dirty = False
+    if self._rootdir is None or self._mode == "r":
+      return
+    partialsf = os.path.join(self.metadir, PARTIALS_FILE)
+    with open(partialsf, 'wb') as partialsfh:
+      partialsfh.write(json.dumps(self._partials))
+      partialsfh.write("\n")
+
   def __len__(self):
     return self.len
 
@@ -1676,7 +2182,7 @@ cdef class carray:
     cdef npy_intp nwrow, blen
     cdef ndarray arr1
     cdef object start, stop, step
-    cdef object arr
+    cdef object arr, view
 
     chunklen = self._chunklen
 
@@ -1775,6 +2281,12 @@ cdef class carray:
     if self.dtype.char == 'O':
       return self.getitem_object(start, stop, step)
 
+    if self._cparams.clevel == 0:
+      # Slices within a chunk stored uncompressed are views of it
+      view = self._viewrange(start, stop - start, False)
+      if view is not None:
+        return view[::step]
+
     # Fill it from data in chunks
     nwrow = 0
     nchunks = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
@@ -1914,6 +2426,7 @@ cdef class carray:
       # If range is empty, return immediately
       return
     value = utils.to_ndarray(value, self._dtype, arrlen=vlen)
+    value = utils.trim_precision(value, self._cparams.precision)
 
     # Fill it from data in chunks
     nwrow = 0
@@ -1941,12 +2454,14 @@ cdef class carray:
         chunk_ = chunk(cdata, self._dtype, self._cparams,
                        _memory = self._rootdir is None)
         self.chunks[nchunk] = chunk_
+        self._drop_partials(nchunk, nchunk+1)
         # Update cbytes counter
         self._cbytes += chunk_.cbytes
       nwrow += blen
 
     # Safety check
     assert (nwrow == vlen)
+    self._write_partials()
 
   # This is a private function that is specific for `eval`
   def _getrange(self, npy_intp start, npy_intp blen, ndarray out):
@@ -1988,6 +2503,72 @@ cdef class carray:
       nwrow += cblen
       start += cblen
 
+  def _viewrange(self, npy_intp start, npy_intp blen, leftover=True):
+    """
+    _viewrange(start, blen, leftover=True)
+
+    Return a read-only view of the `blen` elements from `start` if they
+    lie in a single chunk stored uncompressed or, with `leftover`, in
+    the last chunk buffer.  Else return None.
+
+    """
+    cdef npy_intp nchunk, nchunks, startb
+    cdef object view
+
+    if blen <= 0 or start + blen > <npy_intp>cython.cdiv(self._nbytes,
+                                                        self.atomsize):
+      return None
+    nchunk = <npy_intp>cython.cdiv(start, self._chunklen)
+    startb = start - nchunk * self._chunklen
+    if startb + blen > self._chunklen:
+      return None
+
+    nchunks = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
+    if nchunk == nchunks:
+      # The buffer is reused when the chunk is filled, only views
+      # which do not outlive the caller can be handed out
+      if not leftover:
+        return None
+      view = self.lastchunkarr[startb:startb+blen]
+      view.flags.writeable = False
+      return view
+
+    view = self.chunks[nchunk].view()
+    if view is None:
+      return None
+    return view[startb:startb+blen]
+
+  def iterchunks(self, bufferpool pool=None):
+    """
+    iterchunks(pool=None)
+
+    Iterate over the decompressed chunks, the leftover elements last.
+
+    The chunks are all decompressed into the same buffer, borrowed from
+    `pool` (the `chunkpool` by default), so every array yielded is only
+    valid until the next step of the iteration: process it in place or
+    copy it.  The buffer is given back at the end of the iteration.
+
+    """
+    cdef npy_intp nchunk, nchunks, leftover
+    cdef object buf
+
+    if pool is None:
+      pool = chunkpool
+    nchunks = <npy_intp>cython.cdiv(self._nbytes, self._chunksize)
+    buf = None
+    try:
+      for nchunk in range(nchunks):
+        if buf is None:
+          buf = pool.borrow(self._dtype, self._chunklen)
+        yield self.chunks[nchunk].read_into(buf)
+    finally:
+      if buf is not None:
+        pool.giveback(buf)
+    leftover = self.len - nchunks * self._chunklen
+    if leftover:
+      yield self.lastchunkarr[:leftover]
+
   cdef void bool_update(self, boolarr, value):
     """Update self in positions where `boolarr` is true with `value` array."""
     cdef int chunklen
@@ -1999,6 +2580,7 @@ cdef class carray:
 
     vlen = boolarr.sum()   # number of true values in bool array
     value = utils.to_ndarray(value, self._dtype, arrlen=vlen)
+    value = utils.trim_precision(value, self._cparams.precision)
 
     # Fill it from data in chunks
     nwrow = 0
@@ -2031,12 +2613,14 @@ cdef class carray:
         chunk_ = chunk(cdata, self._dtype, self._cparams,
                        _memory = self._rootdir is None)
         self.chunks[nchunk] = chunk_
+        self._drop_partials(nchunk, nchunk+1)
         # Update cbytes counter
         self._cbytes += chunk_.cbytes
       nwrow += blen
 
     # Safety check
     assert (nwrow == vlen)
+    self._write_partials()
 
   def __iter__(self):
 
@@ -2186,6 +2770,8 @@ cdef class carray:
   def __next__(self):
     cdef char *vbool
     cdef int nhits_buf
+    cdef npy_intp nrows
+    cdef object view
 
     self.nextelement = self._nrow + self.step
     while (self.nextelement < self.stop) and (self.nhits < self.limit):
@@ -2215,8 +2801,24 @@ cdef class carray:
           self.where_buf = self.where_arr[
             self.nrowsread:self.nrowsread+self.nrowsinbuf]
 
-        # Read a data chunk
-        self.iobuf = self[self.nrowsread:self.nrowsread+self.nrowsinbuf]
+        # Read a data chunk.  Chunks stored uncompressed are used in
+        # place, the others are all read into the same buffer, borrowed
+        # from the pool for the whole iteration.
+        nrows = <npy_intp>cython.cdiv(self._nbytes, self.atomsize)
+        view = self._viewrange(self.nrowsread,
+                               min(self.nrowsinbuf, nrows - self.nrowsread))
+        if view is not None:
+          self.release_iobuf()
+          self.iobuf = view
+        elif self.nrowsread + self.nrowsinbuf <= nrows:
+          if not self.iobuf_pooled or len(self.iobuf) != self.nrowsinbuf:
+            self.release_iobuf()
+            self.iobuf = chunkpool.borrow(self._dtype, self.nrowsinbuf)
+            self.iobuf_pooled = True
+          self._getrange(self.nrowsread, self.nrowsinbuf, self.iobuf)
+        else:
+          self.release_iobuf()
+          self.iobuf = self[self.nrowsread:self.nrowsread+self.nrowsinbuf]
         self.nrowsread += self.nrowsinbuf
 
         # Check if we can skip this buffer
@@ -2258,16 +2860,26 @@ cdef class carray:
       if self.itemsize == self.atomsize:
         return PyArray_GETITEM(
           self.iobuf, self.iobuf.data + self._row * self.atomsize)
+      elif self.iobuf_pooled:
+        # The pooled buffer is overwritten by the next chunk read
+        return self.iobuf[self._row].copy()
       else:
         return self.iobuf[self._row]
 
     else:
       # Release buffers
+      self.release_iobuf()
       self.iobuf = np.empty(0, dtype=self._dtype)
       self.where_buf = np.empty(0, dtype=np.bool_)
       self.reset_sentinels()
       raise StopIteration        # end of iteration
 
+  cdef release_iobuf(self):
+    """Give the I/O buffer of the iterator back to the pool."""
+    if self.iobuf_pooled:
+      self.iobuf_pooled = False
+      chunkpool.giveback(self.iobuf)
+
   cdef reset_sentinels(self):
     """Reset sentinels for iterator."""
     self.sss_mode = False
@@ -2339,8 +2951,9 @@ cdef class carray:
       # Flush this chunk to disk
       self.chunks.flush(chunk_)
 
-    # Finally, update the sizes metadata on-disk
+    # Finally, update the sizes and partials metadata on-disk
     self._update_disk_sizes()
+    self._write_partials()
 
   # XXX This does not work.  Will have to realize how to properly
   # flush buffers before self going away...
@@ -7,7 +7,7 @@ configuration parameters for carray
 
 class cparams(object):
     """
-    cparams(clevel=5, shuffle=True)
+    cparams(clevel=5, shuffle=True, precision=None)
 
     Class to host parameters for compression and other filters.
 
@@ -17,12 +17,29 @@ class cparams(object):
         The compression level.
     shuffle : bool
         Whether the shuffle filter is active or not.
+    precision : int, optional
+        The number of significant (decimal) digits to keep for
+        floating point data.  The low mantissa bits that are not
+        needed for this precision are zeroed before compression, which
+        is lossy, but improves the compression ratio a lot for noisy
+        data.  If None (the default), data is stored losslessly.
 
     Notes
     -----
     The shuffle filter may be automatically disable in case it is
     non-sense to use it (e.g. itemsize == 1).
 
+    The precision filter only applies to floating point data, and it
+    is ignored for the rest of types.
+
+    With `clevel=0` the chunks are stored uncompressed, and slices
+    within a chunk are returned as read-only views of it instead of
+    copies (the chunks of disk-based carrays are memory-mapped).  So
+    whether a slice of such a carray is writable depends on the
+    chunk alignment: slices spanning several chunks are writable
+    copies, the rest are read-only.  Use ``.copy()`` on the slice
+    when a writable array is needed.
+
     """
 
     @property
@@ -35,7 +52,12 @@ class cparams(object):
         """Shuffle filter is active?"""
         return self._shuffle
 
-    def __init__(self, clevel=5, shuffle=True):
+    @property
+    def precision(self):
+        """The significant digits kept for floats (None means lossless)."""
+        return self._precision
+
+    def __init__(self, clevel=5, shuffle=True, precision=None):
         if not isinstance(clevel, int):
             raise ValueError, "`clevel` must an int."
         if not isinstance(shuffle, (bool, int)):
@@ -43,11 +65,32 @@ class cparams(object):
         shuffle = bool(shuffle)
         if clevel < 0:
             raise ValueError, "clevel must be a positive integer"
+        if precision is not None:
+            if not isinstance(precision, int):
+                raise ValueError, "`precision` must an int."
+            if precision <= 0:
+                raise ValueError, "precision must be a positive integer"
         self._clevel = clevel
         self._shuffle = shuffle
+        self._precision = precision
+
+    def __eq__(self, other):
+        if not isinstance(other, cparams):
+            return NotImplemented
+        return (self._clevel == other._clevel and
+                self._shuffle == other._shuffle and
+                self._precision == other._precision)
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        if eq is NotImplemented:
+            return eq
+        return not eq
 
     def __repr__(self):
         args = ["clevel=%d"%self._clevel, "shuffle=%s"%self._shuffle]
+        if self._precision is not None:
+            args.append("precision=%d"%self._precision)
         return '%s(%s)' % (self.__class__.__name__, ', '.join(args))
 
 ## Local Variables:
@@ -407,9 +407,10 @@ class ctable(object):
         Parameters
         ----------
         newcol : carray, ndarray, list or tuple
-            If a carray is passed, no conversion will be carried out.
-            If conversion to a carray has to be done, `kwargs` will
-            apply.
+            If a carray is passed, no conversion will be carried out
+            (but for disk-based ctables, where it is copied into the
+            ctable directory).  If conversion to a carray has to be
+            done, `kwargs` will apply.
         name : string, optional
             The name for the new column.  If not passed, it will
             receive an automatic name.
@@ -448,6 +449,9 @@ class ctable(object):
         if len(newcol) != self.len:
             raise ValueError, "`newcol` must have the same length than ctable"
 
+        if self.rootdir:
+            # Put the new column under its own `name` subdirectory
+            kwargs['rootdir'] = os.path.join(self.rootdir, name)
         if isinstance(newcol, np.ndarray):
             if 'cparams' not in kwargs:
                 kwargs['cparams'] = self.cparams
@@ -456,7 +460,11 @@ class ctable(object):
             if 'cparams' not in kwargs:
                 kwargs['cparams'] = self.cparams
             newcol = carray(newcol, **kwargs)
-        elif type(newcol) != carray:
+        elif type(newcol) == carray:
+            if self.rootdir:
+                # Store this in destination (chunks are copied verbatim)
+                newcol = newcol.copy(**kwargs)
+        else:
             raise ValueError(
                 """`newcol` type not supported""")
 
@@ -0,0 +1,375 @@
+"""
+cview
+
+Lazy views over a range of a carray (no data is materialized)
+"""
+
+import itertools as it
+
+import numpy as np
+
+import utils
+
+# The block length used when the parent does not have a chunklen
+BLOCKLEN = 2**16
+
+
+class cview(object):
+    """
+    cview(parent, start=0, stop=None, step=1)
+
+    A lazy, read-only view of the [start:stop:step] range of `parent`.
+
+    Creating a view does not read any data.  Iteration, queries and
+    reductions are streamed block by block (a chunk at a time) from
+    `parent`, so the memory consumption does not depend on the length
+    of the view.  Use `materialize()` to get the values as a NumPy
+    array.
+
+    Parameters
+    ----------
+    parent : carray or vcarray
+        The object to be viewed.
+    start, stop, step : int
+        The range of `parent` to be viewed.  `step` must be positive.
+
+    """
+
+    @property
+    def dtype(self):
+        "The dtype of this object."
+        return self.parent.dtype
+
+    @property
+    def len(self):
+        "The length (leading dimension) of this object."
+        return utils.get_len_of_range(self.start, self.stop, self.step)
+
+    @property
+    def ndim(self):
+        "The number of dimensions of this object."
+        return len(self.shape)
+
+    @property
+    def shape(self):
+        "The shape of this object."
+        return (self.len,) + self.parent.shape[1:]
+
+    @property
+    def size(self):
+        "The size of this object."
+        return np.prod(self.shape)
+
+    @property
+    def blocklen(self):
+        "The number of elements read from `parent` in each block."
+        return getattr(self.parent, 'chunklen', BLOCKLEN)
+
+    def __init__(self, parent, start=0, stop=None, step=1):
+        if step is None:
+            step = 1
+        if step <= 0:
+            raise NotImplementedError("step in slice can only be positive")
+        self.parent = parent
+        "The viewed object."
+        self.start, self.stop, self.step = \
+            slice(start, stop, step).indices(len(parent))
+
+    def _index(self, i):
+        """Translate the index `i` of this view into a `parent` index."""
+        return self.start + i * self.step
+
+    def __len__(self):
+        return self.len
+
+    def __getitem__(self, key):
+        """
+        x.__getitem__(key) <==> x[key]
+
+        Integers return a scalar and slices return a new (lazy) view.
+        The rest of keys supported by `carray.__getitem__()` return a
+        NumPy array.
+
+        """
+
+        # Check for integer
+        if isinstance(key, (int, long, np.integer)):
+            if key < 0:
+                # To support negative values
+                key += self.len
+            if key < 0 or key >= self.len:
+                raise IndexError, "index out of range"
+            return self.parent[self._index(key)]
+        # Slices compose into a new view
+        elif isinstance(key, slice):
+            (start, stop, step) = key.start, key.stop, key.step
+            if step and step <= 0 :
+                raise NotImplementedError("step in slice can only be positive")
+            start, stop, step = slice(start, stop, step).indices(self.len)
+            stop = max(start, stop)
+            return cview(self.parent, self._index(start), self._index(stop),
+                         self.step * step)
+        # Multidimensional keys
+        elif isinstance(key, tuple):
+            if len(key) == 0:
+                raise ValueError("empty tuple not supported")
+            elif len(key) == 1:
+                return self[key[0]]
+            if type(key[0]) == slice:
+                arr = self[key[0]].materialize()
+                return arr[(slice(None),) + key[1:]]
+            return self[key[0]][key[1:]]
+        # List of integers (case of fancy indexing)
+        elif isinstance(key, list):
+            try:
+                key = np.array(key, dtype=np.int_)
+            except:
+                raise IndexError, "key cannot be converted to an array of indices"
+            return self[key]
+        # A boolean or integer array (case of fancy indexing)
+        elif hasattr(key, "dtype"):
+            if key.dtype.type == np.bool_:
+                if len(key) != self.len:
+                    raise IndexError, "boolean array length must match len(self)"
+                return np.fromiter(self.where(key), dtype=self.dtype)
+            elif np.issubsctype(key, np.int_):
+                return np.array([self[i] for i in key], dtype=self.dtype)
+            else:
+                raise IndexError, \
+                      "arrays used as indices must be of integer (or boolean) type"
+        # All the rest not implemented
+        else:
+            raise NotImplementedError, "key not supported: %s" % repr(key)
+
+    def __setitem__(self, key, value):
+        raise RuntimeError, "cview objects are read-only"
+
+    def _block(self, i, blen):
+        """Read `blen` elements of this view, starting at `i`."""
+        stop = min(self._index(i + blen), self.stop)
+        return self.parent[self._index(i):stop:self.step]
+
+    def iterblocks(self, blen=None):
+        """
+        iterblocks(blen=None)
+
+        Iterator over the values of this view, in NumPy blocks of `blen`
+        elements (the chunklen of the parent by default).
+
+        """
+        if blen is None:
+            blen = self.blocklen
+        for i in xrange(0, self.len, blen):
+            yield self._block(i, blen)
+
+    # This is a private function that is specific for `eval`
+    def _getrange(self, start, blen, out):
+        blen = min(blen, self.len - start)
+        if self.step == 1 and hasattr(self.parent, "_getrange"):
+            self.parent._getrange(self._index(start), blen, out)
+        else:
+            out[:blen] = self._block(start, blen)
+
+    def materialize(self):
+        """
+        materialize()
+
+        Return the values of this view as a NumPy array.
+
+        """
+        return self.parent[self.start:self.stop:self.step]
+
+    def copy(self, **kwargs):
+        """
+        copy(**kwargs)
+
+        Return the values of this view as a new carray.
+
+        Parameters
+        ----------
+        kwargs : list of parameters or dictionary
+            Any parameter supported by the carray constructor.
+
+        """
+        from carrayExtension import carray
+
+        if hasattr(self.parent, 'cparams'):
+            kwargs.setdefault('cparams', self.parent.cparams)
+        expectedlen = kwargs.pop('expectedlen', self.len)
+        out = carray(np.empty((0,)+self.shape[1:], dtype=self.dtype),
+                     expectedlen=expectedlen, **kwargs)
+        for block in self.iterblocks():
+            out.append(block)
+        out.flush()
+        return out
+
+    def __iter__(self):
+        return self.iter()
+
+    def iter(self, start=0, stop=None, step=1, limit=None, skip=0):
+        """
+        iter(start=0, stop=None, step=1, limit=None, skip=0)
+
+        Iterator with `start`, `stop` and `step` bounds.
+
+        See Also
+        --------
+        carray.iter
+
+        """
+        view = self[start:stop:step]
+        return view.parent.iter(view.start, view.stop, view.step,
+                                limit=limit, skip=skip)
+
+    def where(self, boolarr, limit=None, skip=0):
+        """
+        where(boolarr, limit=None, skip=0)
+
+        Iterator that returns values of this object where `boolarr` is true.
+
+        See Also
+        --------
+        carray.where
+
+        """
+        if not hasattr(boolarr, "dtype"):
+            raise ValueError, "`boolarr` is not an array"
+        if boolarr.dtype.type != np.bool_:
+            raise ValueError, "`boolarr` is not an array of booleans"
+        if len(boolarr) != self.len:
+            raise ValueError, "`boolarr` must be of the same length than ``self``"
+
+        def values():
+            blen = self.blocklen
+            for i, block in enumerate(self.iterblocks(blen)):
+                bools = boolarr[i*blen:i*blen+len(block)]
+                for value in block[bools]:
+                    yield value
+
+        if limit is not None:
+            limit += skip
+        return it.islice(values(), skip, limit)
+
+    def wheretrue(self, limit=None, skip=0):
+        """
+        wheretrue(limit=None, skip=0)
+
+        Iterator that returns indices where this object is true.
+
+        See Also
+        --------
+        carray.wheretrue
+
+        """
+        if self.dtype.type != np.bool_:
+            raise ValueError, "`self` is not an array of booleans"
+
+        def indices():
+            blen = self.blocklen
+            for i, block in enumerate(self.iterblocks(blen)):
+                for idx in np.flatnonzero(block):
+                    yield i*blen + idx
+
+        if limit is not None:
+            limit += skip
+        return it.islice(indices(), skip, limit)
+
+    def _reduce(self, which, func, usepartials=True):
+        """Reduce every block of this view with `func`.
+
+        Chunks of the parent completely covered by a contiguous view are
+        reduced through their partial aggregates (element `which`), so
+        that they are not decompressed at all.
+        """
+        parent = self.parent
+        values = []
+        start, stop = 0, self.len
+        if (usepartials and self.step == 1 and hasattr(parent, "partials")
+            and parent._partials_usable()):
+            chunklen = parent.chunklen
+            # The full chunks inside the view
+            c0 = -(-self.start // chunklen)
+            c1 = min(self.stop // chunklen, parent.nchunks)
+            if c0 < c1:
+                values.extend(parent.partials(nchunk)[which]
+                              for nchunk in xrange(c0, c1))
+                parent._write_partials()
+                # Head and tail of the view
+                values.append(func(parent[self.start:c0*chunklen]))
+                values.append(func(parent[c1*chunklen:self.stop]))
+                start = stop
+        for block in self[start:stop].iterblocks():
+            values.append(func(block))
+        return values
+
+    def sum(self, dtype=None):
+        """
+        sum(dtype=None)
+
+        Return the sum of the elements in this view.
+
+        See Also
+        --------
+        carray.sum
+
+        """
+        if self.dtype.kind == 'S':
+            raise TypeError, "cannot perform reduce with flexible type"
+        if hasattr(self.parent, "_sum_dtype"):
+            sum_dtype = self.parent._sum_dtype()
+        else:
+            sum_dtype = np.empty(0, dtype=self.dtype).sum().dtype
+        if dtype is None:
+            dtype = sum_dtype
+        else:
+            dtype = np.dtype(dtype)
+        # The partials are only kept for the default accumulator
+        usepartials = (dtype == sum_dtype)
+        result = np.zeros(1, dtype=dtype)[0]
+        for value in self._reduce(0, lambda a: a.sum(dtype=dtype), usepartials):
+            result += value
+        return result
+
+    def min(self):
+        """
+        min()
+
+        Return the minimum of the elements in this view.
+
+        """
+        if self.len == 0:
+            raise ValueError, "zero-size array to reduction operation"
+        values = self._reduce(2, lambda a: a.min() if len(a) else None)
+        return self.dtype.type(min(v for v in values if v is not None))
+
+    def max(self):
+        """
+        max()
+
+        Return the maximum of the elements in this view.
+
+        """
+        if self.len == 0:
+            raise ValueError, "zero-size array to reduction operation"
+        values = self._reduce(3, lambda a: a.max() if len(a) else None)
+        return self.dtype.type(max(v for v in values if v is not None))
+
+    def __str__(self):
+        return "cview(%s[%d:%d:%d])" % (
+            self.parent.__class__.__name__, self.start, self.stop, self.step)
+
+    def __repr__(self):
+        header = "cview(%s, %s)\n" % (self.shape, self.dtype)
+        header += "  parent := %s(%s)\n" % (
+            self.parent.__class__.__name__, self.parent.shape)
+        header += "  start := %d; stop := %d; step := %d\n" % (
+            self.start, self.stop, self.step)
+        return header
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 78
+## End:
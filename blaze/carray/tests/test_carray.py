@@ -544,6 +544,32 @@ class copyTest(MayBeDiskTest, TestCase):
         #print "b.cbytes, c.cbytes:", b.cbytes, c.cbytes
         self.assert_(b.cbytes < c.cbytes, "shuffle not changed")
 
+    def test04(self):
+        """Testing copy() of compressed chunks (same layout)"""
+        a = np.linspace(-1., 1., 1e4)
+        a[:2000] = 0
+        b = ca.carray(a, chunklen=1000, rootdir=self.rootdir)
+        c = b.copy()
+        self.assert_(c.chunklen == b.chunklen, "chunklen not kept")
+        self.assert_(c.cbytes == b.cbytes, "chunks were recompressed")
+        assert_array_equal(c[:], a, "incorrect correct values after copy()")
+
+    def test05(self):
+        """Testing copy() of compressed chunks to/from disk"""
+        a = np.linspace(-1., 1., 1e4+11)
+        a[:2000] = 0
+        b = ca.carray(a, chunklen=1000, rootdir=self.rootdir)
+        if self.disk:
+            # From disk to memory and back to disk
+            c = b.copy(rootdir=None)
+            c = c.copy(rootdir=self.rootdir + "-test05", mode='w')
+        else:
+            c = b.copy()
+        assert_array_equal(c[:], a, "incorrect correct values after copy()")
+        c.append(a)
+        assert_array_equal(c[len(a):], a,
+                           "incorrect correct values after copy()")
+
 class copyDiskTest(copyTest):
     disk = True
 
@@ -658,6 +684,122 @@ class iterDiskTest(iterTest):
     disk = True
 
 
+class iterchunksTest(MayBeDiskTest, TestCase):
+
+    def test00(self):
+        """Testing `iterchunks()` method"""
+        a = np.arange(1e4, dtype='f8')
+        b = ca.carray(a, chunklen=300, rootdir=self.rootdir)
+        chunks = [chunk.copy() for chunk in b.iterchunks()]
+        self.assert_(len(chunks) == 34, "Wrong number of chunks")
+        assert_array_equal(a, np.concatenate(chunks),
+                           "iterchunks() does not return the data")
+
+    def test01(self):
+        """Testing that `iterchunks()` reuses a single buffer"""
+        a = np.arange(1e4, dtype='f8')
+        b = ca.carray(a, chunklen=1000, rootdir=self.rootdir)
+        pool = ca.bufferpool()
+        addresses = set(chunk.ctypes.data for chunk in b.iterchunks(pool))
+        self.assert_(len(addresses) == 1, "The buffer is not reused")
+        self.assert_(pool.misses == 1, "The buffer is not borrowed")
+        # The buffer is back in the pool
+        buf = pool.borrow('f8', 1000)
+        self.assert_(pool.hits == 1, "The buffer is not given back")
+        self.assert_(buf.ctypes.data in addresses)
+
+class iterchunksDiskTest(iterchunksTest):
+    disk = True
+
+
+class viewsTest(MayBeDiskTest, TestCase):
+
+    def test00(self):
+        """Testing that slices of uncompressed chunks are views"""
+        a = np.arange(1e4, dtype='f8')
+        b = ca.carray(a, chunklen=1000, cparams=ca.cparams(clevel=0),
+                      rootdir=self.rootdir)
+        c = b[1010:1020]
+        assert_array_equal(a[1010:1020], c, "Slice is not correct")
+        self.assert_(not c.flags.writeable, "Slice is not a view")
+        assert_array_equal(a[1010:1020:3], b[1010:1020:3])
+        # Across chunks, the slice is a copy
+        c = b[990:1010]
+        assert_array_equal(a[990:1010], c, "Slice is not correct")
+        self.assert_(c.flags.writeable, "Slice is not a copy")
+
+    def test01(self):
+        """Testing that slices of compressed chunks are copies"""
+        a = np.arange(1e4, dtype='f8')
+        b = ca.carray(a, chunklen=1000, rootdir=self.rootdir)
+        c = b[1010:1020]
+        assert_array_equal(a[1010:1020], c, "Slice is not correct")
+        self.assert_(c.flags.writeable, "Slice is not a copy")
+
+    def test02(self):
+        """Testing iterators and eval over uncompressed chunks"""
+        a = np.arange(1e4+5, dtype='f8')
+        b = ca.carray(a, chunklen=1000, cparams=ca.cparams(clevel=0),
+                      rootdir=self.rootdir)
+        self.assert_(sum(b) == a.sum(), "iter() does not work correctly")
+        self.assert_(sum(b.iter(995, 5005, 3)) == a[995:5005:3].sum())
+        c = ca.eval("b * 2", vm="python")
+        assert_array_equal(a * 2, c[:], "eval() does not work correctly")
+
+    def test03(self):
+        """Testing that views survive the update of their chunk"""
+        a = np.arange(1e4, dtype='f8')
+        b = ca.carray(a, chunklen=1000, cparams=ca.cparams(clevel=0),
+                      rootdir=self.rootdir)
+        c = b[10:20]
+        b[15] = -1
+        assert_array_equal(a[10:20], c, "The view has changed")
+        self.assert_(b[15] == -1, "The carray is not updated")
+
+class viewsDiskTest(viewsTest):
+    disk = True
+
+    def test04(self):
+        """Testing that views of mapped chunks do not hold descriptors"""
+        if not os.path.isdir('/proc/self/fd'):
+            return
+        a = np.arange(1e5, dtype='f8')
+        b = ca.carray(a, chunklen=1000, cparams=ca.cparams(clevel=0),
+                      rootdir=self.rootdir)
+        nfds = len(os.listdir('/proc/self/fd'))
+        views = [b[i:i+10] for i in xrange(0, len(a), 1000)]
+        self.assert_(len(os.listdir('/proc/self/fd')) <= nfds,
+                     "The views hold file descriptors")
+        for i, c in zip(xrange(0, len(a), 1000), views):
+            assert_array_equal(a[i:i+10], c, "View is not correct")
+
+
+class bufferpoolTest(TestCase):
+
+    def test00(self):
+        """Testing the alignment of pooled buffers"""
+        pool = ca.bufferpool()
+        for length in (1, 3, 1000):
+            buf = pool.borrow('i2', length)
+            self.assert_(buf.shape == (length,))
+            self.assert_(buf.ctypes.data % 64 == 0, "Buffer is not aligned")
+
+    def test01(self):
+        """Testing that buffers are keyed by dtype and length"""
+        pool = ca.bufferpool(maxbuffers=1)
+        buf = pool.borrow('f8', 100)
+        pool.giveback(buf)
+        self.assert_(pool.borrow('f4', 100) is not buf)
+        self.assert_(pool.borrow('f8', 10) is not buf)
+        self.assert_(pool.borrow('f8', 100) is buf)
+        # Only `maxbuffers` idle buffers are kept
+        pool.giveback(buf)
+        pool.giveback(pool.borrow('f8', 100))
+        pool.giveback(np.empty(100, 'f8'))
+        self.assert_(pool.borrow('f8', 100) is buf)
+        self.assert_(pool.borrow('f8', 100) is not buf)
+
+
 class wheretrueTest(TestCase):
 
     def test00(self):
@@ -1025,6 +1167,47 @@ class fromiterTest(TestCase):
         b = ca.fromiter((i*2 for i in xrange(N)), dtype='f8', count=N)
         assert_array_equal(b[:], a, "iterator with a hint fails")
 
+    def test05a(self):
+        """Testing fromiter method with an iterator of unknown length"""
+        N = 10*1000
+        a = np.arange(N, dtype='f8')
+        b = ca.fromiter((i for i in xrange(N)), dtype='f8', count=-1,
+                        chunklen=1000)
+        assert_array_equal(b[:], a, "iterator without a hint fails")
+
+    def test05b(self):
+        """Testing fromiter method with an iterator of blocks"""
+        N = 10*1000
+        a = np.arange(N, dtype='f8')
+        blocks = (a[i:i+333] for i in xrange(0, N, 333))
+        b = ca.fromiter(blocks, dtype='f8', count=-1, chunklen=1000)
+        assert_array_equal(b[:], a, "iterator of blocks fails")
+
+    def test05c(self):
+        """Testing fromiter method with blocks and a count"""
+        a = np.arange(100, dtype='i4')
+        blocks = (range(i, i+7) for i in xrange(0, 100, 7))
+        b = ca.fromiter(blocks, dtype='i4', count=50, chunklen=16)
+        assert_array_equal(b[:], a[:50], "iterator of blocks fails")
+
+    def test05d(self):
+        """Testing fromiter method with blocks of records"""
+        N = 1000
+        ra = np.fromiter(((i, i*2.) for i in xrange(N)), dtype='i4,f8')
+        blocks = (ra[i:i+100] for i in xrange(0, N, 100))
+        t = ca.fromiter(blocks, dtype='i4,f8', count=-1)
+        assert_array_equal(t[:], ra, "ctable values are not correct")
+
+    def test06(self):
+        """Testing fromiter with iterables that are not iterators"""
+        N = 1000
+        a = np.arange(N, dtype='f8')
+        for iterable in (range(N), xrange(N), a):
+            b = ca.fromiter(iterable, dtype='f8', count=-1, chunklen=100)
+            assert_array_equal(b[:], a, "iterable fails")
+            b = ca.fromiter(iterable, dtype='f8', count=10)
+            assert_array_equal(b[:], a[:10], "iterable with count fails")
+
 
 class computeMethodsTest(TestCase):
 
@@ -1055,6 +1238,115 @@ class computeMethodsTest(TestCase):
         ac = ca.zeros(10, 'S3')
         self.assertRaises(TypeError, ac.sum)
 
+    def test03(self):
+        """Testing min() and max()."""
+        a = np.arange(1e5)
+        np.random.shuffle(a)
+        ac = ca.carray(a, chunklen=1000)
+        self.assert_(a.min() == ac.min(), "min() is not working correctly.")
+        self.assert_(a.max() == ac.max(), "max() is not working correctly.")
+
+    def test04(self):
+        """Testing reductions with constant chunks."""
+        a = np.zeros(1e5, dtype='i4')
+        a[-100:] = 3
+        ac = ca.carray(a, chunklen=1000)
+        self.assert_(a.sum() == ac.sum(), "sum() is not working correctly.")
+        self.assert_(ac.partials(0) == (0, 0.0, 0, 0),
+                     "partials() is not working correctly.")
+        self.assert_(a.max() == ac.max(), "max() is not working correctly.")
+
+    def test05(self):
+        """Testing that partials are invalidated by updates."""
+        a = np.arange(1e4)
+        ac = ca.carray(a, chunklen=1000)
+        self.assert_(a.sum() == ac.sum(), "sum() is not working correctly.")
+        a[10] = ac[10] = -1e10
+        self.assert_(a.sum() == ac.sum(), "sum() is not working correctly.")
+        self.assert_(a.min() == ac.min(), "min() is not working correctly.")
+
+
+class precisionTest(MayBeDiskTest, TestCase):
+
+    def test00(self):
+        """Testing the precision filter on creation."""
+        a = np.random.rand(1e4)
+        b = ca.carray(a, cparams=ca.cparams(precision=4),
+                      rootdir=self.rootdir)
+        assert_array_almost_equal(a, b[:], 4, "Arrays are not close")
+        self.assert_((b[:] != a).any(), "precision was not applied")
+        self.assert_((b[:] <= np.abs(a)).all(), "mantissa was not trimmed")
+
+    def test01(self):
+        """Testing the precision filter with append() and __setitem__()."""
+        a = np.random.rand(1e4)
+        b = ca.carray(a[:10], cparams=ca.cparams(precision=4),
+                      rootdir=self.rootdir)
+        b.append(a[10:])
+        b[100:200] = a[:100]
+        c = ca.carray(a, cparams=ca.cparams(precision=4))
+        c[100:200] = a[:100]
+        assert_array_equal(b[:], c[:], "Arrays are not equal")
+
+    def test02(self):
+        """Testing that the precision filter ignores non-float types."""
+        a = np.arange(1e4, dtype='i8')
+        b = ca.carray(a, cparams=ca.cparams(precision=1),
+                      rootdir=self.rootdir)
+        assert_array_equal(a, b[:], "Arrays are not equal")
+
+    def test03(self):
+        """Testing that the precision filter improves compression."""
+        a = np.random.rand(1e5)
+        b = ca.carray(a)
+        c = ca.carray(a, cparams=ca.cparams(precision=4))
+        self.assert_(c.cbytes < b.cbytes, "compression was not improved")
+
+
+class precisionDiskTest(precisionTest):
+    disk = True
+
+    def test04(self):
+        """Testing that the precision filter is persisted."""
+        a = np.random.rand(1e4)
+        b = ca.carray(a, cparams=ca.cparams(precision=4),
+                      rootdir=self.rootdir)
+        b = ca.carray(rootdir=self.rootdir)
+        self.assert_(b.cparams.precision == 4, "precision is not persisted")
+        b.append(a)
+        b.flush()
+        assert_array_equal(b[:1e4], b[1e4:], "Arrays are not equal")
+
+
+class computeMethodsDiskTest(MayBeDiskTest, TestCase):
+
+    disk = True
+
+    def test00(self):
+        """Testing that partials are persisted."""
+        a = np.arange(1e4)
+        ac = ca.carray(a, chunklen=1000, rootdir=self.rootdir)
+        self.assert_(a.sum() == ac.sum(), "sum() is not working correctly.")
+        ac = ca.carray(rootdir=self.rootdir, mode='r')
+        self.assert_(ac.partials(3) == (a[3000:4000].sum(),
+                                        np.dot(a[3000:4000], a[3000:4000]),
+                                        3000., 3999.),
+                     "partials() have not been persisted.")
+        self.assert_(a.sum() == ac.sum(), "sum() is not working correctly.")
+
+    def test01(self):
+        """Testing that persisted partials are invalidated by trim()."""
+        a = np.arange(1e4)
+        ac = ca.carray(a, chunklen=1000, rootdir=self.rootdir)
+        self.assert_(a.max() == ac.max(), "max() is not working correctly.")
+        ac.trim(2500)
+        ac.append(np.zeros(2500))
+        ac.flush()
+        a[-2500:] = 0
+        ac = ca.carray(rootdir=self.rootdir, mode='r')
+        self.assert_(a.max() == ac.max(), "max() is not working correctly.")
+        self.assert_(a.sum() == ac.sum(), "sum() is not working correctly.")
+
 
 class arangeTemplate():
 
@@ -254,6 +254,18 @@ class add_del_colTest(MayBeDiskTest, TestCase):
         t.addcol(c, 'f2')
         self.assert_(t['f2'].cparams.clevel == 1, "Incorrect clevel")
 
+    def test01c(self):
+        """Testing precision when adding a new column (numpy flavor)"""
+        N = 10
+        ra = np.fromiter(((i, i*2.) for i in xrange(N)), dtype='i4,f8')
+        t = ca.ctable(ra, rootdir=self.rootdir)
+        c = np.arange(N, dtype='f8') / 3.
+        t.addcol(c, 'f2', cparams=ca.cparams(precision=3))
+        self.assert_(t['f2'].cparams.precision == 3, "Incorrect precision")
+        assert_array_almost_equal(t['f2'][:], c, 3,
+                                  "ctable values are not correct")
+        self.assert_((t['f2'][:] != c).any(), "precision was not applied")
+
     def test02(self):
         """Testing adding a new column (default naming)"""
         N = 10
@@ -347,6 +359,18 @@ class add_del_colTest(MayBeDiskTest, TestCase):
 class add_del_colDiskTest(add_del_colTest, TestCase):
     disk = True
 
+    def test09(self):
+        """Testing that added columns are persisted"""
+        N = 10
+        ra = np.fromiter(((i, i*2.) for i in xrange(N)), dtype='i4,f8')
+        t = ca.ctable(ra, rootdir=self.rootdir)
+        c = np.arange(N, dtype='i8')*3
+        t.addcol(ca.carray(c), 'f2')
+        t.addcol(c, 'f3')
+        t = ca.ctable(rootdir=self.rootdir, mode='r')
+        assert_array_equal(t['f2'][:], c, "column values are not correct")
+        assert_array_equal(t['f3'][:], c, "column values are not correct")
+
 
 class getitemTest(MayBeDiskTest, TestCase):
 
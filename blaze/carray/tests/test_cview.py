@@ -0,0 +1,105 @@
+import os, os.path
+from unittest import TestCase
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import blaze.carray as ca
+from common import MayBeDiskTest
+
+
+class viewTest(MayBeDiskTest, TestCase):
+
+    def getobjects(self, N=1000):
+        a = np.arange(N, dtype='i4')
+        b = ca.carray(a, chunklen=100, rootdir=self.rootdir)
+        return a, b
+
+    def test00(self):
+        """Testing `__getitem__()` with integers and slices"""
+        a, b = self.getobjects()
+        v = b.view(150, 920, 3)
+        a = a[150:920:3]
+        self.assert_(len(v) == len(a), "Lengths are not equal")
+        for i in (0, 1, 100, -1):
+            self.assert_(v[i] == a[i], "Values are not equal")
+        self.assertRaises(IndexError, v.__getitem__, len(a))
+        for sl in (slice(None), slice(10, 20), slice(3, 200, 7),
+                   slice(-10, None, 3), slice(20, 10)):
+            self.assert_(isinstance(v[sl], ca.cview), "not a view")
+            assert_array_equal(v[sl].materialize(), a[sl],
+                               "Arrays are not equal")
+
+    def test01(self):
+        """Testing `iter()`, `where()` and `wheretrue()`"""
+        a, b = self.getobjects()
+        v = b.view(50, 777)
+        a = a[50:777]
+        self.assert_(list(v) == list(a), "iter() does not work well")
+        self.assert_(list(v.iter(5, 600, 3)) == list(a[5:600:3]),
+                     "iter() does not work well")
+        self.assert_(list(v.iter(5, limit=10, skip=3)) == list(a[8:18]),
+                     "iter() does not work well")
+        c = a % 3 == 0
+        self.assert_(list(v.where(c)) == list(a[c]),
+                     "where() does not work well")
+        w = ca.carray(b[:] % 3 == 0).view(50, 777)
+        self.assert_(list(w.wheretrue()) == list(np.where(c)[0]),
+                     "wheretrue() does not work well")
+
+    def test02(self):
+        """Testing reductions"""
+        a, b = self.getobjects()
+        for start, stop, step in ((0, None, 1), (150, 920, 1),
+                                  (150, 920, 3), (110, 190, 1)):
+            v = b.view(start, stop, step)
+            r = a[start:stop:step]
+            self.assert_(v.sum() == r.sum(), "sum() does not work well")
+            self.assert_(v.sum(dtype='f8') == r.sum(dtype='f8'),
+                         "sum() does not work well")
+            self.assert_(v.min() == r.min(), "min() does not work well")
+            self.assert_(v.max() == r.max(), "max() does not work well")
+
+    def test03(self):
+        """Testing `copy()` and `eval()`"""
+        a, b = self.getobjects()
+        v = b.view(150, 920, 3)
+        assert_array_equal(v.copy()[:], a[150:920:3], "Arrays are not equal")
+        v = b.view(150, 920)
+        assert_array_equal(ca.eval("v * 2")[:], a[150:920] * 2,
+                           "Arrays are not equal")
+
+    def test03b(self):
+        """Testing `eval()` over several blocks"""
+        a, b = self.getobjects(N=100000)
+        v = b.view(150, 99000)
+        for vm in ("python", None):
+            assert_array_equal(ca.eval("v * 2", vm=vm)[:], a[150:99000] * 2,
+                               "Arrays are not equal")
+
+    def test04(self):
+        """Testing views of vcarrays"""
+        a, b = self.getobjects()
+        v = ca.concat([b, ca.carray(a)]).view(900, 1200, 2)
+        a = np.concatenate((a, a))[900:1200:2]
+        assert_array_equal(v.materialize(), a, "Arrays are not equal")
+        self.assert_(v.sum() == a.sum(), "sum() does not work well")
+
+    def test05(self):
+        """Testing that views are read-only"""
+        a, b = self.getobjects()
+        v = b.view()
+        self.assertRaises(RuntimeError, v.__setitem__, 0, 1)
+
+
+class viewDiskTest(viewTest):
+    disk = True
+
+
+## Local Variables:
+## mode: python
+## coding: utf-8
+## py-indent-offset: 4
+## tab-with: 4
+## fill-column: 66
+## End:
@@ -532,6 +532,18 @@ class iterTest(unittest.TestCase):
         for r in b.iter(15, 100, 3):
             assert_array_equal(a, r, "Arrays are not equal")
 
+    def test03(self):
+        """Testing that the rows kept from `iter()` are not overwritten"""
+        a = np.arange(3000, dtype="i4").reshape(1000, 3)
+        b = ca.carray(a, chunklen=100)
+        rows = list(b)
+        # Other readers of the pooled buffers
+        b[:]
+        assert_array_equal(a, np.array(rows), "Arrays are not equal")
+        rows = [r for r in b.iter(15, 700, 3)]
+        assert_array_equal(a[15:700:3], np.array(rows),
+                           "Arrays are not equal")
+
 
 class reshapeTest(unittest.TestCase):
 
@@ -0,0 +1,100 @@
+import os, os.path
+from unittest import TestCase
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import blaze.carray as ca
+from common import MayBeDiskTest
+
+
+class concatTest(MayBeDiskTest, TestCase):
+
+    def getcarrays(self, *lens):
+        a = np.arange(sum(lens), dtype='f8')
+        carrays, start = [], 0
+        for i, n in enumerate(lens):
+            rootdir = None
+            if self.disk:
+                rootdir = "%s-%d" % (self.rootdir, i)
+            carrays.append(ca.carray(a[start:start+n], chunklen=100,
+                                     rootdir=rootdir))
+            start += n
+        return a, carrays
+
+    def test00(self):
+        """Testing `__getitem__()` with integers"""
+        a, carrays = self.getcarrays(1000, 1, 0, 555)
+        v = ca.concat(carrays)
+        self.assert_(len(v) == len(a), "Lengths are not equal")
+        for i in (0, 999, 1000, 1001, 1555, -1):
+            self.assert_(v[i] == a[i], "Values are not equal")
+        self.assertRaises(IndexError, v.__getitem__, 1556)
+
+    def test01(self):
+        """Testing `__getitem__()` with slices"""
+        a, carrays = self.getcarrays(1000, 1, 0, 555)
+        v = ca.concat(carrays)
+        for sl in (slice(None), slice(990, 1010), slice(3, 1500, 7),
+                   slice(1000, 1001), slice(-10, None, 3)):
+            assert_array_equal(v[sl], a[sl], "Arrays are not equal")
+
+    def test02(self):
+        """Testing `iter()`, `where()` and `wheretrue()`"""
+        a, carrays = self.getcarrays(1000, 1, 555)
+        v = ca.concat(carrays)
+        self.assert_(list(v.iter(5, 1200, 3)) == list(a[5:1200:3]),
+                     "iter() does not work well")
+        self.assert_(list(v.iter(5, limit=10, skip=3)) == list(a[8:18]),
+                     "iter() does not work well")
+        b = a % 3 == 0
+        self.assert_(list(v.where(b)) == list(a[b]),
+                     "where() does not work well")
+        self.assert_(list(v.where(ca.carray(b))) == list(a[b]),
+                     "where() does not work well")
+        w = ca.concat([ca.carray(b[:1000]), ca.carray(b[1000:])])
+        self.assert_(list(w.wheretrue()) == list(np.where(b)[0]),
+                     "wheretrue() does not work well")
+
+    def test03(self):
+        """Testing reductions"""
+        a, carrays = self.getcarrays(1000, 1, 555)
+        v = ca.concat(carrays)
+        self.assert_(v.sum() == a.sum(), "sum() does not work well")
+        self.assert_(v.min() == a.min(), "min() does not work well")
+        self.assert_(v.max() == a.max(), "max() does not work well")
+
+    def test03b(self):
+        """Testing `eval()` over several blocks"""
+        a, carrays = self.getcarrays(50000, 1, 35555)
+        v = ca.concat(carrays)
+        for vm in ("python", None):
+            assert_array_equal(ca.eval("v * 2 + 1", vm=vm)[:], a * 2 + 1,
+                               "eval() does not work well")
+
+    def test04(self):
+        """Testing that dtypes must match"""
+        self.assertRaises(TypeError, ca.concat,
+                          [ca.carray(np.arange(10)),
+                           ca.carray(np.arange(10, dtype='f4'))])
+
+
+class concatDiskTest(concatTest):
+    disk = True
+
+    def test05(self):
+        """Testing the persistence of the manifest"""
+        a, carrays = self.getcarrays(1000, 1, 555)
+        v = ca.concat(carrays, rootdir=self.rootdir)
+        v = ca.open(rootdir=self.rootdir, mode='r')
+        self.assert_(isinstance(v, ca.vcarray), "manifest not opened")
+        assert_array_equal(v[:], a, "Arrays are not equal")
+
+
+## Local Variables:
+## mode: python
+## coding: utf-8
+## py-indent-offset: 4
+## tab-with: 4
+## fill-column: 66
+## End:
@@ -11,12 +11,15 @@
 
 import sys
 import os, os.path
+import re
 import glob
 import itertools as it
 import numpy as np
 #import blaze.carray as ca
-from carrayExtension import carray
+from carrayExtension import carray, chunkpool
 from blaze.carray.ctable import ctable
+from blaze.carray.vcarray import vcarray
+from blaze.carray.cview import cview
 from cparams import cparams
 import math
 
@@ -74,7 +77,7 @@ def open(rootdir, mode='a'):
     """
     open(rootdir, mode='a')
 
-    Open a disk-based carray/ctable.
+    Open a disk-based carray/ctable/vcarray.
 
     Parameters
     ----------
@@ -90,7 +93,7 @@ def open(rootdir, mode='a'):
 
     Returns
     -------
-    out : a carray/ctable object or None (if not objects are found)
+    out : a carray/ctable/vcarray object or None (if not objects are found)
 
     """
     # First try with a carray
@@ -102,8 +105,12 @@ def open(rootdir, mode='a'):
         try:
             obj = ctable(rootdir=rootdir, mode=mode)
         except IOError:
-            # Not a ctable
-            pass
+            # Not a ctable.  Now with a vcarray manifest
+            try:
+                obj = vcarray(rootdir=rootdir, mode=mode)
+            except IOError:
+                # Not a vcarray
+                pass
     return obj
 
 def fromiter(iterable, dtype, count, **kwargs):
@@ -115,13 +122,13 @@ def fromiter(iterable, dtype, count, **kwargs):
     Parameters
     ----------
     iterable : iterable object
-        An iterable object providing data for the carray.
+        An iterable object providing data for the carray.  It can yield
+        either items or blocks of items (NumPy arrays or lists).
     dtype : numpy.dtype instance
         Specifies the type of the outcome object.
     count : int
         The number of items to read from iterable. If set to -1, means that
-        the iterable will be used until exhaustion (not recommended, see note
-        below).
+        the iterable will be used until exhaustion.
     kwargs : list of parameters or dictionary
         Any parameter supported by the carray/ctable constructors.
 
@@ -131,33 +138,28 @@ def fromiter(iterable, dtype, count, **kwargs):
 
     Notes
     -----
-    Please specify `count` to both improve performance and to save memory.  It
-    allows `fromiter` to avoid looping the iterable twice (which is slooow).
-    It avoids memory leaks to happen too (which can be important for large
-    iterables).
-    
+    The iterable is consumed one chunk at a time, and the items already
+    appended are not kept around, so streams of unknown length can be
+    ingested in constant memory.  Specifying `count` (or a length hint
+    in the iterable) still helps choosing a good chunk length.
+
     """
     from ctable import ctable
 
-    # Check for a true iterable
-    if not hasattr(iterable, "next"):
-        iterable = iter(iterable)
+    # Work on an iterator ( that is returned as is ), so that items can
+    # be peeked and the rest consumed where it was left
+    iterable = iter(iterable)
 
     # Try to guess the final length
     expected = count
     if count == -1:
         # Try to guess the size of the iterable length
         if hasattr(iterable, "__length_hint__"):
-            count = iterable.__length_hint__()
-            expected = count
+            expected = iterable.__length_hint__()
         else:
             # No guess
-            count = sys.maxint
-            # If we do not have a hint on the iterable length then
-            # create a couple of iterables and use the second when the
-            # first one is exhausted (ValueError will be raised).
-            iterable, iterable2 = it.tee(iterable)
             expected = 1000*1000   # 1 million elements
+        count = sys.maxint
 
     # First, create the container
     expectedlen = kwargs.pop("expectedlen", expected)
@@ -174,30 +176,72 @@ def fromiter(iterable, dtype, count, **kwargs):
                      expectedlen=expectedlen, **kwargs)
         chunklen = obj.chunklen
 
-    # Then fill it
-    nread, blen = 0, 0
+    # Then fill it.  The first item tells whether the iterable yields
+    # items or blocks of them.
+    try:
+        first = iterable.next()
+    except StopIteration:
+        return obj
+    iterable = it.chain([first], iterable)
+    if _isblock(first, dtype):
+        _fill_blocks(obj, iterable, dtype, count, chunklen)
+    else:
+        _fill_items(obj, iterable, dtype, count, chunklen)
+    obj.flush()
+    return obj
+
+def _isblock(item, dtype):
+    """Whether `item` is a block of items of `dtype`."""
+    if isinstance(item, list):
+        return True
+    return (isinstance(item, np.ndarray) and
+            item.ndim > len(dtype.shape))
+
+def _fill_items(obj, iterable, dtype, count, chunklen):
+    """Append the items of `iterable` to `obj`, a chunk at a time."""
+    nread = 0
     while nread < count:
-        if nread + chunklen > count:
-            blen = count - nread
-        else:
-            blen = chunklen
-        if count != sys.maxint:
-            chunk = np.fromiter(iterable, dtype=dtype, count=blen)
-        else:
-            try:
-                chunk = np.fromiter(iterable, dtype=dtype, count=blen)
-            except ValueError:
-                # Positionate in second iterable
-                iter2 = it.islice(iterable2, nread, None, 1)
-                # We are reaching the end, use second iterable now
-                chunk = np.fromiter(iter2, dtype=dtype, count=-1)
+        blen = min(chunklen, count - nread)
+        # `islice` stops short at the end of the iterable, instead of
+        # losing the items read so far
+        chunk = np.fromiter(it.islice(iterable, blen), dtype=dtype, count=-1)
         obj.append(chunk)
         nread += len(chunk)
-        # Check the end of the iterable
-        if len(chunk) < chunklen:
+        if len(chunk) < blen:
             break
-    obj.flush()
-    return obj
+
+def _fill_blocks(obj, iterable, dtype, count, chunklen):
+    """Append the blocks of `iterable` to `obj`, gathering them in a
+    chunk buffer."""
+    if dtype.hasobject:
+        # Pooled buffers are not initialized, which objects need
+        buf = np.empty(chunklen, dtype=dtype)
+    else:
+        buf = chunkpool.borrow(dtype, chunklen)
+    try:
+        nread, nbuf = 0, 0
+        for block in iterable:
+            block = np.asarray(block, dtype=dtype)
+            if block.ndim == len(dtype.shape):
+                # An item alone
+                block = block[np.newaxis]
+            block = block[:count - nread]
+            nread += len(block)
+            while len(block):
+                n = min(chunklen - nbuf, len(block))
+                buf[nbuf:nbuf+n] = block[:n]
+                block = block[n:]
+                nbuf += n
+                if nbuf == chunklen:
+                    obj.append(buf)
+                    nbuf = 0
+            if nread == count:
+                break
+        if nbuf:
+            obj.append(buf[:nbuf])
+    finally:
+        if not dtype.hasobject:
+            chunkpool.giveback(buf)
 
 def fill(shape, dflt=None, dtype=np.float, **kwargs):
     """
@@ -456,6 +500,11 @@ def _getvars(expression, user_dict, depth, vm):
 # Assign function `eval` to a variable because we are overriding it
 _eval = eval
 
+# Scalar reductions of a single variable, like 'sum(a)' or 'a.max()'
+_reduction_re = re.compile(
+    r"^\s*(?:(sum|min|max)\(\s*([A-Za-z_]\w*)\s*\)|"
+    r"([A-Za-z_]\w*)\.(sum|min|max)\(\s*\))\s*$")
+
 def eval(expression, vm=None, out_flavor=None, user_dict={}, **kwargs):
     """
     eval(expression, vm=None, out_flavor=None, user_dict=None, **kwargs)
@@ -502,6 +551,15 @@ def eval(expression, vm=None, out_flavor=None, user_dict={}, **kwargs):
     depth = kwargs.pop('depth', 2)
     vars = _getvars(expression, user_dict, depth, vm=vm)
 
+    # Reductions over a carray are resolved in the compressed domain
+    # (i.e. using the partial aggregates of its chunks)
+    match = _reduction_re.match(expression)
+    if match is not None:
+        func, name, name2, func2 = match.groups()
+        var = vars.get(name or name2)
+        if isinstance(var, (carray, vcarray, cview)):
+            return getattr(var, func or func2)()
+
     # Gather info about sizes and lengths
     typesize, vlen = 0, 1
     for name in vars.iterkeys():
@@ -513,7 +571,7 @@ def eval(expression, vm=None, out_flavor=None, user_dict={}, **kwargs):
         if hasattr(var, "dtype"):  # numpy/carray arrays
             if isinstance(var, np.ndarray):  # numpy array
                 typesize += var.dtype.itemsize * np.prod(var.shape[1:])
-            elif isinstance(var, ca.carray):  # carray array
+            elif isinstance(var, (carray, vcarray, cview)):  # (virtual) carray
                 typesize += var.dtype.itemsize
             else:
                 raise ValueError, "only numpy/carray objects supported"
@@ -558,7 +616,8 @@ def _eval_blocks(expression, vars, vlen, typesize, vm, out_flavor,
         bsize = 1
 
     vars_ = {}
-    # Get temporaries for vars
+    # Get temporaries for vars, borrowed from the pool of chunk buffers
+    borrowed = {}
     maxndims = 0
     for name in vars.iterkeys():
         var = vars[name]
@@ -567,15 +626,35 @@ def _eval_blocks(expression, vars, vlen, typesize, vm, out_flavor,
             if ndims > maxndims:
                 maxndims = ndims
             if len(var) > bsize and hasattr(var, "_getrange"):
-                vars_[name] = np.empty(bsize, dtype=var.dtype)
+                borrowed[name] = chunkpool.borrow(var.dtype, bsize)
+    try:
+        result = _eval_loop(expression, vars, vars_, borrowed, vlen, bsize,
+                            maxndims, vm, out_flavor, **kwargs)
+    finally:
+        for buf in borrowed.itervalues():
+            chunkpool.giveback(buf)
 
+    if isinstance(result, ca.carray):
+        result.flush()
+    return result
+
+def _eval_loop(expression, vars, vars_, borrowed, vlen, bsize, maxndims,
+               vm, out_flavor, **kwargs):
+    """Evaluate the blocks, reading the carrays into `borrowed`."""
     for i in xrange(0, vlen, bsize):
         # Get buffers for vars
         for name in vars.iterkeys():
             var = vars[name]
             if hasattr(var, "__len__") and len(var) > bsize:
                 if hasattr(var, "_getrange"):
-                    if i+bsize < vlen:
+                    # Blocks of uncompressed chunks are used in place
+                    view = None
+                    if hasattr(var, "_viewrange"):
+                        view = var._viewrange(i, min(bsize, vlen-i))
+                    if view is not None:
+                        vars_[name] = view
+                    elif i+bsize < vlen:
+                        vars_[name] = borrowed[name]
                         var._getrange(i, bsize, vars_[name])
                     else:
                         vars_[name] = var[i:]
@@ -586,6 +665,9 @@ def _eval_blocks(expression, vars, vlen, typesize, vm, out_flavor,
                     vars_[name] = var[:]
                 else:
                     vars_[name] = var
+            if isinstance(vars_[name], cview):
+                # Slicing a view returns another (lazy) view
+                vars_[name] = vars_[name].materialize()
 
         # Perform the evaluation for this block
         if vm == "python":
@@ -603,7 +685,8 @@ def _eval_blocks(expression, vars, vlen, typesize, vm, out_flavor,
                 continue
             elif len(res_block.shape) < maxndims:
                 dim_reduction = True
-                result = res_block
+                # The block may be one of the borrowed buffers
+                result = res_block.copy()
                 continue
             # Get a decent default for expectedlen
             if out_flavor == "carray":
@@ -622,8 +705,6 @@ def _eval_blocks(expression, vars, vlen, typesize, vm, out_flavor,
             else:
                 result[i:i+bsize] = res_block
 
-    if isinstance(result, ca.carray):
-        result.flush()
     if scalar:
         return result[()]
     return result
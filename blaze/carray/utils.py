@@ -126,6 +126,41 @@ def to_ndarray(array, dtype, arrlen=None):
 
     return array
 
+# The unsigned int views and mantissa bits for each float size
+_float_layouts = {
+    2: (np.uint16, 10),
+    4: (np.uint32, 23),
+    8: (np.uint64, 52),
+    }
+
+def trim_precision(array, precision):
+    """Zero the mantissa bits of `array` not needed for `precision` digits.
+
+    Only floating point arrays are trimmed, the rest are returned as is.
+    A new array is returned, so `array` is never modified in place.
+    """
+    if precision is None or array.dtype.base.kind != 'f':
+        return array
+    if array.dtype.base.itemsize not in _float_layouts:
+        return array
+    utype, mbits = _float_layouts[array.dtype.base.itemsize]
+    # Bits needed for representing `precision` decimal digits
+    keepbits = int(math.ceil(precision * math.log(10, 2)))
+    if keepbits >= mbits:
+        return array
+
+    # Arrays with a 0 stride are special: just trim its only value
+    if len(array.shape) > 0 and array.strides[0] == 0:
+        value = trim_precision(array[:1].copy(), precision)
+        return np.ndarray(array.shape, dtype=array.dtype, buffer=value,
+                          strides=array.strides)
+
+    mask = ~utype((1 << (mbits - keepbits)) - 1)
+    array = np.array(array, dtype=array.dtype.base)
+    iarray = array.view(utype)
+    iarray &= mask
+    return array
+
 def human_readable_size(size):
     """Return a string for better assessing large number of bytes."""
     if size < 2**10:
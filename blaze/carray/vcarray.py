@@ -0,0 +1,426 @@
+"""
+vcarray
+
+Virtual concatenation of carrays (no data is copied)
+"""
+
+import os, os.path
+import json
+import itertools as it
+from bisect import bisect_right
+
+import numpy as np
+
+from carrayExtension import carray
+from cview import cview
+import utils
+
+MANIFEST = '__concat__'
+
+def concat(carrays, rootdir=None, mode='a'):
+    """
+    concat(carrays, rootdir=None, mode='a')
+
+    Concatenate `carrays` into a single virtual carray.
+
+    Parameters
+    ----------
+    carrays : list or tuple of carray objects
+        The carrays to be concatenated (in order).  All of them must
+        have the same dtype and trailing dimensions.
+    rootdir : str, optional
+        If specified, a manifest referencing the (persistent) carrays is
+        saved in this directory, so that the concatenation can be
+        restored in other session via the `open()` top-level function.
+    mode : str, optional
+        The mode in which the manifest is created.  See `vcarray`.
+
+    Returns
+    -------
+    out : vcarray object
+        A virtual carray.  No data is copied during the concatenation.
+
+    """
+    return vcarray(carrays, rootdir=rootdir, mode=mode)
+
+
+class vcarray(object):
+    """
+    vcarray(carrays=None, rootdir=None, mode='a')
+
+    A read-only virtual carray made of a sequence of carrays.
+
+    The elements of the underlying carrays are accessed through a
+    partition index (the offset of each carray in the virtual array),
+    so no data is ever copied.
+
+    Parameters
+    ----------
+    carrays : list or tuple of carray objects
+        The carrays to be concatenated.  If None, the vcarray is opened
+        from the manifest in `rootdir`.
+    rootdir : str, optional
+        The directory hosting the manifest of the concatenation.
+    mode : str, optional
+        The mode that the underlying carrays should be opened with, or
+        'w' for overwriting an existing manifest.
+
+    """
+
+    @property
+    def carrays(self):
+        "The underlying carrays (list)."
+        return self._carrays
+
+    @property
+    def dtype(self):
+        "The dtype of this object."
+        return self._carrays[0].dtype
+
+    @property
+    def len(self):
+        "The length (leading dimension) of this object."
+        return self.offsets[-1]
+
+    @property
+    def nbytes(self):
+        "The original (uncompressed) size of this object (in bytes)."
+        return sum(c.nbytes for c in self._carrays)
+
+    @property
+    def cbytes(self):
+        "The compressed size of this object (in bytes)."
+        return sum(c.cbytes for c in self._carrays)
+
+    @property
+    def ndim(self):
+        "The number of dimensions of this object."
+        return len(self.shape)
+
+    @property
+    def shape(self):
+        "The shape of this object."
+        return (self.len,) + self._carrays[0].shape[1:]
+
+    @property
+    def size(self):
+        "The size of this object."
+        return np.prod(self.shape)
+
+    def __init__(self, carrays=None, rootdir=None, mode='a'):
+        self.rootdir = rootdir
+        "The directory where the manifest of this object is saved."
+        self.mode = mode
+        "The mode in which the object is created/opened."
+
+        if carrays is not None:
+            self.create_vcarray(carrays)
+        else:
+            self.open_vcarray()
+
+    def create_vcarray(self, carrays):
+        """Create a new vcarray out of `carrays`."""
+        carrays = list(carrays)
+        if len(carrays) == 0:
+            raise ValueError, "`carrays` cannot be empty"
+        for c in carrays:
+            if not isinstance(c, carray):
+                raise ValueError, "only carray objects can be concatenated"
+            if c.dtype != carrays[0].dtype:
+                raise TypeError, "all the carrays must have the same dtype"
+            if c.shape[1:] != carrays[0].shape[1:]:
+                raise ValueError, \
+                      "all the carrays must have the same trailing dimensions"
+        self._carrays = carrays
+        self._update_offsets()
+
+        if self.rootdir:
+            self.write_manifest()
+
+    def open_vcarray(self):
+        """Open an existing vcarray via its manifest."""
+        if self.rootdir is None:
+            raise ValueError(
+                "you need to pass either a `carrays` or a `rootdir` param")
+        manifest = os.path.join(self.rootdir, MANIFEST)
+        with open(manifest, 'rb') as mfile:
+            data = json.loads(mfile.read())
+        mode = self.mode if self.mode != 'w' else 'a'
+        self._carrays = [carray(rootdir=str(dir_), mode=mode)
+                         for dir_ in data['dirs']]
+        self._update_offsets()
+
+    def write_manifest(self):
+        """Write the manifest with the rootdirs of the underlying carrays."""
+        dirs = [c.rootdir for c in self._carrays]
+        if None in dirs:
+            raise ValueError, \
+                  "only persistent carrays can be saved in a manifest"
+        if os.path.exists(self.rootdir):
+            if self.mode != "w":
+                raise RuntimeError(
+                    "specified rootdir path '%s' already exists "
+                    "and creation mode is '%s'" % (self.rootdir, self.mode))
+        else:
+            os.mkdir(self.rootdir)
+        manifest = os.path.join(self.rootdir, MANIFEST)
+        with open(manifest, 'wb') as mfile:
+            mfile.write(json.dumps({'dirs': dirs}))
+            mfile.write("\n")
+
+    def _update_offsets(self):
+        """Build the partition index (the offsets of every carray)."""
+        self.offsets = [0]
+        for c in self._carrays:
+            self.offsets.append(self.offsets[-1] + len(c))
+
+    def _partitions(self, start, stop, step):
+        """Iterate over the (carray, offset, lstart, lstop) partitions
+        intersecting the `start`, `stop`, `step` range."""
+        for i, c in enumerate(self._carrays):
+            offset, end = self.offsets[i], self.offsets[i+1]
+            if end <= start or offset >= stop:
+                continue
+            # Align the local start with the step
+            if start >= offset:
+                lstart = start - offset
+            else:
+                lstart = (step - (offset - start) % step) % step
+            lstop = min(stop, end) - offset
+            if lstart < lstop:
+                yield c, offset, lstart, lstop
+
+    def __len__(self):
+        return self.len
+
+    def __sizeof__(self):
+        return self.cbytes
+
+    def __getitem__(self, key):
+        """
+        x.__getitem__(key) <==> x[key]
+
+        Returns values based on `key`.  Integers, slices (with positive
+        steps), n-dimensional keys and fancy indexing are supported, as
+        in `carray.__getitem__()`.
+
+        """
+
+        # Check for integer
+        if isinstance(key, (int, long, np.integer)):
+            if key < 0:
+                # To support negative values
+                key += self.len
+            if key < 0 or key >= self.len:
+                raise IndexError, "index out of range"
+            i = bisect_right(self.offsets, key) - 1
+            return self._carrays[i][key - self.offsets[i]]
+        # Slices
+        elif isinstance(key, slice):
+            (start, stop, step) = key.start, key.stop, key.step
+            if step and step <= 0 :
+                raise NotImplementedError("step in slice can only be positive")
+        # Multidimensional keys
+        elif isinstance(key, tuple):
+            if len(key) == 0:
+                raise ValueError("empty tuple not supported")
+            elif len(key) == 1:
+                return self[key[0]]
+            arr = self[key[0]]
+            if type(key[0]) == slice:
+                arr = arr[(slice(None),) + key[1:]]
+            else:
+                arr = arr[key[1:]]
+            if not arr.flags.contiguous:
+                arr = arr.copy()
+            return arr
+        # List of integers (case of fancy indexing)
+        elif isinstance(key, list):
+            try:
+                key = np.array(key, dtype=np.int_)
+            except:
+                raise IndexError, "key cannot be converted to an array of indices"
+            return self[key]
+        # A boolean or integer array (case of fancy indexing)
+        elif hasattr(key, "dtype"):
+            if key.dtype.type == np.bool_:
+                if len(key) != self.len:
+                    raise IndexError, "boolean array length must match len(self)"
+                return np.fromiter(self.where(key), dtype=self.dtype)
+            elif np.issubsctype(key, np.int_):
+                return np.array([self[i] for i in key], dtype=self.dtype)
+            else:
+                raise IndexError, \
+                      "arrays used as indices must be of integer (or boolean) type"
+        # All the rest not implemented
+        else:
+            raise NotImplementedError, "key not supported: %s" % repr(key)
+
+        # From now on, will only deal with [start:stop:step] slices
+        (start, stop, step) = slice(start, stop, step).indices(self.len)
+        blen = utils.get_len_of_range(start, stop, step)
+        arr = np.empty(shape=(blen,)+self.shape[1:], dtype=self.dtype)
+        nwrow = 0
+        for c, offset, lstart, lstop in self._partitions(start, stop, step):
+            block = c[lstart:lstop:step]
+            arr[nwrow:nwrow+len(block)] = block
+            nwrow += len(block)
+        assert nwrow == blen
+        return arr
+
+    def __setitem__(self, key, value):
+        raise RuntimeError, "vcarray objects are read-only"
+
+    def view(self, start=0, stop=None, step=1):
+        """
+        view(start=0, stop=None, step=1)
+
+        Return a lazy view of the [start:stop:step] range of this object.
+
+        See Also
+        --------
+        carray.view
+
+        """
+        return cview(self, start, stop, step)
+
+    # This is a private function that is specific for `eval`
+    def _getrange(self, start, blen, out):
+        stop = min(start + blen, self.len)
+        nwrow = 0
+        for c, offset, lstart, lstop in self._partitions(start, stop, 1):
+            cblen = lstop - lstart
+            c._getrange(lstart, cblen, out[nwrow:nwrow+cblen])
+            nwrow += cblen
+
+    def __iter__(self):
+        return self.iter()
+
+    def iter(self, start=0, stop=None, step=1, limit=None, skip=0):
+        """
+        iter(start=0, stop=None, step=1, limit=None, skip=0)
+
+        Iterator with `start`, `stop` and `step` bounds.
+
+        See Also
+        --------
+        carray.iter
+
+        """
+        if step <= 0:
+            raise NotImplementedError, "step param can only be positive"
+        start, stop, step = slice(start, stop, step).indices(self.len)
+        # The carray iterators are created lazily, as they keep state
+        iters = (c.iter(lstart, lstop, step) for c, offset, lstart, lstop
+                 in self._partitions(start, stop, step))
+        return self._limit(it.chain.from_iterable(iters), limit, skip)
+
+    def wheretrue(self, limit=None, skip=0):
+        """
+        wheretrue(limit=None, skip=0)
+
+        Iterator that returns indices where this object is true.
+
+        See Also
+        --------
+        carray.wheretrue
+
+        """
+        iters = (it.imap(offset.__add__, c.wheretrue())
+                 for c, offset in zip(self._carrays, self.offsets))
+        return self._limit(it.chain.from_iterable(iters), limit, skip)
+
+    def where(self, boolarr, limit=None, skip=0):
+        """
+        where(boolarr, limit=None, skip=0)
+
+        Iterator that returns values of this object where `boolarr` is true.
+
+        See Also
+        --------
+        carray.where
+
+        """
+        if not hasattr(boolarr, "dtype"):
+            raise ValueError, "`boolarr` is not an array"
+        if boolarr.dtype.type != np.bool_:
+            raise ValueError, "`boolarr` is not an array of booleans"
+        if len(boolarr) != self.len:
+            raise ValueError, "`boolarr` must be of the same length than ``self``"
+        if isinstance(boolarr, vcarray) and boolarr.offsets == self.offsets:
+            # Aligned partitions
+            bools = boolarr.carrays
+        else:
+            bools = (boolarr[self.offsets[i]:self.offsets[i+1]]
+                     for i in xrange(len(self._carrays)))
+        iters = (c.where(b) for c, b in zip(self._carrays, bools))
+        return self._limit(it.chain.from_iterable(iters), limit, skip)
+
+    def _limit(self, iterable, limit, skip):
+        """Apply the `limit` and `skip` params to `iterable`."""
+        if limit is not None:
+            limit += skip
+        return it.islice(iterable, skip, limit)
+
+    def sum(self, dtype=None):
+        """
+        sum(dtype=None)
+
+        Return the sum of the array elements.
+
+        See Also
+        --------
+        carray.sum
+
+        """
+        sums = [c.sum(dtype=dtype) for c in self._carrays]
+        result = np.zeros(1, dtype=sums[0].dtype)[0]
+        for s in sums:
+            result += s
+        return result
+
+    def min(self):
+        """
+        min()
+
+        Return the minimum of the array elements.
+
+        """
+        return np.min([c.min() for c in self._carrays if len(c) > 0])
+
+    def max(self):
+        """
+        max()
+
+        Return the maximum of the array elements.
+
+        """
+        return np.max([c.max() for c in self._carrays if len(c) > 0])
+
+    def flush(self):
+        """Flush data in internal buffers to disk (a no-op for vcarrays)."""
+        pass
+
+    def __str__(self):
+        return str(self[:])
+
+    def __repr__(self):
+        snbytes = utils.human_readable_size(self.nbytes)
+        scbytes = utils.human_readable_size(self.cbytes)
+        cratio = self.nbytes / float(self.cbytes)
+        header = "vcarray(%s, %s)\n" % (self.shape, self.dtype)
+        header += "  nbytes: %s; cbytes: %s; ratio: %.2f\n" % (
+            snbytes, scbytes, cratio)
+        header += "  partitions := %d\n" % len(self._carrays)
+        if self.rootdir:
+            header += "  rootdir := '%s'\n" % self.rootdir
+        fullrepr = header + str(self)
+        return fullrepr
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 78
+## End:
@@ -437,9 +437,19 @@ class SourceGenerator(NodeVisitor):
         self.write('}')
 
     def visit_BinOp(self, node):
-        self.visit(node.left)
+        self.visit_operand(node.left)
         self.write(' %s ' % BINOP_SYMBOLS[type(node.op)])
-        self.visit(node.right)
+        self.visit_operand(node.right)
+
+    def visit_operand(self, node):
+        # Nested operations keep their parentheses, the precedence is
+        # not tracked
+        if isinstance(node, BinOp):
+            self.write('(')
+            self.visit(node)
+            self.write(')')
+        else:
+            self.visit(node)
 
     def visit_BoolOp(self, node):
         self.write('(')
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
+import re
 import ast
+import itertools
 from _ast import AST
 
 from blirgen import *
@@ -15,6 +17,9 @@ IN    = 0
 OUT   = 1
 INOUT = 2
 
+class FusionError(Exception):
+    """ The kernels cannot be fused into a single loop nest. """
+
 class Kernel(object):
 
     def __init__(self):
@@ -22,7 +27,12 @@ class Kernel(object):
 
     @property
     def dimensions(self):
-        raise NotImplementedError
+        # assuming this is verified...
+        for varg in self.ins:
+            if isinstance(varg, VectorArg):
+                for dim in varg.shape:
+                    yield (0, dim)
+                break
 
     @property
     def retty(self):
@@ -44,11 +54,27 @@ class Kernel(object):
     def argtys(self):
         return [arg.ty for arg in self.ins]
 
+    @property
+    def params(self):
+        """ The parameters of the kernel function, inputs first. """
+        return self.ins + [a for a in self.outs if not _contains(self.ins, a)]
+
+    @property
+    def temporaries(self):
+        """ Arguments held in registers instead of memory. """
+        return []
+
     def compile(self, **opts):
         """ Compile the kernel into native code. """
         from blaze.blir import compile
         return compile(str(self), **opts)
 
+    def load(self, **opts):
+        """ Compile the kernel into native code, going through the BLIR
+        compilation cache, and return a module with the bound kernel. """
+        from blaze.blir import load_module
+        return load_module(str(self), **opts)
+
     def verify(self):
         """ Verify the kernel is well-formed before compilation. """
         shape = None
@@ -68,6 +94,69 @@ class Kernel(object):
         else:
             raise NotImplementedError
 
+    def body(self, names, fresh):
+        """
+        The loop nest of the kernel, as a tuple of:
+
+            * declarations to place before the loops
+            * statements executed for every element
+            * the value returned after the loops, or None
+
+        ``names`` maps the arguments to their names, and ``fresh`` makes
+        up the names of new variables.
+        """
+        raise NotImplementedError
+
+    def __str__(self):
+        source = getattr(self, '_source', None)
+        if source is None:
+            source = self._source = self.emit()
+        return source
+
+    def emit(self):
+        names = {}
+        for arg in self.params:
+            if arg.name:
+                names[arg] = arg.name
+            else:
+                names[arg] = anon('in' if _contains(self.ins, arg) else 'out')
+
+        decls = []
+        for i, arg in enumerate(self.temporaries):
+            names[arg] = 'tmp%d' % i
+            decls.append(VarDecl(arg.eltype, names[arg], _zero(arg.eltype)))
+
+        counter = itertools.count()
+        fresh = lambda prefix: '%s%d' % (prefix, next(counter))
+
+        extra, stmts, retval = self.body(names, fresh)
+        decls.extend(extra)
+
+        inner = Block([Logic(stmt) for stmt in stmts])
+
+        # Loops
+        # -----
+        ivars = []
+        for icount, (lower, upper) in enumerate(self.dimensions):
+            ivar = 'i%s' % icount
+            ivars.append(VarDecl('int', ivar, 0))
+            inner = For(ivar, Range(lower, upper), Block([inner]))
+
+        # Return
+        # ------
+        ret = [Return(retval)] if retval is not None else []
+
+        # Kernel Body
+        body = Block(decls + ivars + [inner] + ret)
+
+        fn = FuncDef(
+            name = self.name or anon('kernel'),
+            args = [Arg(arg.ty, names[arg]) for arg in self.params],
+            ret  = self.retty,
+            body = body,
+        )
+        return str(fn)
+
 
 class Logic(AST):
     """
@@ -100,6 +189,38 @@ class VectorArg(object):
         self.name = name
         self.shape = shape
 
+    @property
+    def eltype(self):
+        """ The type of the elements, ``float`` for ``array[float]``. """
+        match = re.match(r'array\[(\w+)\]', self.ty)
+        return match.group(1) if match else self.ty
+
+def _contains(args, arg):
+    return any(a is arg for a in args)
+
+def _zero(ty):
+    return '0.0' if ty in ('float', 'double') else '0'
+
+#------------------------------------------------------------------------
+# Expressions
+#------------------------------------------------------------------------
+
+# Operations refer to the inputs and outputs of the kernel as _in0,
+# _in1, ... and _out0, _out1, ...
+_placeholders = re.compile(r'\b_(in|out)(\d+)\b')
+
+def substitute(kernel, expr, names):
+    """ Replace the placeholders in ``expr`` by the argument names. """
+    def name(match):
+        args = kernel.ins if match.group(1) == 'in' else kernel.outs
+        return names[args[int(match.group(2))]]
+    return _placeholders.sub(name, expr)
+
+def combine(expr, a, b):
+    """ Plug ``a`` and ``b`` in a binary expression like ``a+b``. """
+    values = {'a': a, 'b': '(%s)' % b}
+    return re.sub(r'\b[ab]\b', lambda match: values[match.group()], expr)
+
 #------------------------------------------------------------------------
 # Kernels
 #------------------------------------------------------------------------
@@ -125,109 +246,83 @@ class ElementwiseKernel(Kernel):
     def retval(self):
         return None
 
-    @property
-    def dimensions(self):
-        # assuming this is verified...
-        for varg in self.ins:
-            if isinstance(varg, VectorArg):
-                for dim in varg.shape:
-                    yield (0, dim)
-                break
-
-    def __str__(self):
-        if hasattr(self, '__cached'):
-            return self.__cached
+    def body(self, names, fresh):
+        return [], [substitute(self, self.operation, names)], None
 
-        ivars = {}
-        icount = 0
 
-        ins    = {}
-        outs   = {}
-        params = []
-
-        _operation = self.operation
+class ZipKernel(ElementwiseKernel):
+    """
+    Combine the elements of two or more inputs, ``_out0[i0] = f(_in0[i0],
+    _in1[i0])``.
+    """
 
-        # Preamble
-        # --------
-        for i, arg in enumerate(self.ins):
-            name = arg.name or anon('in')
-            param = Arg(arg.ty, name)
-            params.append(param)
-            ins[i] = param
+    def __init__(self, arguments, operation, name=None):
+        super(ZipKernel, self).__init__(arguments, operation, name)
+        if len([a for a in self.ins if isinstance(a, VectorArg)]) < 2:
+            raise ValueError("zip kernels take at least two input vectors")
 
-            _operation = _operation.replace('_in%i' % i, name)
 
-        for i, arg in enumerate(self.outs):
-            name = arg.name or anon('out')
-            param = Arg(arg.ty, name)
-            params.append(param)
-            outs[i] = param
+class ReductionKernel(Kernel):
+    """
+    Reduce the elements given by ``map_expr`` with ``reduce_expr``, a
+    binary operation of ``a`` and ``b``, starting from ``neutral``.
 
-            _operation = _operation.replace('_out%s' % i, name)
+    ::
 
-        inner = Logic(_operation)
+        ReductionKernel('float', '0.0', 'a+b', '_in0[i0]*_in1[i0]', args)
+    """
 
-        # Loops
-        # -----
-        for lower, upper in self.dimensions:
-            ivar = 'i%s' % icount
-            ivars[ivar] = VarDecl('int', ivar, 0)
+    def __init__(self, retty, neutral, reduce_expr, map_expr, arguments, name=None):
+        self._retty = retty
+        self.neutral = neutral
+        self.reduce_expr = reduce_expr
+        self.map_expr = map_expr
+        self.arguments = arguments
+        self.name = name
 
-            inner = For(ivar, Range(lower, upper), Block([inner]))
-            icount += 1
+    @property
+    def retty(self):
+        return self._retty
 
-        # Return
-        # ------
-        # always void for elemwise
-        ret = []
+    def body(self, names, fresh):
+        acc = fresh('acc')
+        value = substitute(self, self.map_expr, names)
+        update = '%s = %s' % (acc, combine(self.reduce_expr, acc, value))
+        return [VarDecl(self.retty, acc, self.neutral)], [update], acc
 
-        # Kernel Body
-        decls = ivars.values()
-        body = Block(decls + [inner] + ret)
 
-        fn = FuncDef(
-            name = self.name or anon('kernel'),
-            args = params,
-            ret  = self.retty,
-            body = body,
-        )
+class ScanKernel(Kernel):
+    """
+    Inclusive scan of the elements given by ``input_expr`` with
+    ``scan_expr``, a binary operation of ``a`` and ``b``, starting from
+    ``neutral``. ``output_statement`` stores the running value ``item``.
 
-        self.__cached = str(fn)
-        return self.__cached
+    ::
 
+        ScanKernel('float', args, 'a+b', '0.0', '_out0[i0] = item')
+    """
 
-class ZipKernel(Kernel):
-    def __init__(self, arguments, operation, name=None):
+    def __init__(self, ty, arguments, scan_expr, neutral, output_statement,
+                 name=None, input_expr='_in0[i0]'):
+        self.ty = ty
         self.arguments = arguments
-        self.operation = operation
-
-    def __str__(self):
-        # TODO
-        raise NotImplementedError
-
-
-class ReductionKernel(Kernel):
-    def __init__(self, retty, neutral, reduce_expr, map_expr, arguments, name=None):
-        self.retty = retty
-        self.neutral = neutral
-        self.reduce_expr = reduce_epxr
-        self.map_expr = map_expr
-
-    def __str__(self):
-        # TODO
-        raise NotImplementedError
-
-
-class ScanKernel(Kernel):
-    def __init__(self, retty, arguments, scan_expr, neutral, output_statement, name=None):
-        self.retty = retty
         self.neutral = neutral
         self.scan_expr = scan_expr
+        self.input_expr = input_expr
         self.output_statement = output_statement
+        self.name = name
 
-    def __str__(self):
-        # TODO
-        raise NotImplementedError
+    @property
+    def retty(self):
+        return 'void'
+
+    def body(self, names, fresh):
+        acc = fresh('acc')
+        value = substitute(self, self.input_expr, names)
+        update = '%s = %s' % (acc, combine(self.scan_expr, acc, value))
+        output = re.sub(r'\bitem\b', acc,
+                        substitute(self, self.output_statement, names))
+        return [VarDecl(self.ty, acc, self.neutral)], [update, output], None
 
 
 class OuterKernel(Kernel):
@@ -245,16 +340,120 @@ class OuterKernel(Kernel):
 # Kernel Fusion
 #------------------------------------------------------------------------
 
-# Naive kernel fusion
+class FusedKernel(Kernel):
+    """
+    Two kernels running in a single loop nest, the ``producer`` first
+    and then the ``consumer`` for every element.
 
-def fuse(k1, k2):
-    kty1 = k1.__class__
-    kty2 = k2.__class__
+    The outputs of the producer read by the consumer are intermediates:
+    they are held in registers and never written to memory, so they do
+    not appear in the arguments of the fused kernel.
+    """
+
+    def __init__(self, producer, consumer, name=None):
+        self.producer = producer
+        self.consumer = consumer
+        self.name = name
+
+        if list(producer.dimensions) != list(consumer.dimensions):
+            raise FusionError("kernels with different dimensions")
+        if producer.retty != 'void':
+            raise FusionError("a reduction can only be fused as the last "
+                              "kernel")
+
+        # IN in the consumer, OUT ( not INOUT ) in the producer
+        written = [a for i,a in producer.arguments if i == OUT]
+        consumer_ins = [a for i,a in consumer.arguments if i == IN]
+        self.intermediates = [a for a in written if _contains(consumer_ins, a)]
+
+        for arg in self.intermediates:
+            if not isinstance(arg, VectorArg):
+                raise FusionError("only vectors can be held in registers")
+
+        # Merge the argument roles, the same argument used by both
+        # kernels appears once
+        internal = self.temporaries
+        roles = []
+        for i, arg in producer.arguments + consumer.arguments:
+            if _contains(internal, arg):
+                continue
+            for n, a in enumerate(roles):
+                if a[1] is arg:
+                    if a[0] != i:
+                        roles[n] = (INOUT, arg)
+                    break
+            else:
+                roles.append((i, arg))
+        self.arguments = roles
+
+        # Try the substitutions, to refuse intermediates that are not
+        # accessed elementwise
+        names = dict((arg, '_arg%d' % n) for n, arg in
+                     enumerate(self.params + internal))
+        self.body(names, lambda prefix: prefix)
+
+    @property
+    def dimensions(self):
+        return self.producer.dimensions
+
+    @property
+    def retty(self):
+        return self.consumer.retty
+
+    @property
+    def temporaries(self):
+        return (self.producer.temporaries + self.consumer.temporaries +
+                self.intermediates)
+
+    def verify(self):
+        shape = None
+
+        # uniform dimensions
+        for varg in self.params + self.temporaries:
+            if isinstance(varg, VectorArg):
+                if not shape:
+                    shape = varg.shape
+                assert varg.shape == shape
+        return self.producer.verify() and self.consumer.verify()
 
-    if kty1 == ElementwiseKernel and kty2 == ElementwiseKernel:
-        return ElementwiseKernel(k1.arguments + k2.arguments, k1.operation)
+    def body(self, names, fresh):
+        decls1, stmts1, _ = self.producer.body(names, fresh)
+        decls2, stmts2, retval = self.consumer.body(names, fresh)
+
+        stmts = stmts1 + stmts2
+        for arg in self.temporaries:
+            stmts = registerize(stmts, names[arg])
+        return decls1 + decls2, stmts, retval
+
+def registerize(stmts, name):
+    """ Turn the element accesses ``name[...]`` into a scalar ``name``. """
+    access = re.compile(r'\b%s\[([^\]]*)\]' % re.escape(name))
+
+    indices = set()
+    for stmt in stmts:
+        indices.update(index.replace(' ', '') for index in access.findall(stmt))
+    if len(indices) > 1:
+        raise FusionError("intermediate accessed at different indices: %s" %
+                          ', '.join(sorted(indices)))
+    return [access.sub(name, stmt) for stmt in stmts]
+
+def fuse(k1, k2):
+    """
+    Fuse two kernels into one loop nest, with the outputs of ``k1``
+    consumed by ``k2`` held in registers. Raises FusionError if the
+    kernels do not iterate over the same dimensions.
+    """
+    fusable = (ElementwiseKernel, ReductionKernel, ScanKernel, FusedKernel)
+    if isinstance(k1, fusable) and isinstance(k2, fusable):
+        return FusedKernel(k1, k2)
     else:
         raise NotImplementedError
 
 def compose(k1, k2):
-    raise NotImplementedError
+    """
+    Like ``fuse``, but ``k2`` must consume some output of ``k1``.
+    """
+    fused = fuse(k1, k2)
+    if not fused.intermediates:
+        raise FusionError("the kernels do not share any intermediate")
+    return fused
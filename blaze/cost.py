@@ -0,0 +1,308 @@
+"""
+Cost model of the dispatched implementations.
+
+Implementations declare the cost of an application as a formula over the
+operands it is applied to: their size, whether they live in memory or in
+a carray on disk, and how they are compressed. The formulas are in
+seconds and are evaluated with constants measured on the host::
+
+    @lift('Add(<term>,<term>)', '(a,a) -> a', {}, cost=InMemory(flops=1))
+    def add(a, b):
+        return np.add(a, b)
+
+The constants are measured by a short benchmark the first time a cost is
+estimated over actual operands, and stored in ``~/.blaze/costs.json`` ( ``$BLAZE_COSTS`` if set,
+an empty ``$BLAZE_COSTS`` keeps them in memory only ), so every host is
+calibrated once. ``calibrate()`` measures them again.
+"""
+
+import os
+import json
+import time
+import errno
+import platform
+import tempfile
+
+import numpy as np
+
+from blaze import carray as ca
+
+# Bump this whenever the constants or the benchmarks change
+COSTS_VERSION = 1
+
+# The length of the arrays the benchmarks run on
+CALIBRATION_LENGTH = 2**20
+
+# Used when the benchmarks cannot be run ( seconds per byte or element )
+DEFAULTS = {
+    'call'       : 5e-6,    # fixed cost of an application
+    'flop'       : 1e-9,    # per element and operation
+    'memory'     : 2e-10,   # per byte moved through memory
+    'disk'       : 5e-9,    # per byte read from disk
+    'compress'   : 2e-9,    # per byte compressed
+    'decompress' : 5e-10,   # per byte decompressed
+    'chunk'      : 2e-5,    # per chunk of an out-of-core loop
+    'ram'        : 2**31,   # bytes of physical memory
+}
+
+def default_path():
+    path = os.environ.get('BLAZE_COSTS')
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'), '.blaze', 'costs.json')
+    return path or None
+
+#------------------------------------------------------------------------
+# Calibration
+#------------------------------------------------------------------------
+
+def best(fn, repeat=3):
+    """ The best wall time of ``repeat`` calls of ``fn``. """
+    times = []
+    for i in xrange(repeat):
+        start = time.time()
+        fn()
+        times.append(time.time() - start)
+    return max(min(times), 1e-9)
+
+def physical_memory():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return DEFAULTS['ram']
+
+def measure(n=CALIBRATION_LENGTH):
+    """ Run the benchmarks, return the constants of the host. """
+    a = np.arange(n, dtype=np.float64)
+    b = np.empty_like(a)
+    nbytes = a.nbytes
+    tiny = a[:1]
+
+    constants = dict(DEFAULTS)
+    constants['ram'] = physical_memory()
+
+    calls = best(lambda: [np.add(tiny, tiny) for i in xrange(100)])
+    constants['call'] = calls / 100
+
+    def copy():
+        b[:] = a
+    constants['memory'] = best(copy) / (2 * nbytes)
+    flop = best(lambda: np.add(a, a, b)) - 3 * nbytes * constants['memory']
+    constants['flop'] = max(flop / n, 1e-12)
+
+    c = ca.carray(a)
+    constants['compress'] = best(lambda: ca.carray(a)) / nbytes
+    constants['decompress'] = best(lambda: c[:]) / nbytes
+
+    # Tiny chunks, so the fixed cost of a chunk dominates
+    nchunks = 256
+    chunked = ca.carray(a[:nchunks * 16], chunklen=16)
+    per_chunk = best(lambda: [chunked[i:i+16] for i in xrange(0, len(chunked), 16)])
+    constants['chunk'] = per_chunk / nchunks
+
+    fd, fname = tempfile.mkstemp(prefix='blaze-costs-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            a.tofile(f)
+        # Freshly written pages are likely cached, so this is a lower
+        # bound of the cost of reading cold data
+        disk = best(lambda: np.fromfile(fname, dtype=a.dtype)) / nbytes
+        constants['disk'] = max(disk, constants['memory'])
+    finally:
+        os.unlink(fname)
+
+    return constants
+
+def load(path):
+    """ The stored constants of this host, or None. """
+    try:
+        with open(path) as f:
+            stored = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if (stored.get('version') != COSTS_VERSION or
+        stored.get('host') != platform.node()):
+        return None
+    return stored['constants']
+
+def save(path, constants):
+    directory = os.path.dirname(path)
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # Written aside and renamed, so concurrent readers never see a
+        # partial file
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version'   : COSTS_VERSION,
+                       'host'      : platform.node(),
+                       'constants' : constants}, f, indent=2)
+        os.rename(tmp, path)
+    except (IOError, OSError) as e:
+        # Read-only home or the like, the constants stay in memory
+        if e.errno not in (errno.EACCES, errno.EROFS, errno.ENOSPC):
+            raise
+
+_constants = None
+
+def calibrate(path=None):
+    """ Measure the constants of this host again and store them. """
+    global _constants
+    path = path or default_path()
+    try:
+        constants = measure()
+    except MemoryError:
+        constants = dict(DEFAULTS)
+    if path:
+        save(path, constants)
+    _constants = constants
+    return constants
+
+def constants():
+    """ The constants of this host, calibrated on first use. """
+    global _constants
+    if _constants is None:
+        path = default_path()
+        stored = load(path) if path else None
+        if stored is not None:
+            _constants = dict(DEFAULTS, **stored)
+        else:
+            calibrate(path)
+    return _constants
+
+#------------------------------------------------------------------------
+# Operands
+#------------------------------------------------------------------------
+
+# Storage locations
+MEMORY = 'memory'
+DISK   = 'disk'
+
+class Operand(object):
+    """
+    What the cost formulas know about an operand.
+
+    Parameters
+    ----------
+    size : int
+        The number of elements.
+    nbytes : int
+        The uncompressed size in bytes.
+    cbytes : int
+        The size as stored, ``nbytes`` if not compressed.
+    storage : str
+        ``MEMORY`` or ``DISK``.
+    chunklen : int
+        The number of elements of a chunk, None if not chunked.
+    """
+
+    def __init__(self, size, nbytes, cbytes=None, storage=MEMORY,
+                 chunklen=None):
+        self.size = size
+        self.nbytes = nbytes
+        self.cbytes = nbytes if cbytes is None else cbytes
+        self.storage = storage
+        self.chunklen = chunklen
+
+    @property
+    def compressed(self):
+        return self.cbytes < self.nbytes
+
+    def __repr__(self):
+        return 'Operand(size=%d, nbytes=%d, cbytes=%d, storage=%s)' % (
+            self.size, self.nbytes, self.cbytes, self.storage)
+
+def describe(value):
+    """ The ``Operand`` of a value given to an implementation. """
+    if isinstance(value, Operand):
+        return value
+
+    # Manifest blaze arrays, the data is in their byte provider
+    data = getattr(value, 'data', None)
+    if data is not None and not isinstance(value, (np.ndarray, ca.carray)):
+        value = getattr(data, 'ca', getattr(data, 'na', value))
+
+    if isinstance(value, ca.carray):
+        storage = DISK if value.rootdir else MEMORY
+        return Operand(value.size, value.nbytes, value.cbytes, storage,
+                       value.chunklen)
+    if isinstance(value, np.ndarray):
+        return Operand(value.size, value.nbytes)
+    return Operand(1, np.asarray(value).itemsize)
+
+#------------------------------------------------------------------------
+# Formulas
+#------------------------------------------------------------------------
+
+def read_cost(op, c):
+    """ Bringing an operand into memory, uncompressed. """
+    cost = op.cbytes * (c['disk'] if op.storage == DISK else c['memory'])
+    if op.compressed:
+        cost += op.nbytes * c['decompress']
+    return cost
+
+class Formula(object):
+    """
+    The cost of an implementation, ``flops`` operations per element of
+    the result. Formulas are cost functions of the dispatcher, called
+    with the term alone they cost the fixed overhead only.
+    """
+
+    def __init__(self, flops=1):
+        self.flops = flops
+
+    def __call__(self, term):
+        # Dispatching on the term alone never calibrates
+        return (_constants or DEFAULTS)['call']
+
+    def estimate(self, operands, c=None):
+        """ The cost in seconds of the application to ``operands``,
+        with the constants ``c`` ( those of the host by default ). """
+        operands = [describe(op) for op in operands]
+        size = max([op.size for op in operands] or [0])
+        itemsize = max([op.nbytes // max(op.size, 1) for op in operands] or [0])
+        return self.cost(operands, size, size * itemsize, c or constants())
+
+    def cost(self, operands, size, out_nbytes, c):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '%s(flops=%r)' % (type(self).__name__, self.flops)
+
+class InMemory(Formula):
+    """
+    An implementation over whole arrays in memory, like NumPy. The
+    operands are read and decompressed up front, and the working set
+    spills to disk if it does not fit in memory.
+    """
+
+    def cost(self, operands, size, out_nbytes, c):
+        total = c['call'] + size * self.flops * c['flop']
+        total += sum(read_cost(op, c) for op in operands)
+        total += out_nbytes * c['memory']
+
+        working = sum(op.nbytes for op in operands) + out_nbytes
+        if working > c['ram']:
+            # Paged out and read back
+            total += 2 * (working - c['ram']) * c['disk']
+        return total
+
+class Chunked(Formula):
+    """
+    An out-of-core loop over the chunks of the operands, writing a
+    compressed carray. The working set is a chunk per operand, at the
+    price of a fixed cost per chunk.
+    """
+
+    def __init__(self, flops=1, chunklen=2**16):
+        super(Chunked, self).__init__(flops)
+        self.chunklen = chunklen
+
+    def cost(self, operands, size, out_nbytes, c):
+        chunklen = min([op.chunklen for op in operands if op.chunklen] or
+                       [self.chunklen])
+        nchunks = -(-size // chunklen)
+
+        total = c['call'] + nchunks * c['chunk'] + size * self.flops * c['flop']
+        total += sum(read_cost(op, c) for op in operands)
+        total += out_nbytes * c['compress']
+        return total
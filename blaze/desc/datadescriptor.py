@@ -1,3 +1,5 @@
+import numpy as np
+
 from blaze import byteproto as proto
 from . import lldescriptors, llindexers
 
@@ -66,6 +68,12 @@ class DataDescriptor(object):
         """
         raise NotImplementedError
 
+    def as_chunked_writer(self):
+        """Return a ChunkIterator whose committed chunks are appended to
+        the data
+        """
+        raise NotImplementedError
+
     # NOTE: Buffered streams can be thought of as 1D tiles.
     # TODO: Remove stream interface and expose tiling properties in graph
     # TODO: metadata
@@ -140,16 +148,74 @@ class Stream(DataDescriptor):
 #     int readonly;
 # }
 
+# The number of rows fetched at a time from SQL cursors
+SQL_BATCHSIZE = 2**16
+
+def null_value(dtype):
+    """ The value standing for a SQL NULL in a field of ``dtype``: NaN
+    for floats, the minimum for integers, empty strings for text. """
+    if dtype.kind in 'fc':
+        return np.nan
+    if dtype.kind in 'iu':
+        return np.iinfo(dtype).min
+    if dtype.kind == 'b':
+        return False
+    if dtype.kind in 'SU':
+        return ''
+    return None
+
 class SqlDataDescriptor(DataDescriptor):
+    """ The result of a SQL query, read in batches of ``batchsize`` rows
+    from a DB-API connection. ``query`` is the SQL text, with ``args``
+    bound to its parameters, and ``dtype`` the record type of its rows.
+    NULLs are read as the ``null_value`` of their field.
+    """
 
-    def __init__(self, id, conn, query):
-        self.id = id
+    def __init__(self, id, conn, query, dtype, args=(),
+                 batchsize=SQL_BATCHSIZE):
+        super(SqlDataDescriptor, self).__init__(id, None, None)
         self.conn = conn
         self.query = query
+        self.args = tuple(args)
+        self.dtype = np.dtype(dtype)
+        self.batchsize = batchsize
+
+    def asstream(self):
+        """ Returns an iterable of structured arrays of at most
+        ``batchsize`` rows, only one batch of rows is held in Python
+        objects at a time. """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(self.query, self.args)
+            while True:
+                rows = cursor.fetchmany(self.batchsize)
+                if not rows:
+                    break
+                yield self.toarray(rows)
+        finally:
+            cursor.close()
+
+    def toarray(self, rows):
+        """ The structured array of a batch of ``rows``. """
+        try:
+            return np.array(rows, dtype=self.dtype)
+        except (TypeError, ValueError):
+            if not any(None in row for row in rows):
+                raise
+        # Only the batches with NULLs are scanned
+        nulls = [null_value(self.dtype[i])
+                 for i in xrange(len(self.dtype))]
+        rows = [tuple(null if value is None else value
+                      for value, null in zip(row, nulls))
+                for row in rows]
+        return np.array(rows, dtype=self.dtype)
 
     def asbuffer(self, copy=False):
-        self.conn.execute(self.query)
-        return self.conn.fetchone()
+        """ The whole result as a structured array. """
+        blocks = list(self.asstream())
+        if not blocks:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(blocks)
 
 class CArrayDataDescriptor(DataDescriptor):
 
@@ -163,6 +229,11 @@ class CArrayDataDescriptor(DataDescriptor):
         """
         return llindexers.CArrayChunkIterator(self.carray, self.datashape)
 
+    def as_chunked_writer(self):
+        """Return a ChunkIterator appending to the carray
+        """
+        return llindexers.CArrayChunkWriter(self.carray, self.datashape)
+
 class NumPyDataDescriptor(DataDescriptor):
 
     def __init__(self, id, nbytes, datashape, array):
@@ -0,0 +1,213 @@
+"""
+Run compiled kernels over the chunks of data descriptors.
+
+The chunks of the inputs are read with the C-level chunk iterators, and
+the output chunks are committed to a chunk writer, so the kernel is
+driven over out-of-core data without going through Python for every
+chunk.
+
+The kernels are native functions ( e.g. BLIR functions, see
+``Context.lookup_fnptr`` ) taking the number of elements of the chunk
+and a BLIR array for every input, followed by one for the output::
+
+    void kernel(int n, array *in0, ..., array *out)
+"""
+
+from lldescriptors cimport *
+from cpython cimport *
+from libc.string cimport memcpy, memset
+
+import numpy as np
+
+from blaze.rts.heap import default_heap, allocate_numpy
+
+DEF MAX_OPERANDS = 8
+
+# Same layout as the BLIR array type
+cdef struct blir_array:
+    void *data
+    int nd
+    int *strides
+
+ctypedef blir_array *A
+
+ctypedef void (*kernel1_t)(int, A) nogil
+ctypedef void (*kernel2_t)(int, A, A) nogil
+ctypedef void (*kernel3_t)(int, A, A, A) nogil
+ctypedef void (*kernel4_t)(int, A, A, A, A) nogil
+ctypedef void (*kernel5_t)(int, A, A, A, A, A) nogil
+ctypedef void (*kernel6_t)(int, A, A, A, A, A, A) nogil
+ctypedef void (*kernel7_t)(int, A, A, A, A, A, A, A) nogil
+ctypedef void (*kernel8_t)(int, A, A, A, A, A, A, A, A) nogil
+
+cdef void call_kernel(void *kernel, int n, blir_array *a, int nargs) nogil:
+    if nargs == 1:
+        (<kernel1_t> kernel)(n, &a[0])
+    elif nargs == 2:
+        (<kernel2_t> kernel)(n, &a[0], &a[1])
+    elif nargs == 3:
+        (<kernel3_t> kernel)(n, &a[0], &a[1], &a[2])
+    elif nargs == 4:
+        (<kernel4_t> kernel)(n, &a[0], &a[1], &a[2], &a[3])
+    elif nargs == 5:
+        (<kernel5_t> kernel)(n, &a[0], &a[1], &a[2], &a[3], &a[4])
+    elif nargs == 6:
+        (<kernel6_t> kernel)(n, &a[0], &a[1], &a[2], &a[3], &a[4], &a[5])
+    elif nargs == 7:
+        (<kernel7_t> kernel)(n, &a[0], &a[1], &a[2], &a[3], &a[4], &a[5],
+                             &a[6])
+    else:
+        (<kernel8_t> kernel)(n, &a[0], &a[1], &a[2], &a[3], &a[4], &a[5],
+                             &a[6], &a[7])
+
+#------------------------------------------------------------------------
+# Input cursors
+#------------------------------------------------------------------------
+
+# The read position in the chunks of an input. The chunks of the inputs
+# and the output need not line up, so a run of elements is either read
+# in place from the current chunk or gathered from consecutive chunks.
+cdef struct Cursor:
+    CChunkIterator *iterator
+    CChunk chunk
+    Py_ssize_t pos
+    Py_ssize_t itemsize
+    bint live       # the current chunk must be disposed of
+    bint exhausted
+
+cdef int cursor_release(Cursor *c) except -1:
+    if c.live:
+        c.live = False
+        if c.iterator.dispose != NULL:
+            c.iterator.dispose(c.iterator, &c.chunk)
+    return 0
+
+cdef int cursor_advance(Cursor *c) except -1:
+    cursor_release(c)
+    c.iterator.next(c.iterator, &c.chunk)
+    if c.chunk.data == NULL:
+        c.exhausted = True
+        raise ValueError("the operands have different lengths")
+    c.live = True
+    c.pos = 0
+    return 0
+
+cdef char *cursor_read(Cursor *c, Py_ssize_t n, char *staging) except NULL:
+    """
+    Return a pointer to the next `n` elements, contiguous in memory.
+    """
+    cdef Py_ssize_t count, i, done = 0
+    cdef Py_ssize_t itemsize = c.itemsize
+    cdef char *src
+
+    while not c.live or c.pos == c.chunk.size:
+        cursor_advance(c)
+
+    if c.chunk.stride == itemsize and c.pos + n <= c.chunk.size:
+        # zero-copy
+        src = <char *> c.chunk.data + c.pos * itemsize
+        c.pos += n
+        return src
+
+    while done < n:
+        if c.pos == c.chunk.size:
+            cursor_advance(c)
+            continue
+
+        count = min(n - done, c.chunk.size - c.pos)
+        src = <char *> c.chunk.data + c.pos * c.chunk.stride
+        if c.chunk.stride == itemsize:
+            memcpy(staging + done * itemsize, src, count * itemsize)
+        else:
+            for i in range(count):
+                memcpy(staging + (done + i) * itemsize,
+                       src + i * c.chunk.stride, itemsize)
+        done += count
+        c.pos += count
+
+    return staging
+
+#------------------------------------------------------------------------
+# Executor
+#------------------------------------------------------------------------
+
+cdef Py_ssize_t itemsize_of(ChunkIterator it) except -1:
+    data = it.data_obj
+    if len(data.shape) != 1:
+        raise NotImplementedError("only one-dimensional operands are "
+                                  "supported")
+    return data.dtype.itemsize
+
+def execute_chunked(Py_uintptr_t kernel, inputs, output):
+    """
+    execute_chunked(kernel, inputs, output)
+
+    Run the native ``kernel`` over the chunks of the ``inputs`` data
+    descriptors, appending the results to the ``output`` data descriptor
+    ( see ``DataDescriptor.as_chunked_writer`` ). The inputs must all
+    have the same length, and the kernel is called once per output
+    chunk.
+    """
+    cdef Cursor cursors[MAX_OPERANDS]
+    cdef blir_array args[MAX_OPERANDS]
+    cdef int strides[MAX_OPERANDS]
+    cdef CChunk out_chunk
+    cdef ChunkIterator writer
+    cdef Py_ssize_t n, length, done = 0
+    cdef int i, nargs
+    cdef char *staging
+
+    inputs = list(inputs)
+    nargs = len(inputs) + 1
+    if nargs > MAX_OPERANDS:
+        raise ValueError("kernels take at most %d operands" % MAX_OPERANDS)
+
+    iterators = [desc.as_chunked_iterator() for desc in inputs]
+    writer = output.as_chunked_writer()
+
+    lengths = set(len((<ChunkIterator> it).data_obj) for it in iterators)
+    if len(lengths) > 1:
+        raise ValueError("the operands have different lengths")
+    length = lengths.pop() if lengths else 0
+
+    # Staging buffers, for runs of input elements that span chunks
+    buffers = []
+    memset(cursors, 0, sizeof(cursors))
+    for i, it in enumerate(iterators):
+        cursors[i].iterator = &(<ChunkIterator> it).iterator
+        cursors[i].itemsize = itemsize_of(it)
+    itemsize_of(writer)
+
+    for i in range(nargs):
+        strides[i] = 1
+        args[i].nd = 1
+        args[i].strides = &strides[i]
+
+    memset(&out_chunk, 0, sizeof(out_chunk))
+    try:
+        while done < length:
+            writer.iterator.next(&writer.iterator, &out_chunk)
+            n = min(out_chunk.size, length - done)
+            if not buffers:
+                buffers = [allocate_numpy(default_heap(), np.uint8,
+                                          n * cursors[i].itemsize)[1]
+                           for i in range(nargs - 1)]
+
+            for i in range(nargs - 1):
+                staging = <char *> <Py_uintptr_t> buffers[i].ctypes.data
+                args[i].data = cursor_read(&cursors[i], n, staging)
+            args[nargs - 1].data = out_chunk.data
+
+            with nogil:
+                call_kernel(<void *> kernel, <int> n, args, nargs)
+
+            out_chunk.size = n
+            writer.iterator.commit(&writer.iterator, &out_chunk)
+            done += n
+    finally:
+        for i in range(nargs - 1):
+            cursor_release(&cursors[i])
+
+    flush = getattr(writer.data_obj, 'flush', None)
+    if flush is not None:
+        flush()
@@ -3,7 +3,9 @@ from cpython cimport *
 
 #from lldescriptors import *
 
+import numpy as np
 from blaze.carray import carrayExtension as carray
+from blaze.rts.heap import default_heap, allocate_numpy
 
 
 cdef chunk_next_generic(CChunkIterator *info, CChunk *chunk, arr, keep_alive):
@@ -53,11 +55,15 @@ cdef int carray_chunk_next(CChunkIterator *info, CChunk *chunk) except -1:
     if info.cur_chunk_idx < carray.nchunks:
         carray_chunk = carray.chunks[info.cur_chunk_idx]
 
-        # decompress chunk
-        arr = carray_chunk[:]
+        # decompress chunk, into a block of the runtime heap which is
+        # freed when the chunk is disposed of
+        _, arr = allocate_numpy(default_heap(), carray.dtype,
+                                (carray.chunklen,) + carray.shape[1:])
+        carray_chunk.read_into(arr)
         chunk.extra = <void *> carray_chunk
     elif info.cur_chunk_idx == carray.nchunks:
-        arr = carray.leftover_array
+        # only the filled part of the leftover buffer
+        arr = carray.leftover_array[:len(carray) - carray.nchunks * carray.chunklen]
     else:
         return done(chunk)
 
@@ -66,12 +72,11 @@ cdef int carray_chunk_next(CChunkIterator *info, CChunk *chunk) except -1:
 
 cdef int carray_chunk_commit(CChunkIterator *info, CChunk *chunk) except -1:
     carray_obj = <object> <PyObject *> info.meta.source
-    if chunk.chunk_index < carray_obj.nchunks:
-        # compress chunk and replace previous chunk
-        carray_chunk = <object> chunk.extra
-        arr = <object> chunk.obj
-        carray.chunks[chunk.chunk_index] = carray.chunk(arr, arr.dtype,
-                                                        carray_obj.cparams)
+    arr = <object> chunk.obj
+    # write the chunk back through the carray, which recompresses it and
+    # takes care of its caches
+    start = chunk.chunk_index * carray_obj.chunklen
+    carray_obj[start:start + len(arr)] = arr
 
     return carray_chunk_dispose(info, chunk)
 
@@ -81,6 +86,33 @@ cdef int carray_chunk_dispose(CChunkIterator *info, CChunk *chunk) except -1:
     chunk.obj = NULL
     return 0
 
+cdef class CArrayChunkWriter(ChunkIterator):
+    """
+    Write-only chunk iterator appending to a carray. Every chunk is a new
+    buffer of `chunklen` elements; commit the chunk with its size set to
+    the number of elements written to append them to the carray.
+    """
+
+    def __cinit__(self, data_obj, datashape, *args, **kwargs):
+        super(CArrayChunkWriter, self).__init__(data_obj, datashape)
+        self.iterator.next = carray_writer_next
+        self.iterator.commit = carray_writer_commit
+        self.iterator.dispose = carray_chunk_dispose
+
+
+cdef int carray_writer_next(CChunkIterator *info, CChunk *chunk) except -1:
+    carray_obj = <object> <PyObject *> info.meta.source
+    _, arr = allocate_numpy(default_heap(), carray_obj.dtype,
+                            (carray_obj.chunklen,) + carray_obj.shape[1:])
+    chunk_next_generic(info, chunk, arr, True)
+    return 0
+
+cdef int carray_writer_commit(CChunkIterator *info, CChunk *chunk) except -1:
+    carray_obj = <object> <PyObject *> info.meta.source
+    arr = <object> chunk.obj
+    carray_obj.append(arr[:chunk.size])
+    return carray_chunk_dispose(info, chunk)
+
 #------------------------------------------------------------------------
 # NumPy chunk iterators and indexers
 #------------------------------------------------------------------------
@@ -0,0 +1,286 @@
+"""
+Streaming evaluation of deferred expression graphs.
+
+The graph is scheduled in topological order and cut at its barriers,
+the nodes that need the whole of their operands before they can be
+used:
+
+* reductions ( ``Sum`` ), which are folded block by block and merged
+* lifted functions ( ``Fun`` ) and ``Transpose``, which are applied to
+  materialized operands
+
+Everything in between is elementwise and is evaluated in a single pass
+over the blocks of the chunked inputs, so the temporaries are bounded by
+the block size and not by the length of the arrays. The barriers that
+do not depend on each other share the same pass.
+"""
+
+import operator
+
+import numpy as np
+
+from blaze import carray as ca
+from blaze.expr import ops
+from blaze.expr.nodes import Node
+from blaze.expr.graph import App, Fun, Literal
+
+#------------------------------------------------------------------------
+# Settings
+#------------------------------------------------------------------------
+
+# Array results up to this size ( in bytes ) are returned as NumPy
+# arrays, bigger ones as carrays
+SMALL_RESULT = 2**20
+
+# The block length when none of the inputs is chunked
+BLOCKLEN = 2**16
+
+#------------------------------------------------------------------------
+# Operations
+#------------------------------------------------------------------------
+
+elementwise = {
+    ops.Add : np.add,
+    ops.Mul : np.multiply,
+    ops.Pow : np.power,
+    ops.Abs : np.abs,
+}
+
+# Reductions as ( block reduction, merge of the partial results )
+reductions = {
+    ops.Sum : (np.sum, operator.add),
+}
+
+# Operations on whole arrays
+materializing = {
+    ops.Transpose : np.transpose,
+}
+
+#------------------------------------------------------------------------
+# Graph Traversal
+#------------------------------------------------------------------------
+
+def unwrap(node):
+    """ The operator of an application. """
+    while isinstance(node, App):
+        node = node.operator
+    return node
+
+def children(node):
+    if isinstance(node, Literal) or source_of(node) is not None:
+        return []
+    return [unwrap(child) for child in node.children if isinstance(child, Node)]
+
+def source_of(node):
+    """ The carray ( or the NumPy array, for instance the mapping of a
+    FileSource ) holding the data of a manifest node, or None. """
+    data = getattr(node, 'data', None)
+    source = getattr(data, 'ca', None)
+    if source is None:
+        source = getattr(data, 'na', None)
+    return source
+
+def is_barrier(node):
+    return (isinstance(node, Fun) or type(node) in reductions or
+            type(node) in materializing)
+
+def toposort(root):
+    """ The nodes of the graph, every node after its operands. """
+    order, seen = [], set()
+    stack = [(root, False)]
+
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+        elif id(node) not in seen:
+            seen.add(id(node))
+            stack.append((node, True))
+            for child in reversed(children(node)):
+                if id(child) not in seen:
+                    stack.append((child, False))
+    return order
+
+#------------------------------------------------------------------------
+# Evaluation
+#------------------------------------------------------------------------
+
+def evaluate(root, small=SMALL_RESULT):
+    """
+    Evaluate the deferred expression ``root``.
+
+    Reductions return a scalar, arrays are returned as NumPy arrays if
+    they take less than ``small`` bytes and as a blaze Array backed by a
+    new carray otherwise.
+    """
+    root = unwrap(root)
+    order = toposort(root)
+
+    # Barriers only depend on barriers of lower levels
+    level = {}
+    for node in order:
+        lv = max([level[id(child)] for child in children(node)] or [0])
+        level[id(node)] = lv + 1 if is_barrier(node) else lv
+
+    values = {}
+    for lv in xrange(1, max(level.values()) + 1):
+        barriers = [node for node in order
+                    if is_barrier(node) and level[id(node)] == lv]
+
+        for node in barriers:
+            if isinstance(node, Fun):
+                func = node.fn
+            elif type(node) in materializing:
+                func = materializing[type(node)]
+            else:
+                continue
+            args = [materialize(order, values, unwrap(child))
+                    if isinstance(child, Node) else child
+                    for child in node.children]
+            values[id(node)] = func(*args)
+
+        folds = [node for node in barriers if type(node) in reductions]
+        if folds:
+            stream(order, values, folds, None, small)
+
+    if id(root) in values:
+        return values[id(root)]
+    if isinstance(root, Literal):
+        return root.val
+
+    result = stream(order, values, [], root, small)
+    if isinstance(result, ca.carray):
+        from blaze.sources.chunked import CArraySource
+        from blaze.table import Array
+        return Array(CArraySource(result))
+    return result
+
+def materialize(order, values, node):
+    """ The value of ``node`` in memory. """
+    if id(node) in values:
+        return values[id(node)]
+    if isinstance(node, Literal):
+        return node.val
+    return stream(order, values, [], node, float('inf'))
+
+def stream(order, values, folds, target, small):
+    """
+    A pass over the blocks of the inputs, folding the reductions
+    ``folds`` ( their results are stored in ``values`` ) and returning
+    the value of ``target`` if given.
+    """
+    roots = [children(node)[0] for node in folds]
+    if target is not None:
+        roots.append(target)
+
+    # The nodes computed in this pass, in topological order
+    needed = set()
+    pending = list(roots)
+    while pending:
+        node = pending.pop()
+        if id(node) in needed:
+            continue
+        needed.add(id(node))
+        if id(node) not in values:
+            pending.extend(children(node))
+    nodes = [node for node in order if id(node) in needed]
+
+    # Array inputs of the pass and their common length
+    arrays = []
+    for node in nodes:
+        if id(node) in values:
+            value = values[id(node)]
+            if isinstance(value, (np.ndarray, ca.carray)) and value.ndim > 0:
+                arrays.append(value)
+        elif source_of(node) is not None:
+            arrays.append(source_of(node))
+
+    lengths = set(len(a) for a in arrays)
+    if len(lengths) > 1:
+        raise ValueError("operands could not be broadcast together, "
+                         "lengths %s" % sorted(lengths))
+    length = lengths.pop() if lengths else None
+
+    chunked = [a for a in arrays if isinstance(a, ca.carray)]
+    blen = chunked[0].chunklen if chunked else BLOCKLEN
+
+    # Free the blocks of temporaries after their last use
+    roots = set(id(node) for node in roots)
+    last_use = {}
+    for i, node in enumerate(nodes):
+        if id(node) not in values:
+            for child in children(node):
+                last_use[id(child)] = i
+    release = [[] for node in nodes]
+    for key, i in last_use.iteritems():
+        if key not in roots:
+            release[i].append(key)
+
+    partials = {}
+    out = None
+
+    if length is None:
+        starts = [None]
+    else:
+        starts = range(0, length, blen) or [0]
+
+    for start in starts:
+        block = {}
+        for i, node in enumerate(nodes):
+            key = id(node)
+            if key in values:
+                value = values[key]
+                if (start is not None and isinstance(value, (np.ndarray, ca.carray))
+                    and value.ndim > 0):
+                    value = value[start:start+blen]
+            elif source_of(node) is not None:
+                value = source_of(node)[start:start+blen]
+            elif isinstance(node, Literal):
+                value = node.val
+            else:
+                value = apply(node, [block[id(child)] for child in children(node)])
+            block[key] = value
+
+            for child in release[i]:
+                del block[child]
+
+        for node in folds:
+            func, merge = reductions[type(node)]
+            partial = func(block[id(children(node)[0])])
+            if id(node) in partials:
+                partials[id(node)] = merge(partials[id(node)], partial)
+            else:
+                partials[id(node)] = partial
+
+        if target is not None:
+            value = block[id(target)]
+            if start is None or not isinstance(value, np.ndarray):
+                out = value
+            else:
+                if out is None:
+                    out = allocate(value, length, small)
+                if isinstance(out, ca.carray):
+                    out.append(value)
+                else:
+                    out[start:start+len(value)] = value
+
+    values.update(partials)
+
+    if isinstance(out, ca.carray):
+        out.flush()
+    return out
+
+def apply(node, args):
+    try:
+        func = elementwise[type(node)]
+    except KeyError:
+        raise NotImplementedError("cannot evaluate %s" % node.name)
+    return func(*args)
+
+def allocate(block, length, small):
+    """ The container of an array result, given its first block. """
+    shape = (length,) + block.shape[1:]
+    if length * block.itemsize * np.prod(block.shape[1:]) <= small:
+        return np.empty(shape, dtype=block.dtype)
+    return ca.carray(np.empty((0,) + block.shape[1:], dtype=block.dtype),
+                     expectedlen=length)
@@ -294,7 +294,7 @@ class ArrayNode(ExpressionNode):
     @property
     def T(self):
         """ Equivalent to .transpose(), which returns a graph node. """
-        return Op('transpose', self)
+        return self.transpose()
 
     # {get,set}item Operations
     # ===============
@@ -13,13 +13,9 @@ class Node(object):
 
     def eval(self):
         """ Evaluates the expression graph """
-        # setup a default pipeline
-        from blaze.compile import _compile
-        ctx, plan = _compile(self)
-
-        # submit to the runtime for the result
-        #return execplan(ctx, plan)
-        return ctx, plan
+        from blaze.expr.optimize import optimize
+        from blaze.expr.evaluate import evaluate
+        return evaluate(optimize(self))
 
     def __iter__(self):
         """ Walk the graph, left to right """
@@ -0,0 +1,232 @@
+"""
+Rewrites of deferred expression graphs, run before they are evaluated.
+
+* cse             : hash-cons the nodes, so that repeated subexpressions
+                    are computed once
+* constant_fold   : evaluate the operations on literals, and the IfElse
+                    nodes with a literal condition
+* sink_transpose  : push the elementwise operations through Transpose,
+                    ``a.T + b.T -> (a + b).T``
+* split_sums      : ``sum(a + b) -> sum(a) + sum(b)``, when ``a + b`` is
+                    not used elsewhere and would only be a temporary, and
+                    ``a`` and ``b`` have the same shape
+
+The graphs given are never modified, the rewrites build new nodes.
+"""
+
+from blaze.expr import ops
+from blaze.expr.nodes import Node
+from blaze.expr.graph import Fun, Op, Literal, IntNode, FloatNode, IfElse
+from blaze.expr.evaluate import (elementwise, reductions, unwrap, children,
+                                 source_of, toposort)
+
+# Rewrites are repeated until the graph does not change, at most
+MAX_ITERATIONS = 10
+
+#------------------------------------------------------------------------
+# Graph Rebuilding
+#------------------------------------------------------------------------
+
+def replace_children(node, new):
+    """ A copy of ``node`` with its children replaced through the
+    ``new`` mapping ( from the ids of the old children ). """
+    args = [new.get(id(unwrap(child)), child) if isinstance(child, Node)
+            else child for child in node.children]
+    if isinstance(node, Fun):
+        return type(node)(args)
+    return type(node)(node.op, args)
+
+def transform(root, rule):
+    """
+    Rebuild the graph bottom-up. ``rule`` is called with every node,
+    whose children are already rewritten, and returns its replacement
+    or None to keep it.
+    """
+    new = {}
+    for node in toposort(unwrap(root)):
+        rebuilt = node
+        if any(new[id(child)] is not child for child in children(node)):
+            rebuilt = replace_children(node, new)
+        result = rule(rebuilt)
+        new[id(node)] = rebuilt if result is None else result
+    return new[id(unwrap(root))]
+
+def fixpoint(root, rule):
+    for i in xrange(MAX_ITERATIONS):
+        result = transform(root, rule)
+        if result is root:
+            break
+        root = result
+    return root
+
+#------------------------------------------------------------------------
+# Common Subexpression Elimination
+#------------------------------------------------------------------------
+
+def key(node, ids):
+    """ The structural key of a node, given the canonical ids of its
+    children. """
+    if source_of(node) is not None:
+        # Views of the same data are the same
+        return ('source', id(source_of(node)))
+    if isinstance(node, Literal):
+        return (type(node), node.val)
+    if not isinstance(node, (Op, Fun)):
+        return ('node', id(node))
+
+    args = []
+    for child in node.children:
+        if isinstance(child, Node):
+            args.append(ids[id(unwrap(child))])
+        else:
+            args.append(('value', repr(child)))
+    if getattr(node, 'commutative', False):
+        args.sort()
+    return (type(node), getattr(node, 'op', None), tuple(args))
+
+def cse(root):
+    """
+    Hash-cons the nodes of the graph, structurally equal subexpressions
+    are replaced by a single node.
+    """
+    table = {}
+    ids = {}
+
+    def rule(node):
+        k = key(node, ids)
+        canonical = table.setdefault(k, node)
+        ids[id(canonical)] = id(canonical)
+        if canonical is not node:
+            ids[id(node)] = id(canonical)
+            return canonical
+
+    # The keys of the rebuilt nodes refer to canonical children only
+    return transform(root, rule)
+
+#------------------------------------------------------------------------
+# Constant Folding
+#------------------------------------------------------------------------
+
+def literal(value):
+    if hasattr(value, 'item'):
+        # NumPy scalar
+        value = value.item()
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, long)):
+        return IntNode(int(value))
+    if isinstance(value, float):
+        return FloatNode(value)
+    return None
+
+def fold_rule(node):
+    kids = children(node)
+
+    if isinstance(node, IfElse) and isinstance(kids[0], Literal):
+        return kids[1] if kids[0].val else kids[2]
+
+    func = elementwise.get(type(node))
+    if func is not None and kids and all(isinstance(k, Literal) for k in kids):
+        return literal(func(*[k.val for k in kids]))
+
+def constant_fold(root):
+    """ Evaluate the operations whose operands are all literals. """
+    return fixpoint(root, fold_rule)
+
+#------------------------------------------------------------------------
+# Transpose
+#------------------------------------------------------------------------
+
+def sink_rule(node):
+    if type(node) not in elementwise:
+        return None
+
+    kids = children(node)
+    transposed = [k for k in kids if isinstance(k, ops.Transpose)]
+    if not transposed or not all(isinstance(k, (ops.Transpose, Literal))
+                                 for k in kids):
+        return None
+
+    inner = dict((id(k), children(k)[0]) for k in transposed)
+    op = replace_children(node, inner)
+    return ops.Transpose('Transpose', [op])
+
+def sink_transpose(root):
+    """ Apply the elementwise operations before transposing, so that
+    only their result is transposed. """
+    return fixpoint(root, sink_rule)
+
+#------------------------------------------------------------------------
+# Reductions
+#------------------------------------------------------------------------
+
+def shape_of(node):
+    """ The shape of the node, ``()`` for scalars, None if not known. """
+    if isinstance(node, Literal) or type(node) in reductions:
+        return ()
+    source = source_of(node)
+    if source is not None:
+        return tuple(source.shape)
+    if isinstance(node, ops.Transpose):
+        shape = shape_of(children(node)[0])
+        return None if shape is None else shape[::-1]
+    if type(node) in elementwise:
+        shapes = set(shape_of(child) for child in children(node)) - set([()])
+        if len(shapes) == 1:
+            return shapes.pop()
+        if not shapes:
+            return ()
+    # Unknown, or broadcast
+    return None
+
+def consumers(root):
+    """ The number of parents of every node. """
+    count = {}
+    for node in toposort(unwrap(root)):
+        for child in children(node):
+            count[id(child)] = count.get(id(child), 0) + 1
+    return count
+
+def split_sums(root):
+    """ Sum the operands of an addition separately, instead of building
+    the addition only to sum it. """
+
+    def rule(node):
+        if not isinstance(node, ops.Sum):
+            return None
+        operand = children(node)[0]
+        if not isinstance(operand, ops.Add) or count.get(id(operand), 0) > 1:
+            return None
+        a, b = children(operand)
+        # sum(a + b) is sum(a) + sum(b) only without broadcasting
+        shape = shape_of(a)
+        if not shape or shape != shape_of(b):
+            return None
+        return ops.Add('Add', [ops.Sum('Sum', [a]), ops.Sum('Sum', [b])])
+
+    # The consumers are counted again after every rewrite
+    for i in xrange(MAX_ITERATIONS):
+        count = consumers(root)
+        result = transform(root, rule)
+        if result is root:
+            break
+        root = result
+    return root
+
+#------------------------------------------------------------------------
+# Pipeline
+#------------------------------------------------------------------------
+
+passes = [
+    cse,
+    constant_fold,
+    sink_transpose,
+    split_sums,
+    cse,
+]
+
+def optimize(root, passes=passes):
+    """ Run the rewrite passes over the graph. """
+    for rewrite in passes:
+        root = rewrite(root)
+    return root
@@ -33,7 +33,9 @@ from blaze.expr.graph import Fun
 from blaze.eclass import all_manifest
 from blaze.rts.immediete import ieval
 from blaze.datashape import dynamic
-from blaze.aterm import parse, match, AtermSyntaxError
+from blaze.aterm import parse, AtermSyntaxError
+from blaze.aterm.matching import matches
+from blaze.aterm.terms import aappl, aint, areal, astr, atupl, aterm
 from blaze.error import InvalidLibraryDefinition, NoDispatch
 
 #------------------------------------------------------------------------
@@ -44,6 +46,99 @@ from blaze.error import InvalidLibraryDefinition, NoDispatch
 _dispatch = local()
 runtime_frozen = allocate_lock()
 
+#------------------------------------------------------------------------
+# Dispatch Tree
+#------------------------------------------------------------------------
+
+# The edge followed by the pattern subterms that match any subject
+# subterm (placeholders and the terms that are only checked by
+# ``matches``).
+WILDCARD = '*'
+
+def _term_key(term):
+    """ The key of the root symbol of a term in the dispatch tree, or
+    None if the term is not discriminated. """
+    if isinstance(term, aint):
+        return ('int', term.val)
+    elif isinstance(term, areal):
+        return ('real', term.val)
+    elif isinstance(term, astr):
+        return ('str', term.val)
+    elif isinstance(term, aappl):
+        return ('appl', term.spine.term, len(term.args))
+    elif isinstance(term, atupl):
+        return ('tupl', len(term.args))
+    else:
+        return None
+
+def _pattern_keys(pattern, keys):
+    """ Flatten a pattern into its preorder sequence of keys. """
+    key = _term_key(pattern)
+    if key is None:
+        keys.append(WILDCARD)
+    else:
+        keys.append(key)
+        if isinstance(pattern, (aappl, atupl)):
+            for arg in pattern.args:
+                _pattern_keys(arg, keys)
+    return keys
+
+def _subject_keys(subject, keys):
+    """ Flatten a subject into its preorder sequence of ``(key, end)``
+    pairs, where ``end`` is the position just after the subterm. """
+    pos = len(keys)
+    keys.append(None)
+    key = _term_key(subject)
+    if isinstance(subject, (aappl, atupl)):
+        for arg in subject.args:
+            _subject_keys(arg, keys)
+    keys[pos] = (key, len(keys))
+    return keys
+
+class DispatchTree(object):
+    """
+    A discrimination tree over the ATerm patterns of the installed
+    functions. Patterns are stored as their preorder sequence of root
+    symbols, so that retrieving the candidates for a term is a single
+    walk over the term, no matter how many functions are installed.
+
+    Placeholders are wildcard edges that skip a whole subterm of the
+    subject. The tree is a prefilter: the candidates it returns still
+    have to be checked with ``matches``.
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, pattern, value):
+        node = self.root
+        for key in _pattern_keys(pattern, []):
+            node = node.setdefault(key, {})
+        node.setdefault(None, []).append(value)
+
+    def retrieve(self, subject):
+        keys = _subject_keys(subject, [])
+        found = []
+        stack = [(self.root, 0)]
+        while stack:
+            node, pos = stack.pop()
+            if pos == len(keys):
+                found.extend(node.get(None, ()))
+                continue
+            key, end = keys[pos]
+            if key is not None and key in node:
+                stack.append((node[key], pos + 1))
+            if WILDCARD in node:
+                stack.append((node[WILDCARD], end))
+        return found
+
+#------------------------------------------------------------------------
+# Dispatcher
+#------------------------------------------------------------------------
+
+# The maximum number of terms whose matching functions are memoized
+LOOKUP_CACHE_SIZE = 1024
+
 # WARNING, this is mutable
 class Dispatcher(object):
     """
@@ -54,35 +149,76 @@ class Dispatcher(object):
         a) match a given expression
         b) minimizes the cost of execution
 
+    The patterns are parsed once at install time and indexed in a
+    ``DispatchTree``, and the functions matching a term are memoized
+    on the term itself. Terms are hash-consed, so structurally equal
+    terms ( annotations included ) share a single cache entry.
     """
 
     def __init__(self):
         self.funs  = {}
         self.costs = {}
+        self.patterns = {}
+        self.tree = DispatchTree()
+        self.cache = {}
 
     def install(self, matcher, fn, cost):
+        pattern = parse(matcher)
+        reinstall = fn in self.funs
+
         self.funs[fn] = matcher
         self.costs[fn] = cost
+        self.patterns[fn] = pattern
+
+        if reinstall:
+            # Drop the former pattern of the function
+            self.tree = DispatchTree()
+            for f, p in self.patterns.iteritems():
+                self.tree.insert(p, f)
+        else:
+            self.tree.insert(pattern, fn)
+        self.cache.clear()
+
+    def candidates(self, aterm):
+        """ The functions whose pattern matches the given aterm. """
+        if isinstance(aterm, basestring):
+            aterm = parse(aterm)
 
-    def lookup(self, aterm):
+        try:
+            return self.cache[aterm]
+        except KeyError:
+            pass
+
+        matched = [f for f in self.tree.retrieve(aterm)
+                   if matches(self.patterns[f], aterm)]
+
+        if len(self.cache) >= LOOKUP_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[aterm] = matched
+        return matched
+
+    def cost(self, fn, aterm, operands=None):
+        """ The cost of ``fn`` applied to the term. Cost formulas
+        ( see ``blaze.cost`` ) are evaluated over the actual operands
+        when they are known. """
+        costfn = self.costs[fn]
+        if operands is not None and hasattr(costfn, 'estimate'):
+            return costfn.estimate(operands)
+        return costfn(aterm)
+
+    def lookup(self, aterm, operands=None):
         # canidate functions, functions matching the signature of
         # the term
-
-        # Use the C libraries better pattern matching library,
-        # find a function in the Blaze library that matches the
-        # given aterm
-
-        matched = []
-        for f, sig in self.funs.iteritems():
-            ismatch, _ = match(sig, str(aterm))
-            if ismatch:
-                matched.append(f)
+        matched = self.candidates(aterm)
 
         if len(matched) == 0:
             raise NoDispatch(aterm)
+        elif len(matched) == 1:
+            f, = matched
+            return f, self.cost(f, aterm, operands)
 
         # the canidate which has the minimal cost function
-        costs = [(f, self.costs[f](aterm)) for f in matched]
+        costs = [(f, self.cost(f, aterm, operands)) for f in matched]
 
         return min(costs, key=lambda x: x[1])
 
@@ -102,7 +238,12 @@ def lift(signature, typesig, constraints=None, **params):
     This will ttransparently let the user lift functions in
     to the runtime and construct lazy graphs with what looks like
     immediate functions.
+
+    The ``cost`` parameter is the cost function of the implementation,
+    ( see ``blaze.cost`` ), several implementations can be lifted with
+    the same signature and the cheapest one for the operands is used.
     """
+    cost = params.pop('cost', None)
 
     def outer(pyfn):
         assert callable(pyfn), "Lifted function must be callable"
@@ -114,8 +255,8 @@ def lift(signature, typesig, constraints=None, **params):
             raise InvalidLibraryDefinition(*e.args + (fname,))
 
         # #effectful
-        libcall = PythonFn(signature, typesig, pyfn)
-        install(signature, libcall)
+        libcall = PythonFn(signature, typesig, pyfn, constraints)
+        install(signature, libcall, cost)
 
         sig = getargspec(pyfn)
         nargs = len(sig.args)
@@ -145,14 +286,10 @@ def lift(signature, typesig, constraints=None, **params):
             allmanifest = all_manifest(args)
 
             if allmanifest:
-                # do immediete evaluation
-                if constraints.get('passthrough', False):
-                    # don't generate descriptors just call Python fn
-                    # with the whatever was passed in
-                    return pyfn(*args)
-                else:
-                    # generate descriptors
-                    return ieval(pyfn, args)
+                # do immediete evaluation, with the cheapest
+                # implementation for these operands
+                impl, _ = lookup(applied(signature, len(args)), args)
+                return impl(*args)
             else:
                 # Return a new Fun() class that is a graph node
                 # constructor.
@@ -175,8 +312,14 @@ def install(matcher, fn, cost=None):
         costfn = cost or zerocost
         _dispatch.dispatcher.install(matcher, fn, costfn)
 
-def lookup(aterm):
-    return _dispatch.dispatcher.lookup(aterm)
+def lookup(aterm, operands=None):
+    return _dispatch.dispatcher.lookup(aterm, operands)
+
+def applied(signature, nargs):
+    """ A term applying the head of ``signature`` to opaque
+    operands. """
+    spine = parse(signature).spine
+    return aappl(spine, [aterm('_%d' % i) for i in xrange(nargs)])
 
 #------------------------------------------------------------------------
 # Functions
@@ -185,13 +328,24 @@ def lookup(aterm):
 # A function in the Python interpreter
 class PythonFn(object):
 
-    def __init__(self, signature, typesig, fn, mayblock=False):
+    def __init__(self, signature, typesig, fn, constraints=None,
+                 mayblock=False):
         self.__fn = fn
         self.__mayblock = mayblock
         self.__typesig = typesig
         self.__signature = signature
+        self.__constraints = constraints or {}
         self.__gil = True
 
+    def __call__(self, *args):
+        if self.__constraints.get('passthrough', False):
+            # don't generate descriptors just call Python fn
+            # with the whatever was passed in
+            return self.__fn(*args)
+        else:
+            # generate descriptors
+            return ieval(self.__fn, args)
+
     @property
     def ptr(self):
         raise NotImplementedError
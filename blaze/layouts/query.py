@@ -79,7 +79,8 @@ def getitem(cc, indexer):
     # Read from the generic interface in terms of the local
     # coordinates.
     datum = elt.read(elt, lc)
-    res = np.array(datum)
+    # Sources returning views ( e.g. mapped files ) are not copied
+    res = np.asarray(datum)
     return res
 
 def getlabel(cc, indexer):
@@ -93,7 +94,10 @@ def write(cc, indexer, value):
     # Shortcut for accessing data in carray container
     # (this needs to be more general?)
     elt, lc = cc(indexer)
-    elt.ca[lc] = value
+    if hasattr(elt, 'ca'):
+        elt.ca[lc] = value
+    else:
+        elt.write(elt, lc, value)
 
 
 #------------------------------------------------------------------------
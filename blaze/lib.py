@@ -12,9 +12,9 @@ Anatomy of a Blaze Function Def
      @lift('Mul(<term>,<term>)', '(a,a) -> a', {
          'types'   : {'a': array_like},     <- Type Constraints
          'metadata': {'a': aligned, local}, <- Metadata Constraint
-     }, costfn)
+     }, cost=InMemory(flops=1))
      def multiply(a, b):
-         return np.multipy(a, b)
+         return np.multiply(a, b)
         |                     |
         +---------------------+
         Function Implementation
@@ -39,6 +39,13 @@ import numpy as np
 
 from blaze.funcs import lift
 from blaze import metadata as md
+from blaze.cost import InMemory, Chunked
+from blaze.expr import ops
+from blaze.expr.nodes import Node
+from blaze.expr.graph import injest_iterable
+from blaze.expr.evaluate import evaluate
+from blaze.desc.byteprovider import ByteProvider
+from blaze import carray as ca
 
 from blaze.metadata import aligned
 from blaze.expr.ops import array_like, table_like
@@ -102,42 +109,102 @@ def dot(a1, a2):
 # Arithmetic
 #------------------------------------------------------------------------
 
-@lift('Add(<term>,<term>)', '(a,a) -> a', {})
+# Every operation has an implementation over whole arrays in memory
+# and an out-of-core one over the chunks of its operands, the cheaper
+# for the operands at hand is used ( see ``blaze.cost`` ). Both take
+# the operands as they are given ( passthrough ), the in-memory ones
+# materialize them into NumPy arrays.
+
+def as_node(value):
+    """ ``value`` as a node of a deferred graph, manifest arrays are
+    wrapped without copying their data. """
+    from blaze.table import NDArray
+    if isinstance(value, Node):
+        return value
+    if isinstance(getattr(value, 'data', None), ByteProvider):
+        return NDArray(value.data, dshape=value.datashape)
+    if isinstance(value, (np.ndarray, ca.carray)):
+        return NDArray(value)
+    node, = injest_iterable([value])
+    return node
+
+def materialize(value):
+    """ The data of a manifest array as a NumPy array, other values
+    ( scalars, NumPy arrays ) are returned as they are. """
+    data = getattr(value, 'data', None)
+    if isinstance(data, ByteProvider):
+        if hasattr(data, 'ca'):
+            return data.ca[:]
+        if hasattr(data, 'na'):
+            return data.na
+    return value
+
+def streamed(op, *args):
+    """ Apply ``op`` chunk by chunk, the result is a carray. """
+    return evaluate(op(op.__name__, [as_node(arg) for arg in args]), small=0)
+
+@lift('Add(<term>,<term>)', '(a,a) -> a', dict(
+    passthrough = True
+), cost=InMemory(flops=1))
 def add(a, b):
-    from blaze import zeros
-
-    ds_a, dd_a = a
-    ds_b, dd_b = b
-    out = zeros(ds_a)
+    return np.add(materialize(a), materialize(b))
 
-    iters = [desc.as_chunked_iterator() for desc in [dd_a, dd_b]]
-    for a,b in zip(*iters):
-        pass
-    return out
+@lift('Add(<term>,<term>)', '(a,a) -> a', dict(
+    passthrough = True
+), cost=Chunked(flops=1))
+def add_chunked(a, b):
+    return streamed(ops.Add, a, b)
 
 
-@lift('Mul(<term>,<term>)', '(a,a)-> a', {
-    'types'   : {'a': array_like},
-    'metadata': {},
-})
+@lift('Mul(<term>,<term>)', '(a,a)-> a', dict(
+    types = {'a': array_like},
+    metadata = {},
+    passthrough = True
+), cost=InMemory(flops=1))
 def multiply(a, b):
-    return np.multipy(a, b)
+    return np.multiply(materialize(a), materialize(b))
+
+@lift('Mul(<term>,<term>)', '(a,a)-> a', dict(
+    types = {'a': array_like},
+    metadata = {},
+    passthrough = True
+), cost=Chunked(flops=1))
+def multiply_chunked(a, b):
+    return streamed(ops.Mul, a, b)
 
 
-@lift('Pow(<term>,<term>)', '(a,a) -> a', {
-    'types'   : {'a': array_like},
-    'metadata': {},
-})
+@lift('Pow(<term>,<term>)', '(a,a) -> a', dict(
+    types = {'a': array_like},
+    metadata = {},
+    passthrough = True
+), cost=InMemory(flops=10))
 def power(a, b):
-    return np.power(a, b)
+    return np.power(materialize(a), materialize(b))
 
+@lift('Pow(<term>,<term>)', '(a,a) -> a', dict(
+    types = {'a': array_like},
+    metadata = {},
+    passthrough = True
+), cost=Chunked(flops=10))
+def power_chunked(a, b):
+    return streamed(ops.Pow, a, b)
 
-@lift('Abs(<term>)', 'a -> a', {
-    'types'   : {'a': array_like},
-    'metadata': {},
-})
-def abs(a, b):
-    return np.abs(a, b)
+
+@lift('Abs(<term>)', 'a -> a', dict(
+    types = {'a': array_like},
+    metadata = {},
+    passthrough = True
+), cost=InMemory(flops=1))
+def abs(a):
+    return np.abs(materialize(a))
+
+@lift('Abs(<term>)', 'a -> a', dict(
+    types = {'a': array_like},
+    metadata = {},
+    passthrough = True
+), cost=Chunked(flops=1))
+def abs_chunked(a):
+    return streamed(ops.Abs, a)
 
 
 __all__ = [
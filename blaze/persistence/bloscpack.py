@@ -23,7 +23,10 @@ import math
 import zlib
 import hashlib
 import itertools
-from collections import OrderedDict
+import threading
+import Queue
+from collections import OrderedDict, deque
+from multiprocessing.pool import ThreadPool
 import blosc
 import numpy as np
 import json
@@ -636,14 +639,134 @@ def process_nthread_arg(args):
     print_verbose('using %d thread%s' %
             (args.nthreads, 's' if args.nthreads > 1 else ''))
 
+#------------------------------------------------------------------------
+# Codec pipelines
+#------------------------------------------------------------------------
+
+# The number of chunks in flight per thread of a codec pipeline
+PIPELINE_DEPTH = 2
+
+# The pipelines running, blosc uses a single thread meanwhile
+_pipelines_lock = threading.Lock()
+_pipelines = 0
+_blosc_nthreads = None
+
+def acquire_codec():
+    """ Leave the parallelism to the pipeline threads, instead of
+    running 'nthreads' blosc threads for each of them. """
+    global _pipelines, _blosc_nthreads
+    with _pipelines_lock:
+        if _pipelines == 0:
+            _blosc_nthreads = blosc.set_nthreads(1)
+        _pipelines += 1
+
+def release_codec():
+    """ Give blosc back its threads once the last pipeline is done. """
+    global _pipelines
+    with _pipelines_lock:
+        _pipelines -= 1
+        if _pipelines == 0 and _blosc_nthreads is not None:
+            blosc.set_nthreads(_blosc_nthreads)
+
+def pipeline(func, items, nthreads):
+    """ Apply 'func' to 'items' in a pool of 'nthreads' threads.
+
+    The results are yielded in the order of 'items', and at most
+    PIPELINE_DEPTH items per thread are in flight, so 'items' can be a
+    lazy iterable larger than the memory.  While the pool runs, blosc
+    itself is set to a single thread; with one thread the pipeline runs
+    in the caller and blosc keeps its own threads.
+
+    """
+    if nthreads <= 1:
+        for item in items:
+            yield func(item)
+        return
+    acquire_codec()
+    pool = ThreadPool(nthreads)
+    try:
+        pending = deque()
+        for item in items:
+            pending.append(pool.apply_async(func, (item,)))
+            if len(pending) >= PIPELINE_DEPTH * nthreads:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+        release_codec()
+
+class ChunkWriter(threading.Thread):
+    """ Thread writing compressed chunks to a file, in the order they are
+    put, while the next ones are being compressed.
+
+    Parameters
+    ----------
+    output_fp : file
+        the file, positioned where the first chunk goes
+    offsets_storage : list or None
+        filled with the offset of every chunk if given
+
+    """
+
+    def __init__(self, output_fp, offsets_storage=None,
+                 maxsize=PIPELINE_DEPTH):
+        super(ChunkWriter, self).__init__(name='bloscpack-writer')
+        self.daemon = True
+        self.output_fp = output_fp
+        self.offsets_storage = offsets_storage
+        self.queue = Queue.Queue(maxsize)
+        self.exc_info = None
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.exc_info is not None:
+                # Drain the queue, the error is raised by put()
+                continue
+            i, compressed, digest = item
+            try:
+                if self.offsets_storage is not None:
+                    self.offsets_storage[i] = self.output_fp.tell()
+                self.output_fp.write(compressed)
+                self.output_fp.write(digest)
+            except Exception:
+                self.exc_info = sys.exc_info()
+
+    def check(self):
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+
+    def put(self, i, compressed, digest):
+        """ Queue chunk 'i' for writing. """
+        self.check()
+        self.queue.put((i, compressed, digest))
+
+    def close(self):
+        """ Wait until the queued chunks are written. """
+        self.queue.put(None)
+        self.join()
+
+def default_nthreads():
+    """ One pipeline thread per core ( blosc is single threaded
+    meanwhile, see 'pipeline' ). """
+    return blosc.ncores
+
 def pack_list(in_list, meta_info, out_file, blosc_args,
-              offsets=DEFAULT_OFFSETS, checksum=DEFAULT_CHECKSUM):
+              offsets=DEFAULT_OFFSETS, checksum=DEFAULT_CHECKSUM,
+              nthreads=None):
     """ Main function for compressing a list of buffers.
 
+    The chunks are compressed and checksummed by a pool of threads,
+    while a writer thread writes them to the file in order.
+
     Parameters
     ----------
-    in_list : list
-        the list of buffers
+    in_list : sequence
+        the list of buffers (anything supporting the buffer interface)
     meta_info : dict
         dictionary with the associated metainfo
     out_file : str
@@ -654,6 +777,8 @@ def pack_list(in_list, meta_info, out_file, blosc_args,
         Wheather to include offsets.
     checksum : str
         Which checksum to use.
+    nthreads : int
+        The number of compressing threads, one per core by default.
 
     """
     # XXX Check for empty lists
@@ -665,6 +790,7 @@ def pack_list(in_list, meta_info, out_file, blosc_args,
     print_verbose('input file size: %s' % double_pretty_size(in_list_size))
     # calculate header
     options = create_options(offsets=offsets)
+    offsets_storage = None
     if offsets:
         offsets_storage = list(itertools.repeat(0, nchunks))
     # set the checksum impl
@@ -679,40 +805,43 @@ def pack_list(in_list, meta_info, out_file, blosc_args,
         )
     print_verbose('raw_bloscpack_header: %s' % repr(raw_bloscpack_header),
                   level=DEBUG)
+
+    # The chunks are compressed concurrently when blosc releases the GIL,
+    # and the writing overlaps the compression in any case
+    def compress(chunk):
+        compressed = blosc.compress(chunk, **blosc_args)
+        # the checksum is computed on the compressed data
+        return len(chunk), compressed, checksum_impl(compressed)
+
     # write the chunks to the file
     with open(out_file, 'wb') as output_fp:
         output_fp.write(raw_bloscpack_header)
         # preallocate space for the offsets
         if offsets:
             output_fp.write(encode_int64(-1) * nchunks)
-        # if nchunks == 1 the last_chunk_size is the size of the single chunk
-        for i in xrange(nchunks):
-            # store the current position in the file
-            if offsets:
-                offsets_storage[i] = output_fp.tell()
-            current_chunk = in_list[i]
-            # do compression
-            compressed = blosc.compress(current_chunk, **blosc_args)
-            # write compressed data
-            output_fp.write(compressed)
-            print_verbose("chunk '%d'%s written, in: %s out: %s ratio: %s" %
-                    (i, ' (last)' if i == nchunks - 1 else '',
-                    double_pretty_size(len(current_chunk)),
-                    double_pretty_size(len(compressed)),
-                    "%0.3f" % (len(compressed) / len(current_chunk))
-                    if len(current_chunk) != 0 else "N/A"),
-                    level=DEBUG)
-            tail_mess = ""
-            if checksum_impl.size > 0:
-                # compute the checksum on the compressed data
-                digest = checksum_impl(compressed)
-                # write digest
-                output_fp.write(digest)
-                tail_mess += ('checksum (%s): %s ' % (checksum, repr(digest)))
-            if offsets:
-                tail_mess += ("offset: '%d'" % offsets_storage[i])
-            if len(tail_mess) > 0:
-                print_verbose(tail_mess, level=DEBUG)
+        writer = ChunkWriter(output_fp, offsets_storage)
+        writer.start()
+        try:
+            # if nchunks == 1 the last_chunk_size is the size of the single
+            # chunk
+            chunks = pipeline(compress, in_list,
+                              nthreads or default_nthreads())
+            for i, (size, compressed, digest) in enumerate(chunks):
+                writer.put(i, compressed, digest)
+                print_verbose("chunk '%d'%s compressed, in: %s out: %s "
+                        "ratio: %s" %
+                        (i, ' (last)' if i == nchunks - 1 else '',
+                        double_pretty_size(size),
+                        double_pretty_size(len(compressed)),
+                        "%0.3f" % (len(compressed) / size)
+                        if size != 0 else "N/A"),
+                        level=DEBUG)
+                if checksum_impl.size > 0:
+                    print_verbose('checksum (%s): %s ' %
+                            (checksum, repr(digest)), level=DEBUG)
+        finally:
+            writer.close()
+        writer.check()
         if offsets:
             # seek to 32 bits into the file
             output_fp.seek(BLOSCPACK_HEADER_LENGTH, 0)
@@ -730,78 +859,280 @@ def pack_list(in_list, meta_info, out_file, blosc_args,
     print_verbose('output file size: %s' % double_pretty_size(out_file_size))
     print_verbose('compression ratio: %f' % (out_file_size/in_list_size))
 
-def unpack_file(in_file):
-    """ Main function for decompressing a file.  Returns a list of buffers.
+def encode_dtype(dtype):
+    """ The JSON compatible description of a dtype. """
+    dtype = np.dtype(dtype)
+    if dtype.fields is None and dtype.subdtype is None:
+        return dtype.str
+    return dtype.descr
+
+def decode_dtype(descr):
+    """ The dtype of a description made by 'encode_dtype'. """
+    def field(f):
+        # JSON turned the tuples into lists
+        f = list(f)
+        if isinstance(f[1], list):
+            f[1] = [field(sub) for sub in f[1]]
+        if len(f) > 2:
+            f[2] = tuple(f[2])
+        return tuple(str(x) if isinstance(x, unicode) else x for x in f)
+    if isinstance(descr, basestring):
+        return np.dtype(str(descr))
+    return np.dtype([field(f) for f in descr])
+
+def pack_array(array, out_file, blosc_args=None,
+               chunk_size=DEFAULT_CHUNK_SIZE, offsets=DEFAULT_OFFSETS,
+               checksum=DEFAULT_CHECKSUM, nthreads=None, meta_info=None):
+    """ Compress a NumPy array ( or a memory map ) into a file.
+
+    The chunks are views of the array, which is never copied unless
+    it is not contiguous.  The dtype and shape are stored in the
+    metainfo, so that 'BloscpackReader.toarray' can restore it.
+
+    Parameters
+    ----------
+    array : ndarray
+        the array
+    out_file : str
+        the name of the output file
+    blosc_args : dict
+        dictionary of blosc keyword args, the typesize defaults to the
+        itemsize of the array
+    chunk_size : int or str
+        the size of the chunks in bytes, or a size like '1M'
+    meta_info : dict
+        additional metainfo
+
+    """
+    array = np.ascontiguousarray(array)
+    itemsize = array.dtype.itemsize
+    if isinstance(chunk_size, basestring):
+        chunk_size = reverse_pretty(chunk_size)
+    # whole items per chunk
+    chunk_size = max(chunk_size // itemsize, 1) * itemsize
+
+    args = dict(DEFAULT_BLOSC_ARGS)
+    args['typesize'] = itemsize if itemsize <= blosc.BLOSC_MAX_TYPESIZE else 1
+    args.update(blosc_args or {})
+
+    meta = dict(meta_info or {})
+    meta.update({'dtype': encode_dtype(array.dtype),
+                 'shape': list(array.shape)})
+    nbytes = array.nbytes
+    chunks = [buffer(array, start, chunk_size)
+              for start in xrange(0, nbytes, chunk_size)] or [buffer('')]
+    pack_list(chunks, meta, out_file, args, offsets=offsets,
+              checksum=checksum, nthreads=nthreads)
+
+class BloscpackReader(object):
+    """ Streaming reader of a Bloscpack file.
+
+    The chunks are read sequentially and decompressed ( their checksum
+    verified ) by a pool of threads, or read one at a time through the
+    offsets table.  Files without offsets are scanned for them.
 
     Parameters
     ----------
     in_file : str
         the name of the input file
+
     """
-    out_list = []
-    in_file_size = path.getsize(in_file)
-    print_verbose('input file size: %s' % pretty_size(in_file_size))
-    with open(in_file, 'rb') as input_fp:
-        # read the bloscpack header
+
+    def __init__(self, in_file):
+        self.in_file = in_file
+        self.input_fp = open(in_file, 'rb')
+        try:
+            self._read_header()
+        except:
+            self.input_fp.close()
+            raise
+
+    def _read_header(self):
+        input_fp = self.input_fp
         print_verbose('reading bloscpack header', level=DEBUG)
         bloscpack_header_raw = input_fp.read(BLOSCPACK_HEADER_LENGTH)
         print_verbose('bloscpack_header_raw: %s' %
                 repr(bloscpack_header_raw), level=DEBUG)
-        bloscpack_header = decode_bloscpack_header(bloscpack_header_raw)
-        for arg, value in bloscpack_header.iteritems():
-            # hack the values of the bloscpack header into the namespace
-            globals()[arg] = value
+        self.header = header = decode_bloscpack_header(bloscpack_header_raw)
+        for arg, value in header.iteritems():
             print_verbose('\t%s: %s' % (arg, value), level=DEBUG)
-        checksum_impl = CHECKSUMS[checksum]
-        if FORMAT_VERSION != format_version:
-            error("format version of file was not '%s' as expected, but '%d'" %
-                    (FORMAT_VERSION, format_version))
+        if FORMAT_VERSION != header['format_version']:
+            raise ValueError(
+                "format version of file was not '%s' as expected, but '%d'"
+                % (FORMAT_VERSION, header['format_version']))
+        self.nchunks = nchunks = header['nchunks']
+        self.chunk_size = header['chunk_size']
+        self.checksum_impl = CHECKSUMS[header['checksum']]
         # read the offsets
-        options = decode_options(bloscpack_header['options'])
+        options = decode_options(header['options'])
         if options['offsets']:
             offsets_raw = input_fp.read(8 * nchunks)
             print_verbose('Read raw offsets: %s' % repr(offsets_raw),
                     level=DEBUG)
-            offset_storage = [decode_int64(offsets_raw[j-8:j]) for j in
+            self.offsets = [decode_int64(offsets_raw[j-8:j]) for j in
                     xrange(8, nchunks*8+1, 8)]
-            print_verbose('Offsets: %s' % offset_storage, level=DEBUG)
-        # decompress
-        for i in range(nchunks):
-            print_verbose("decompressing chunk '%d'%s" %
-                    (i, ' (last)' if i == nchunks-1 else ''), level=DEBUG)
-            # read blosc header
-            blosc_header_raw = input_fp.read(BLOSC_HEADER_LENGTH)
-            blosc_header = decode_blosc_header(blosc_header_raw)
-            print_verbose('blosc_header: %s' % repr(blosc_header), level=DEBUG)
-            ctbytes = blosc_header['ctbytes']
-            # Seek back BLOSC_HEADER_LENGTH bytes in file relative to current
-            # position. Blosc needs the header too and presumably this is
-            # better than to read the whole buffer and then concatenate it...
-            input_fp.seek(-BLOSC_HEADER_LENGTH, 1)
-            # read chunk
-            compressed = input_fp.read(ctbytes)
-            if checksum_impl.size > 0:
-                # do checksum
-                expected_digest = input_fp.read(checksum_impl.size)
-                received_digest = checksum_impl(compressed)
-                if received_digest != expected_digest:
-                    raise ChecksumMismatch(
-                            "Checksum mismatch detected in chunk '%d' " % i +
-                            "expected: '%s', received: '%s'" %
-                            (repr(expected_digest), repr(received_digest)))
-                else:
-                    print_verbose('checksum OK (%s): %s ' %
-                            (checksum_impl.name, repr(received_digest)),
-                            level=DEBUG)
-            # if checksum OK, decompress buffer
-            decompressed = blosc.decompress(compressed)
-            # write decompressed chunk
-            out_list.append(decompressed)
-            print_verbose("chunk append, in: %s out: %s" %
-                          (pretty_size(len(compressed)),
-                           pretty_size(len(decompressed))), level=DEBUG)
-        # we are at the end of the data area. read the metadata appendix.
-        meta_info = json.load(input_fp)
+        else:
+            self.offsets = self._scan(input_fp.tell())
+        print_verbose('Offsets: %s' % self.offsets, level=DEBUG)
+        if nchunks:
+            self.data_end = self.offsets[-1] + self._read_ctbytes(nchunks-1) + \
+                self.checksum_impl.size
+        else:
+            self.data_end = input_fp.tell()
+
+    def _read_ctbytes(self, i):
+        self.input_fp.seek(self.offsets[i])
+        blosc_header = decode_blosc_header(
+            self.input_fp.read(BLOSC_HEADER_LENGTH))
+        print_verbose('blosc_header: %s' % repr(blosc_header), level=DEBUG)
+        return blosc_header['ctbytes']
+
+    def _scan(self, position):
+        """ The offsets of the chunks, walking their headers. """
+        offsets = []
+        for i in xrange(self.nchunks):
+            offsets.append(position)
+            self.input_fp.seek(position)
+            blosc_header = decode_blosc_header(
+                self.input_fp.read(BLOSC_HEADER_LENGTH))
+            position += blosc_header['ctbytes'] + self.checksum_impl.size
+        return offsets
+
+    def __len__(self):
+        return self.nchunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.input_fp.close()
+
+    @property
+    def meta_info(self):
+        """ The metadata appendix. """
+        self.input_fp.seek(self.data_end)
+        return json.load(self.input_fp)
+
+    def read_compressed(self, i):
+        """ The compressed chunk 'i' and its stored digest. """
+        if not 0 <= i < self.nchunks:
+            raise IndexError("chunk '%d' out of range" % i)
+        ctbytes = self._read_ctbytes(i)
+        # Blosc needs the header too
+        self.input_fp.seek(self.offsets[i])
+        compressed = self.input_fp.read(ctbytes)
+        digest = self.input_fp.read(self.checksum_impl.size)
+        return i, compressed, digest
+
+    def verify(self, chunk):
+        """ Check the digest of a chunk returned by 'read_compressed'. """
+        i, compressed, expected_digest = chunk
+        if self.checksum_impl.size > 0:
+            received_digest = self.checksum_impl(compressed)
+            if received_digest != expected_digest:
+                raise ChecksumMismatch(
+                        "Checksum mismatch detected in chunk '%d' " % i +
+                        "expected: '%s', received: '%s'" %
+                        (repr(expected_digest), repr(received_digest)))
+
+    def decompress(self, chunk):
+        """ Verify and decompress a chunk returned by 'read_compressed'. """
+        self.verify(chunk)
+        return blosc.decompress(chunk[1])
+
+    def read_chunk(self, i):
+        """ The decompressed chunk 'i'. """
+        return self.decompress(self.read_compressed(i))
+
+    def iterchunks(self, nthreads=None):
+        """ Iterate over the decompressed chunks, in order. """
+        compressed = (self.read_compressed(i) for i in xrange(self.nchunks))
+        return pipeline(self.decompress, compressed,
+                        nthreads or default_nthreads())
+
+    def __iter__(self):
+        return self.iterchunks()
+
+    def _array_type(self, dtype, shape):
+        meta_info = None
+        if dtype is None or shape is None:
+            meta_info = self.meta_info
+        if dtype is None:
+            dtype = decode_dtype(meta_info['dtype'])
+        if shape is None:
+            shape = tuple(meta_info['shape'])
+        return np.dtype(dtype), shape
+
+    def toarray(self, dtype=None, shape=None, out=None, nthreads=None):
+        """ Decompress the file into a NumPy array.
+
+        The dtype and shape default to those stored by 'pack_array'.
+        The chunks are decompressed straight into 'out' ( a new array by
+        default ) when blosc supports it, and copied there otherwise.
+        'out' must be C-contiguous.
+
+        """
+        dtype, shape = self._array_type(dtype, shape)
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif not out.flags.c_contiguous:
+            # Its flat view would be a copy, left unfilled
+            raise ValueError("'out' must be a C-contiguous array")
+        raw = out.reshape(-1).view(np.uint8)
+        nbytes = 0
+        if self.nchunks:
+            nbytes = (self.nchunks - 1) * self.chunk_size + \
+                self.header['last_chunk']
+        if len(raw) != nbytes:
+            raise ValueError("the file holds %d bytes, the array %d" %
+                             (nbytes, len(raw)))
+
+        if hasattr(blosc, 'decompress_ptr'):
+            def decompress(chunk):
+                self.verify(chunk)
+                blosc.decompress_ptr(chunk[1], raw[chunk[0]*self.chunk_size:]
+                                     .ctypes.data)
+        else:
+            def decompress(chunk):
+                data = self.decompress(chunk)
+                start = chunk[0] * self.chunk_size
+                raw[start:start+len(data)] = np.frombuffer(data, np.uint8)
+        compressed = (self.read_compressed(i) for i in xrange(self.nchunks))
+        for _ in pipeline(decompress, compressed,
+                          nthreads or default_nthreads()):
+            pass
+        return out
+
+    def tocarray(self, nthreads=None, **kwargs):
+        """ Decompress the file into a carray, 'kwargs' are passed to the
+        carray constructor. """
+        from blaze.carray import carray
+        return carray(self.toarray(nthreads=nthreads), **kwargs)
+
+def unpack_file(in_file, nthreads=None):
+    """ Main function for decompressing a file.  Returns a list of buffers.
+
+    The chunks are decompressed by a pool of threads, while the next
+    ones are read.  Use 'BloscpackReader' to stream the chunks, or to
+    read them one at a time.
+
+    Parameters
+    ----------
+    in_file : str
+        the name of the input file
+    nthreads : int
+        The number of decompressing threads, one per core by default.
+
+    """
+    in_file_size = path.getsize(in_file)
+    print_verbose('input file size: %s' % pretty_size(in_file_size))
+    with BloscpackReader(in_file) as reader:
+        out_list = list(reader.iterchunks(nthreads))
+        # the metadata appendix follows the data area
+        meta_info = reader.meta_info
     out_list_size = sum(len(b) for b in out_list)
     print_verbose('output file size: %s' % pretty_size(out_list_size))
     print_verbose('decompression ratio: %f' % (out_list_size/in_file_size))
@@ -838,7 +1169,8 @@ if __name__ == '__main__':
         process_nthread_arg(args)
         try:
             pack_list(LIST_TO_PERSIST, META_TO_PERSIST, out_file, blosc_args,
-                      offsets=args.offsets, checksum=args.checksum)
+                      offsets=args.offsets, checksum=args.checksum,
+                      nthreads=args.nthreads)
         except ChunkingException as e:
             error(e.message)
     elif args.subcommand in ['decompress', 'd']:
@@ -850,7 +1182,7 @@ if __name__ == '__main__':
             error(str(fnf))
         process_nthread_arg(args)
         try:
-            out_list, meta_info = unpack_file(in_file)
+            out_list, meta_info = unpack_file(in_file, args.nthreads)
         except ValueError as ve:
             error(ve.message)
         # Compare out buffers against the originals
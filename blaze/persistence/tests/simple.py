@@ -1,6 +1,9 @@
 from blaze.carray import carray, cparams
-from bloscpack import pack_list, unpack_file
+from bloscpack import pack_list, pack_array, unpack_file, BloscpackReader, \
+    pipeline
 from numpy import array, frombuffer
+import numpy as np
+import blosc
 
 def test_simple():
     filename = 'output'
@@ -27,3 +30,69 @@ def test_compressed():
 
     assert out_list[0] == ca[0]
     assert out_list[1] == ca[1]
+
+def test_pack_array():
+    filename = 'output'
+
+    arr = np.arange(100000, dtype=np.float64).reshape(1000, 100)
+    pack_array(arr, filename, chunk_size=10000, nthreads=4)
+
+    with BloscpackReader(filename) as reader:
+        # whole items per chunk
+        assert reader.chunk_size == 10000 - 10000 % 8
+        assert reader.meta_info['shape'] == [1000, 100]
+        out = reader.toarray(nthreads=4)
+        assert out.dtype == arr.dtype
+        assert (out == arr).all()
+
+        # into a given array, which must be contiguous
+        out = np.empty((1000, 100))
+        assert reader.toarray(out=out) is out
+        assert (out == arr).all()
+        try:
+            reader.toarray(out=np.empty((100, 1000)).T)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('non-contiguous out is not rejected')
+
+def test_records():
+    filename = 'output'
+
+    arr = np.array([(i, 'x' * (i % 5)) for i in xrange(5000)],
+                   dtype=[('a', np.int32), ('b', 'S4')])
+    pack_array(arr, filename, chunk_size=1000, nthreads=1)
+
+    with BloscpackReader(filename) as reader:
+        out = reader.toarray()
+        assert out.dtype == arr.dtype
+        assert (out == arr).all()
+
+def test_streaming():
+    filename = 'output'
+
+    arr = np.arange(100000, dtype=np.int64)
+    pack_array(arr, filename, chunk_size=8000, offsets=False)
+
+    with BloscpackReader(filename) as reader:
+        assert len(reader) == 100
+        # random access through the scanned offsets
+        chunk = frombuffer(reader.read_chunk(42), dtype=np.int64)
+        assert (chunk == arr[42000:43000]).all()
+        chunks = [frombuffer(c, dtype=np.int64) for c in reader.iterchunks(3)]
+        assert (np.concatenate(chunks) == arr).all()
+
+    out_list, meta_info = unpack_file(filename, nthreads=2)
+    assert len(out_list) == 100
+    assert meta_info['dtype'] == '<i8'
+
+def test_pipeline_codec_threads():
+    previous = blosc.set_nthreads(3)
+    try:
+        # blosc runs single threaded under the pipeline threads
+        probe = lambda i: blosc.set_nthreads(1)
+        assert list(pipeline(probe, range(8), 2)) == [1] * 8
+        # and gets its threads back afterwards
+        assert blosc.set_nthreads(3) == 3
+    finally:
+        blosc.set_nthreads(previous)
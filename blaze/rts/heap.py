@@ -39,6 +39,7 @@ import weakref
 import traceback
 import threading
 import itertools
+import collections
 import numpy as np
 
 from blaze.cutils import buffer_pointer
@@ -54,12 +55,48 @@ ALIGN_L2 = 2**17
 ALIGN_L3 = 2**20
 ALIGN_PAGE = mmap.PAGESIZE
 
+# Every block is aligned at least on a cache line, which is also enough
+# for the widest SIMD loads
+CACHE_LINE = 64
+
+# Blocks bigger than this get an arena of their own, which is dropped
+# when they are freed
+LARGE_BLOCK = 2**20
+
+# Slabs are at least this big, and hold at least SLAB_BLOCKS blocks
+SLAB_SIZE = 2**18
+SLAB_BLOCKS = 4
+
+# Bytes of freed blocks kept by every thread, per size class
+THREAD_CACHE = 2**20
+
+# Empty slabs kept per size class, the others are dropped
+KEEP_EMPTY = 1
+
+def roundup(n, alignment):
+    mask = alignment - 1
+    return (n + mask) & ~mask
+
+def size_class(size):
+    """
+    The size of the blocks serving requests of ``size`` bytes: multiples
+    of the cache line up to 512 bytes, then four classes per power of
+    two, so at most 25% of a block is wasted.
+    """
+    if size <= 512:
+        return max(CACHE_LINE, roundup(size, CACHE_LINE))
+    step = 1 << ((size - 1).bit_length() - 3)
+    return roundup(size, step)
+
 #------------------------------------------------------------------------
 # Arenas
 #------------------------------------------------------------------------
 
 class Arena(object):
 
+    # The size of the blocks of slabs, None for a single block
+    blocksize = None
+
     def __init__(self, size, name=None):
         # malloc but with \x00
         self.block = mmap.mmap(-1, size)
@@ -67,124 +104,287 @@ class Arena(object):
         self.size = size
         self.name = None
 
+    @property
+    def address(self):
+        return buffer_pointer(self.block)[0]
+
     def write_raw(self, by):
         assert isinstance(by, bytes)
 
+class Slab(Arena):
+    """ An arena cut into blocks of a single size. """
+
+    def __init__(self, blocksize):
+        nblocks = max(SLAB_BLOCKS, SLAB_SIZE // blocksize)
+        Arena.__init__(self, roundup(nblocks * blocksize, ALIGN_PAGE))
+
+        self.blocksize = blocksize
+        self.used = 0
+        self.released = False
+        # Lowest addresses first
+        self.free = [(self, start, start + blocksize) for start in
+                     reversed(xrange(0, self.size - blocksize + 1, blocksize))]
+        self.nblocks = len(self.free)
+
+class SizeClass(object):
+
+    def __init__(self, blocksize):
+        self.blocksize = blocksize
+        # Slabs with free blocks, the last is allocated from first.
+        # Released slabs are skipped and dropped lazily.
+        self.slabs = []
+        self.empty = 0
+
+class ThreadCache(object):
+    """ The blocks freed by a thread, reused without locking. """
+
+    def __init__(self, heap):
+        self.heap = weakref.ref(heap)
+        self.blocks = {}
+        self.mallocs = self.frees = self.hits = 0
+
+    def __del__(self):
+        # The thread is gone, hand its blocks back
+        heap = self.heap()
+        if heap is not None:
+            for blocks in self.blocks.itervalues():
+                heap._pending.extend(blocks)
+
 #------------------------------------------------------------------------
 # Heap
 #------------------------------------------------------------------------
 
 class Heap(object):
+    """
+    A size-class allocator. Small blocks are carved out of slabs holding
+    blocks of a single size, so allocating and freeing is a list pop or
+    append, and every thread keeps the blocks it frees for its next
+    allocations without taking the heap lock. Big blocks are mapped on
+    their own.
 
-    _alignment = 8
+    Slabs left empty are dropped ( see ``trim`` ), their memory goes back
+    to the OS once the arrays still viewing it are gone.
+    """
 
     def __init__(self, size=mmap.PAGESIZE, align=ALIGN_PAGE):
         self.align = align
 
         self._lock = threading.Lock()
-        self._size = size
-        self._lengths = []
-        self._len_to_seq = {}
-        self._start_to_block = {}
-        self._stop_to_block = {}
+        self._local = threading.local()
+        self._caches = weakref.WeakValueDictionary()
+        self._classes = {}
         self._allocated_blocks = set()
-        self._arenas = []
+        self._arenas = set()
+        self._pending = collections.deque()
         self._finalizers = {}
+        self._nbytes = self._peak = 0
 
     @staticmethod
     def _roundup(n, alignment):
-        mask = alignment - 1
-        return (n + mask) & ~mask
+        return roundup(n, alignment)
 
-    def free(self, block):
-        # free a block returned by malloc()
-        self._lock.acquire()
+    def _cache(self):
         try:
-            self._allocated_blocks.remove(block)
-            self._free(block)
-        finally:
-            self._lock.release()
-
-    def malloc(self, size):
+            return self._local.cache
+        except AttributeError:
+            cache = self._local.cache = ThreadCache(self)
+            self._caches[threading.current_thread().ident] = cache
+            return cache
+
+    def malloc(self, size, align=CACHE_LINE):
+        """
+        Return a block of at least ``size`` bytes, aligned on ``align``
+        bytes ( a power of two, up to the page size ), as a tuple
+        ``(arena, start, stop)``.
+        """
         # return a block of right size (possibly rounded up)
         assert 0 <= size < sys.maxint
-        self._lock.acquire()
-        try:
-            size = self._roundup(max(size,1), self._alignment)
-            (arena, start, stop) = self._malloc(size)
-            new_stop = start + size
-            if new_stop < stop:
-                self._free((arena, new_stop, stop))
-            block = (arena, start, new_stop)
-            self._allocated_blocks.add(block)
-            return block
-        finally:
-            self._lock.release()
+        if align > ALIGN_PAGE:
+            raise ValueError("blocks are aligned up to the page size")
 
-    def _malloc(self, size):
-        i = bisect.bisect_left(self._lengths, size)
-        if i == len(self._lengths):
-            length = self._roundup(max(self._size, size), self.align)
-            self._size *= 2
-            arena = Arena(length)
-            self._arenas.append(arena)
-            return (arena, 0, length)
+        cache = self._cache()
+        cache.mallocs += 1
+
+        size = size_class(roundup(max(size, 1), align))
+        if size > LARGE_BLOCK or size % align:
+            # Arenas are page aligned
+            block = self._locked(self._malloc_large, size)
         else:
-            length = self._lengths[i]
-            seq = self._len_to_seq[length]
-            block = seq.pop()
-            if not seq:
-                del self._len_to_seq[length], self._lengths[i]
-
-        (arena, start, stop) = block
-        del self._start_to_block[(arena, start)]
-        del self._stop_to_block[(arena, stop)]
+            blocks = cache.blocks.get(size)
+            if blocks:
+                block = blocks.pop()
+                cache.hits += 1
+            else:
+                block = self._locked(self._malloc, size)
+
+        self._allocated_blocks.add(block)
         return block
 
-    def _free(self, block):
-        # free location and try to merge with neighbours
-        (arena, start, stop) = block
-
-        try:
-            prev_block = self._stop_to_block[(arena, start)]
-        except KeyError:
-            pass
+    def free(self, block):
+        # free a block returned by malloc()
+        self._free_block(block, True)
+
+    def release(self, block):
+        """ Free a block from a finalizer, which may run while the heap
+        is locked. """
+        self._free_block(block, False)
+
+    def _free_block(self, block, wait):
+        self._allocated_blocks.remove(block)
+
+        cache = self._cache()
+        cache.frees += 1
+
+        size = block[0].blocksize
+        if size is not None:
+            blocks = cache.blocks.setdefault(size, [])
+            if len(blocks) < max(1, THREAD_CACHE // size):
+                blocks.append(block)
+                return
+
+        if self._lock.acquire(wait):
+            try:
+                self._drain()
+                self._free(block)
+            finally:
+                self._lock.release()
         else:
-            start, _ = self._absorb(prev_block)
+            self._pending.append(block)
 
+    def _locked(self, fn, *args):
+        self._lock.acquire()
         try:
-            next_block = self._start_to_block[(arena, stop)]
-        except KeyError:
-            pass
-        else:
-            _, stop = self._absorb(next_block)
+            self._drain()
+            return fn(*args)
+        finally:
+            self._lock.release()
 
-        block = (arena, start, stop)
-        length = stop - start
+    def _drain(self):
+        # blocks released while the heap was locked
+        while self._pending:
+            self._free(self._pending.popleft())
 
-        try:
-            self._len_to_seq[length].append(block)
-        except KeyError:
-            self._len_to_seq[length] = [block]
-            bisect.insort(self._lengths, length)
+    def _mapped(self, arena):
+        self._arenas.add(arena)
+        self._nbytes += arena.size
+        self._peak = max(self._peak, self._nbytes)
 
-        self._start_to_block[(arena, start)] = block
-        self._stop_to_block[(arena, stop)] = block
+    def _unmapped(self, arena):
+        self._arenas.discard(arena)
+        self._nbytes -= arena.size
 
-    def _absorb(self, block):
-        # deregister this block so it can be merged with a neighbour
-        (arena, start, stop) = block
-        del self._start_to_block[(arena, start)]
-        del self._stop_to_block[(arena, stop)]
+    def _malloc_large(self, size):
+        arena = Arena(roundup(size, self.align))
+        self._mapped(arena)
+        return (arena, 0, size)
 
-        length = stop - start
-        seq = self._len_to_seq[length]
-        seq.remove(block)
-        if not seq:
-            del self._len_to_seq[length]
-            self._lengths.remove(length)
+    def _malloc(self, size):
+        try:
+            sc = self._classes[size]
+        except KeyError:
+            sc = self._classes[size] = SizeClass(size)
+
+        slabs = sc.slabs
+        while slabs and slabs[-1].released:
+            slabs.pop()
+        if not slabs:
+            slab = Slab(size)
+            self._mapped(slab)
+            slabs.append(slab)
+            sc.empty += 1
+
+        slab = slabs[-1]
+        if slab.used == 0:
+            sc.empty -= 1
+        slab.used += 1
+        block = slab.free.pop()
+        if not slab.free:
+            slabs.pop()
+        return block
 
-        return start, stop
+    def _free(self, block):
+        arena = block[0]
+        if arena.blocksize is None:
+            self._unmapped(arena)
+            return
+
+        slab = arena
+        sc = self._classes[slab.blocksize]
+        if not slab.free:
+            sc.slabs.append(slab)
+        slab.free.append(block)
+        slab.used -= 1
+
+        if slab.used == 0:
+            if sc.empty >= KEEP_EMPTY:
+                self._release(slab)
+            else:
+                sc.empty += 1
+
+    def _release(self, slab):
+        # the slab stays in the list of its size class until it is
+        # popped, but its memory is not referenced by the heap anymore
+        slab.released = True
+        slab.free = []
+        slab.block = None
+        self._unmapped(slab)
+
+    def trim(self):
+        """
+        Return the blocks cached by this thread to their slabs and drop
+        every empty slab. Returns the number of bytes dropped.
+        """
+        cache = self._cache()
+        self._lock.acquire()
+        try:
+            for blocks in cache.blocks.itervalues():
+                self._pending.extend(blocks)
+            cache.blocks.clear()
+            self._drain()
+
+            dropped = 0
+            for sc in self._classes.itervalues():
+                for slab in sc.slabs:
+                    if not slab.released and slab.used == 0:
+                        dropped += slab.size
+                        self._release(slab)
+                sc.slabs = [slab for slab in sc.slabs if not slab.released]
+                sc.empty = 0
+            return dropped
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        """ Allocation statistics of the heap, sizes are in bytes. """
+        caches = self._caches.values()
+        arenas = list(self._arenas)
+        blocks = list(self._allocated_blocks)
+
+        return {
+            'mapped'    : self._nbytes,
+            'peak'      : self._peak,
+            'allocated' : sum(stop - start for _, start, stop in blocks),
+            'blocks'    : len(blocks),
+            'cached'    : sum(b[0].blocksize for c in caches
+                              for bs in c.blocks.values() for b in bs),
+            'slabs'     : sum(1 for a in arenas if a.blocksize is not None),
+            'large'     : sum(1 for a in arenas if a.blocksize is None),
+            'mallocs'   : sum(c.mallocs for c in caches),
+            'frees'     : sum(c.frees for c in caches),
+            'hits'      : sum(c.hits for c in caches),
+        }
+
+_default_heap = None
+_default_lock = threading.Lock()
+
+def default_heap():
+    """ The heap of the runtime. """
+    global _default_heap
+    if _default_heap is None:
+        with _default_lock:
+            if _default_heap is None:
+                _default_heap = Heap()
+    return _default_heap
 
 #------------------------------------------------------------------------
 # Heap Objects
@@ -207,6 +407,27 @@ class Buffer(object):
     def get_size(self):
         return self._state[1]
 
+class Allocation(object):
+    """
+    The owner of a block handed out as a NumPy array. The views of the
+    array keep it alive, and the block is freed with the last of them.
+    """
+
+    def __init__(self, heap, block, dtype, shape):
+        arena, start, stop = block
+        self.heap = heap
+        self.block = block
+        self.__array_interface__ = {
+            'version' : 3,
+            'shape'   : tuple(shape),
+            'typestr' : dtype.str,
+            'descr'   : dtype.descr,
+            'data'    : (arena.address + start, False),
+        }
+
+    def __del__(self):
+        self.heap.release(self.block)
+
 def allocate_raw(heap, nbytes):
     buf = Buffer(nbytes, heap)
     address = buf.get_address()
@@ -216,28 +437,20 @@ def allocate_raw(heap, nbytes):
 
     return address, block, (ctypes.c_char*nbytes).from_address(address)
 
-def allocate_numpy(heap, dtype, shape):
+def allocate_numpy(heap, dtype, shape, align=CACHE_LINE):
     """ Allocate a NumPy array conforming to the given shape on the heap """
-    count = np.prod(shape)
-    size = dtype.itemsize * count
-    buf = Buffer(size, heap)
-    address = buf.get_address()
+    dtype = np.dtype(dtype)
+    shape = tuple(int(n) for n in np.atleast_1d(shape))
+    size = dtype.itemsize * int(np.prod(shape))
 
-    block, size = buf._state
-    arena, start, new_stop = block
+    block = heap.malloc(size, align)
+    arr = np.asarray(Allocation(heap, block, dtype, shape))
 
-    return address, np.frombuffer(arena.block, dtype, count)
+    return arr.ctypes.data, arr
 
 def allocate_carray(heap, dtype, chunksize):
     """ Allocate a buffer capable of holding a carray chunk """
-    size = dtype.itemsize * chunksize
-    buf = Buffer(size)
-    address = buf.get_address()
-
-    block, size = buf._state
-    arena, start, new_stop = block
-
-    return address, np.frombuffer(arena.block)
+    return allocate_numpy(heap, dtype, (chunksize,))
 
 def numpy_pointer(numpy_array, ctype=ctypes.c_void_p):
     return numpy_array.ctypes.data_as(ctype)
@@ -273,7 +486,7 @@ def finalize(heap):
         finalizer()
 
     if not error:
-        for block in heap._allocated_blocks:
+        for block in list(heap._allocated_blocks):
             heap.free(block)
     else:
         raise RuntimeError("Could not free blocks because finalizer failed")
@@ -5,56 +5,255 @@
 
 #define MAX_THREADS 128
 
+/* The body of a parallel loop over [start, stop) */
 typedef void (*kernel_t) (int, int, void* args);
 
+/* The body of a parallel reduction over [start, stop), returns the
+   partial result of the range */
+typedef double (*rkernel_t) (int, int, void* args);
+
+/* Reduction operators */
+#define REDUCE_NONE 0
+#define REDUCE_SUM  1
+#define REDUCE_PROD 2
+#define REDUCE_MIN  3
+#define REDUCE_MAX  4
+
+/* A range scheduled across the pool.  Threads grab chunks of the range
+   with an atomic increment of `next`, so faster threads take over the
+   work left by the slower ones. */
+typedef struct {
+    kernel_t     kernel;
+    rkernel_t    rkernel;
+    void        *args;
+    int          stop;
+    int          chunk;
+    int          op;
+    volatile int next;
+} job_t;
+
 typedef struct {
     int nthreads;
     pthread_t threads[MAX_THREADS];
+
+    pthread_mutex_t lock;
+    pthread_cond_t  wakeup;     /* a new job (or shutdown) is available */
+    pthread_cond_t  finished;   /* the workers are done with the job */
+
+    job_t        job;
+    unsigned int generation;    /* bumped for every new job */
+    int          running;       /* workers still busy with the job */
+    int          shutdown;
+
+    /* The partial reductions, one per thread (the caller is the last) */
+    double       partials[MAX_THREADS + 1];
+    int          has_partial[MAX_THREADS + 1];
 } runtime_t;
 
 typedef struct {
-    kernel_t     kernel;
-    void        *args;
-    volatile int done;
-} context_t;
+    runtime_t *rts;
+    int        id;
+} worker_t;
+
+void join_runtime(runtime_t *rts);
 
-void worker(context_t *context)
+static double combine(int op, double a, double b)
 {
+    switch (op) {
+    case REDUCE_PROD: return a * b;
+    case REDUCE_MIN:  return a < b ? a : b;
+    case REDUCE_MAX:  return a > b ? a : b;
+    default:          return a + b;
+    }
+}
+
+/* Run chunks of the current job until the range is exhausted */
+static void run_chunks(runtime_t *rts, int id)
+{
+    job_t *job = &rts->job;
+    int start, stop;
+    double value;
+
+    rts->has_partial[id] = 0;
+
+    for (;;) {
+        start = __sync_fetch_and_add(&job->next, job->chunk);
+        if (start >= job->stop)
+            break;
+        stop = start + job->chunk;
+        if (stop > job->stop)
+            stop = job->stop;
+
+        if (job->rkernel != NULL) {
+            value = job->rkernel(start, stop, job->args);
+            if (rts->has_partial[id])
+                rts->partials[id] = combine(job->op, rts->partials[id], value);
+            else
+                rts->partials[id] = value;
+            rts->has_partial[id] = 1;
+        } else {
+            job->kernel(start, stop, job->args);
+        }
+    }
+}
+
+static void *worker(void *arg)
+{
+    worker_t *self = (worker_t*)arg;
+    runtime_t *rts = self->rts;
+    unsigned int seen = 0;
+
+    for (;;) {
+        pthread_mutex_lock(&rts->lock);
+        while (!rts->shutdown && rts->generation == seen)
+            pthread_cond_wait(&rts->wakeup, &rts->lock);
+        if (rts->shutdown) {
+            pthread_mutex_unlock(&rts->lock);
+            break;
+        }
+        seen = rts->generation;
+        pthread_mutex_unlock(&rts->lock);
+
+        run_chunks(rts, self->id);
+
+        pthread_mutex_lock(&rts->lock);
+        if (--rts->running == 0)
+            pthread_cond_signal(&rts->finished);
+        pthread_mutex_unlock(&rts->lock);
+    }
+
+    free(self);
+    return NULL;
 }
 
 runtime_t *init_runtime(int nthreads)
 {
     int i;
-    runtime_t *rts = (runtime_t*)malloc(sizeof(runtime_t));
-    rts->nthreads = nthreads;
+    worker_t *w;
+    runtime_t *rts;
 
-    for (i = 0; i < rts->nthreads; i++ ) {
-        printf("Spawning threads %i\n", i);
-        pthread_create(&rts->threads[i], NULL, worker, NULL);
+    if (nthreads < 1)
+        nthreads = 1;
+    if (nthreads > MAX_THREADS)
+        nthreads = MAX_THREADS;
+
+    rts = (runtime_t*)calloc(1, sizeof(runtime_t));
+    if (rts == NULL)
+        return NULL;
+
+    pthread_mutex_init(&rts->lock, NULL);
+    pthread_cond_init(&rts->wakeup, NULL);
+    pthread_cond_init(&rts->finished, NULL);
+
+    for (i = 0; i < nthreads; i++ ) {
+        w = (worker_t*)malloc(sizeof(worker_t));
+        w->rts = rts;
+        w->id = i;
+        if (pthread_create(&rts->threads[i], NULL, worker, w) != 0) {
+            free(w);
+            break;
+        }
     }
+    rts->nthreads = i;
 
     return rts;
 }
 
-void destroy_runtime(runtime_t *rts)
+/* The number of worker threads actually started */
+int runtime_nthreads(runtime_t *rts)
 {
-    int i;
+    return rts->nthreads;
+}
 
-    for (i = 0; i < rts->nthreads; i++ ) {
-        pthread_cancel(rts->threads[i]);
+/* Schedule a job and run it, the calling thread takes part in it too.
+   Returns once every chunk is done (join barrier). */
+static void run_job(runtime_t *rts, int start, int stop, int chunk)
+{
+    int ntasks = rts->nthreads + 1;
+
+    if (chunk <= 0) {
+        /* A few chunks per thread, to balance the load */
+        chunk = (stop - start) / (4 * ntasks);
+        if (chunk < 1)
+            chunk = 1;
     }
 
-    free(rts);
+    pthread_mutex_lock(&rts->lock);
+    rts->job.stop = stop;
+    rts->job.chunk = chunk;
+    rts->job.next = start;
+    rts->running = rts->nthreads;
+    rts->generation++;
+    pthread_cond_broadcast(&rts->wakeup);
+    pthread_mutex_unlock(&rts->lock);
+
+    run_chunks(rts, rts->nthreads);
+
+    join_runtime(rts);
+}
+
+/* Run `kernel` over [start, stop) across the pool */
+void run_range(runtime_t *rts, kernel_t kernel, int start, int stop,
+               int chunk, void *args)
+{
+    if (start >= stop)
+        return;
+
+    rts->job.kernel = kernel;
+    rts->job.rkernel = NULL;
+    rts->job.args = args;
+    rts->job.op = REDUCE_NONE;
+    run_job(rts, start, stop, chunk);
 }
 
+/* Run `rkernel` over [start, stop) across the pool, and combine the
+   partial results with `op`.  Returns `neutral` for empty ranges. */
+double reduce_range(runtime_t *rts, rkernel_t rkernel, int start, int stop,
+                    int chunk, void *args, int op, double neutral)
+{
+    int i;
+    double result = neutral;
+
+    if (start >= stop)
+        return neutral;
+
+    rts->job.kernel = NULL;
+    rts->job.rkernel = rkernel;
+    rts->job.args = args;
+    rts->job.op = op;
+    run_job(rts, start, stop, chunk);
+
+    for (i = 0; i <= rts->nthreads; i++) {
+        if (rts->has_partial[i])
+            result = combine(op, result, rts->partials[i]);
+    }
+    return result;
+}
+
+/* Wait until the workers are done with the current job */
 void join_runtime(runtime_t *rts)
+{
+    pthread_mutex_lock(&rts->lock);
+    while (rts->running > 0)
+        pthread_cond_wait(&rts->finished, &rts->lock);
+    pthread_mutex_unlock(&rts->lock);
+}
+
+void destroy_runtime(runtime_t *rts)
 {
     int i;
 
+    pthread_mutex_lock(&rts->lock);
+    rts->shutdown = 1;
+    pthread_cond_broadcast(&rts->wakeup);
+    pthread_mutex_unlock(&rts->lock);
+
     for (i = 0; i < rts->nthreads; i++ ) {
-        printf("Joining threads %i\n", i);
         pthread_join(rts->threads[i], NULL);
     }
-}
-
 
+    pthread_mutex_destroy(&rts->lock);
+    pthread_cond_destroy(&rts->wakeup);
+    pthread_cond_destroy(&rts->finished);
+    free(rts);
+}
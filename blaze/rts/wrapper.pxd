@@ -1,3 +1,17 @@
 cdef extern from "runtime.c":
+    ctypedef void (*kernel_t)(int, int, void*) nogil
+    ctypedef double (*rkernel_t)(int, int, void*) nogil
+
+    int REDUCE_SUM
+    int REDUCE_PROD
+    int REDUCE_MIN
+    int REDUCE_MAX
+
     void *init_runtime(int nthreads)
-    void join_runtime(void* rts)
+    int runtime_nthreads(void *rts)
+    void run_range(void *rts, kernel_t kernel, int start, int stop,
+                   int chunk, void *args) nogil
+    double reduce_range(void *rts, rkernel_t rkernel, int start, int stop,
+                        int chunk, void *args, int op, double neutral) nogil
+    void join_runtime(void* rts) nogil
+    void destroy_runtime(void* rts) nogil
@@ -84,11 +84,100 @@ cdef class Sink(object):
     def __init__(self):
         pass
 
+_reductions = {
+    'sum'  : (_wrap.REDUCE_SUM, 0.0),
+    'prod' : (_wrap.REDUCE_PROD, 1.0),
+    'min'  : (_wrap.REDUCE_MIN, float('inf')),
+    'max'  : (_wrap.REDUCE_MAX, float('-inf')),
+}
+
+# The address of ``void run_range(rts, kernel, start, stop, chunk, args)``
+# for native code running loops on a runtime ( see ``Runtime.handle`` )
+RUN_RANGE = <ptr_t>_wrap.run_range
+
 cdef class Runtime(object):
-    cdef void *rts
+    """
+    A pool of worker threads running parallel loops of compiled
+    kernels.
+
+    The kernels are native functions ( e.g. BLIR functions, see
+    ``Context.lookup_fnptr`` ) with the signature::
 
-    def __init__(self, ptr_t kernel, ptr_t args, int arglen):
-        self.rts = _wrap.init_runtime(5)
+        void kernel(int start, int stop, void *args)
+
+    for loops, or returning a double with the partial result of the
+    range for reductions. The range is split in chunks that the threads
+    ( and the calling thread ) grab dynamically, and the calls return
+    once the whole range is done.
+    """
+    cdef void *rts
+    cdef readonly int nthreads
+    cdef object lock
+
+    def __init__(self, int nthreads=4):
+        from threading import Lock
+
+        self.rts = _wrap.init_runtime(nthreads)
+        if self.rts == NULL:
+            raise MemoryError("could not create the runtime")
+        # Fewer threads than requested may have been started
+        self.nthreads = _wrap.runtime_nthreads(self.rts)
+        # A runtime runs one loop at a time
+        self.lock = Lock()
+
+    def run(self, ptr_t kernel, int start, int stop, ptr_t args=0,
+            int chunk=0):
+        """ Run ``kernel`` over the [start, stop) range. A ``chunk`` of 0
+        lets the runtime pick the chunk size. """
+        self._check()
+        with self.lock:
+            with nogil:
+                _wrap.run_range(self.rts, <_wrap.kernel_t><Py_uintptr_t>kernel,
+                                start, stop, chunk, <void*><Py_uintptr_t>args)
+
+    def reduce(self, ptr_t kernel, int start, int stop, ptr_t args=0,
+               op='sum', int chunk=0):
+        """ Run ``kernel`` over the [start, stop) range and combine the
+        partial results with ``op`` ( 'sum', 'prod', 'min' or 'max' ). """
+        cdef int opcode
+        cdef double neutral, result
+
+        self._check()
+        try:
+            opcode, neutral = _reductions[op]
+        except KeyError:
+            raise ValueError("unknown reduction operator: %r" % (op,))
+
+        with self.lock:
+            with nogil:
+                result = _wrap.reduce_range(
+                    self.rts, <_wrap.rkernel_t><Py_uintptr_t>kernel,
+                    start, stop, chunk, <void*><Py_uintptr_t>args,
+                    opcode, neutral)
+        return result
+
+    property handle:
+        """ The address of the native runtime, for ``run_range``. """
+        def __get__(self):
+            self._check()
+            return <ptr_t>self.rts
 
     def join(self):
+        self._check()
         _wrap.join_runtime(self.rts)
+
+    def close(self):
+        """ Stop the worker threads. """
+        if self.rts != NULL:
+            with self.lock:
+                _wrap.destroy_runtime(self.rts)
+            self.rts = NULL
+
+    def _check(self):
+        if self.rts == NULL:
+            raise RuntimeError("the runtime is closed")
+
+    def __dealloc__(self):
+        if self.rts != NULL:
+            _wrap.destroy_runtime(self.rts)
+            self.rts = NULL
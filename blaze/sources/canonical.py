@@ -4,9 +4,14 @@ and units of data.
 """
 
 from blaze.desc.byteprovider import ByteProvider
-from blaze.byteproto import CONTIGUOUS, CHUNKED, STREAM, ACCESS_ALLOC
+from blaze.desc.datadescriptor import NumPyDataDescriptor
+from blaze.byteproto import CONTIGUOUS, CHUNKED, STREAM, ACCESS_ALLOC, \
+    ACCESS_READ, ACCESS_WRITE
 from blaze.datashape import dynamic, string, pyobj, from_numpy, to_numpy
+from blaze.datashape import dshape as _dshape
+from blaze.layouts.scalar import ChunkedL
 
+import os
 import socket
 import numpy as np
 
@@ -128,33 +133,148 @@ class ByteSource(ByteProvider):
 
 class FileSource(ByteProvider):
     """
-    File on local disk.
+    A flat binary file on local disk, memory-mapped and laid out as the
+    C ordered array of a datashape ( records included ). Reads are
+    views of the mapping, without copies, and writes go to the file in
+    place.
+
+    Parameters
+    ----------
+    fname : str
+        The file.
+    dshape : dshape
+        The layout of the file.  A variable outer dimension ( e.g.
+        ``'x, {a: int32; b: float64}'`` ) is taken from the file size.
+    mode : str
+        'r' read-only, 'r+' read/write, 'c' copy-on-write or 'w+' to
+        create the file ( the dshape must be fixed then ).
+    offset : int
+        The number of bytes skipped at the start of the file ( e.g. a
+        header ).
+    chunklen : int
+        The number of rows of the chunks the file is read in.
     """
 
-    read_capabilities  = CHUNKED | STREAM
-    write_capabilities = CHUNKED | STREAM
+    read_capabilities  = CONTIGUOUS | CHUNKED | STREAM
+    write_capabilities = CONTIGUOUS | CHUNKED
+    access_capabilities = ACCESS_READ | ACCESS_WRITE
+
+    def __init__(self, fname, dshape, mode='r', offset=0, chunklen=2**16):
+        if isinstance(dshape, basestring):
+            dshape = _dshape(dshape)
+        shape, dtype = to_numpy(dshape)
+
+        # File modes are accepted too
+        mode = mode.replace('b', '')
+        if mode not in ('r', 'r+', 'c', 'w+'):
+            raise ValueError("mode must be one of 'r', 'r+', 'c' or 'w+'")
+
+        if -1 in shape[1:]:
+            raise ValueError("only the outer dimension can be variable")
+        variable = bool(shape) and shape[0] == -1
+        if variable:
+            if mode == 'w+':
+                raise ValueError("the length of a new file must be fixed")
+            rowsize = dtype.itemsize * int(np.prod(shape[1:]))
+            length, extra = divmod(os.path.getsize(fname) - offset, rowsize)
+            if extra:
+                raise ValueError("the size of %s is not a multiple of "
+                                 "%d bytes" % (fname, rowsize))
+            shape = (length,) + shape[1:]
 
-    def __init__(self, fname, mode='rb+'):
-        self.fd = None
         self.fname = fname
         self.mode = mode
-        # TODO: lazy
-        self.__alloc__()
-
-    def read(self, offset, nbytes):
-        self.rd.read()
-
-    def write(self, offset, nbytes):
-        pass
-
-    def __alloc__(self):
-        self.fd = open(self.fname, self.mode)
+        self.offset = offset
+        self.chunklen = chunklen
+        if shape and shape[0] == 0:
+            # Empty files cannot be mapped
+            self.na = np.empty(shape, dtype=dtype)
+        else:
+            self.na = np.memmap(fname, dtype=dtype, mode=mode, offset=offset,
+                                shape=shape)
+        self.dshape = from_numpy(shape, dtype) if variable else dshape
 
-    def __dealloc__(self):
-        self.fd.close()
+    @staticmethod
+    def infer_datashape(source):
+        if isinstance(source, FileSource):
+            return source.dshape
+        return dynamic
+
+    def read_desc(self):
+        return NumPyDataDescriptor('file_dd', self.na.nbytes, self.dshape,
+                                   self.na)
+
+    def default_layout(self):
+        return ChunkedL(self, cdimension=0)
+
+    @property
+    def nchunks(self):
+        return -(-len(self.na) // self.chunklen)
+
+    @property
+    def partitions(self):
+        """ The bounds of the chunks. """
+        n = len(self.na)
+        return [(i, min(i + self.chunklen, n))
+                for i in xrange(0, n, self.chunklen)]
+
+    def iterchunks(self):
+        """ Iterate over the chunks, as views of the mapping. """
+        for start, stop in self.partitions:
+            yield self.na[start:stop]
+
+    def read(self, elt, key):
+        return self.na[key]
+
+    def write(self, elt, key, value):
+        if self.mode == 'r':
+            raise RuntimeError(
+                "cannot modify data because mode is '%s'" % self.mode)
+        self.na[key] = value
+
+    def flush(self):
+        """ Write the updates back to the file. """
+        if isinstance(self.na, np.memmap):
+            self.na.flush()
+
+    def where(self, expression, outcols=None, limit=None, skip=0):
+        """
+        Iterate over the records where ``expression`` is true, in the
+        way of ``ctable.where``. The expression is evaluated a chunk at a
+        time, over views of the fields.
+        """
+        from blaze import carray
+
+        if self.na.dtype.names is None:
+            raise ValueError("only record files can be queried")
+        if isinstance(outcols, basestring):
+            outcols = outcols.replace(',', ' ').split()
+
+        if limit is not None and limit <= 0:
+            return
+        for chunk in self.iterchunks():
+            fields = dict((name, chunk[name]) for name in chunk.dtype.names)
+            mask = carray.eval(expression, out_flavor='numpy',
+                               user_dict=fields)
+            rows = chunk[mask]
+            if outcols is not None:
+                rows = rows[outcols]
+            for row in rows:
+                if skip > 0:
+                    skip -= 1
+                    continue
+                yield row
+                if limit is not None:
+                    limit -= 1
+                    if limit <= 0:
+                        return
+
+    def repr_data(self):
+        return repr(self.na)
 
     def __repr__(self):
-        return 'File(fileno=%s, %s)' % (self.fd.fileno, self.fname)
+        return 'File(%s, mode=%s, dshape=%s)' % (self.fname, self.mode,
+                                                  self.dshape)
 
 class SocketSource(ByteProvider):
     """
@@ -55,7 +55,11 @@ class CArraySource(ByteProvider):
         else:
             rootdir,cparams = None, None
 
-        if dshape:
+        if isinstance(data, carray.carray) and not (dshape or params):
+            # Wrap an existing carray, without copying it
+            self.ca = data
+            self.dshape = from_numpy(data.shape, data.dtype)
+        elif dshape:
             shape, dtype = to_numpy(dshape)
             self.ca = carray.carray(data, dtype=dtype, rootdir=rootdir, cparams=cparams)
             self.dshape = dshape
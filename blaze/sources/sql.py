@@ -1,11 +1,307 @@
+"""
+SQLite data source.
+
+The tables of the database are read through queries, whose column
+projection and predicates are pushed down into the SQL text, and whose
+results are streamed in batches into NumPy arrays or ctables::
+
+    source = SqliteSource(params=params(storage='trades.db'))
+    q = source.table('trades').select('price qty').where('price > 10')
+    ct = q.toctable(rootdir='expensive')
+
+The connections to database files are pooled ( per thread ), so opening
+the same database several times does not reconnect.
+"""
+
+import os
+import ast
 import sqlite3
+import threading
+
+import numpy as np
 
 from blaze.desc.byteprovider import ByteProvider
+from blaze.desc.datadescriptor import SqlDataDescriptor, SQL_BATCHSIZE
 from blaze.byteproto import CONTIGUOUS, CHUNKED, STREAM, ACCESS_READ
-#from blaze.datadescriptor import SqlDataDescriptor
+from blaze.datashape import dshape as _dshape, to_numpy
+from blaze.carray.ctable import ctable
 
 from blaze.layouts.categorical import Simple
 
+#------------------------------------------------------------------------
+# Connections
+#------------------------------------------------------------------------
+
+class _Pool(threading.local):
+    """ The connections opened by a thread, dropped with the thread. """
+    def __init__(self):
+        self.connections = {}
+
+_pool = _Pool()
+
+def connect(path):
+    """ A connection to the database file ``path``, shared with the
+    other users of the database in this thread. ``':memory:'`` always
+    creates a new database. """
+    if path == ':memory:':
+        return sqlite3.connect(path)
+    key = os.path.abspath(path)
+    conn = _pool.connections.get(key)
+    if conn is None:
+        conn = _pool.connections[key] = sqlite3.connect(path)
+    return conn
+
+def close_connections():
+    """ Close the pooled connections of this thread. """
+    connections = _pool.connections
+    while connections:
+        _, conn = connections.popitem()
+        conn.close()
+
+#------------------------------------------------------------------------
+# Types
+#------------------------------------------------------------------------
+
+def quote(name):
+    """ ``name`` as a SQL identifier. """
+    return '"%s"' % name.replace('"', '""')
+
+def affinity_dtype(decltype):
+    """ The dtype of a column declared ``decltype``, following the
+    SQLite affinity rules, None for text. """
+    decltype = decltype.upper()
+    if 'INT' in decltype:
+        return np.dtype(np.int64)
+    if 'CHAR' in decltype or 'CLOB' in decltype or 'TEXT' in decltype:
+        return None
+    if 'BLOB' in decltype or not decltype:
+        return np.dtype(object)
+    return np.dtype(np.float64)
+
+def table_dtype(conn, table):
+    """ The record dtype of the rows of ``table``, from its schema. The
+    width of the text columns is that of their longest value, and the
+    integer columns holding NULLs are read as floats ( NULL is NaN ). """
+    info = conn.execute('PRAGMA table_info(%s)' % quote(table)).fetchall()
+    if not info:
+        raise ValueError("no such table: %s" % table)
+    names = [str(row[1]) for row in info]
+    types = [affinity_dtype(row[2]) for row in info]
+
+    # One scan of the table for the widths and the NULLs
+    text = [name for name, dtype in zip(names, types) if dtype is None]
+    ints = [name for name, dtype in zip(names, types)
+            if dtype is not None and dtype.kind == 'i']
+    if text or ints:
+        query = 'SELECT %s FROM %s' % (', '.join(
+            ['max(length(%s))' % quote(name) for name in text] +
+            ['count(*) - count(%s)' % quote(name) for name in ints]),
+            quote(table))
+        stats = dict(zip(text + ints, conn.execute(query).fetchone()))
+        for i, name in enumerate(names):
+            if types[i] is None:
+                types[i] = np.dtype('U%d' % max(stats[name] or 1, 1))
+            elif name in ints and stats[name]:
+                types[i] = np.dtype(np.float64)
+    return np.dtype(zip(names, types))
+
+def as_dtype(dshape):
+    """ The record dtype of a datashape ( or a dtype ). """
+    if isinstance(dshape, basestring):
+        dshape = _dshape(dshape)
+    if isinstance(dshape, np.dtype):
+        return dshape
+    shape, dtype = to_numpy(dshape)
+    return dtype
+
+#------------------------------------------------------------------------
+# Predicates
+#------------------------------------------------------------------------
+
+operators = {
+    ast.Eq    : '=',
+    ast.NotEq : '<>',
+    ast.Lt    : '<',
+    ast.LtE   : '<=',
+    ast.Gt    : '>',
+    ast.GtE   : '>=',
+    ast.Add   : '+',
+    ast.Sub   : '-',
+    ast.Mult  : '*',
+    ast.Div   : '/',
+    ast.Mod   : '%',
+    ast.And   : 'AND',
+    ast.Or    : 'OR',
+    ast.BitAnd: 'AND',
+    ast.BitOr : 'OR',
+}
+
+def to_sql(expression, columns):
+    """
+    Translate a boolean expression over the ``columns``, in the syntax
+    of ``ctable.where`` ( e.g. ``'(a > 1) & (b == "x")'`` ), into a SQL
+    condition. Returns the condition and the values bound to its
+    parameters.
+    """
+    args = []
+
+    def sql(node):
+        if isinstance(node, ast.Name):
+            if node.id in columns:
+                return quote(node.id)
+            if node.id in ('True', 'False'):
+                args.append(node.id == 'True')
+                return '?'
+            raise ValueError("unknown column %r" % node.id)
+        if isinstance(node, (ast.Num, ast.Str)):
+            args.append(node.n if isinstance(node, ast.Num) else node.s)
+            return '?'
+        if isinstance(node, ast.BoolOp) and type(node.op) in operators:
+            op = ' %s ' % operators[type(node.op)]
+            return '(%s)' % op.join(sql(value) for value in node.values)
+        if isinstance(node, ast.BinOp) and type(node.op) in operators:
+            return '(%s %s %s)' % (sql(node.left), operators[type(node.op)],
+                                   sql(node.right))
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, (ast.Not, ast.Invert)):
+                return '(NOT %s)' % sql(node.operand)
+            if isinstance(node.op, ast.USub):
+                return '(-%s)' % sql(node.operand)
+        if isinstance(node, ast.Compare):
+            # a < b < c is a < b AND b < c
+            terms = []
+            left = node.left
+            for op, right in zip(node.ops, node.comparators):
+                if type(op) not in operators:
+                    break
+                terms.append('%s %s %s' % (sql(left), operators[type(op)],
+                                           sql(right)))
+                left = right
+            else:
+                return '(%s)' % ' AND '.join(terms)
+        raise ValueError("cannot translate %r to SQL" % ast.dump(node))
+
+    tree = ast.parse(expression.strip(), mode='eval')
+    return sql(tree.body), args
+
+def column_list(outcols):
+    """ The column names of ``outcols``, as given to ``ctable.where``. """
+    if isinstance(outcols, basestring):
+        outcols = outcols.replace(',', ' ').split()
+    return list(outcols)
+
+#------------------------------------------------------------------------
+# Queries
+#------------------------------------------------------------------------
+
+class SqlQuery(object):
+    """
+    A query on a table, built by projecting its columns and filtering
+    its rows. Queries are immutable, ``select``, ``where`` and
+    ``limit`` return new queries.
+    """
+
+    def __init__(self, conn, table, dtype, columns=None, conditions=(),
+                 args=(), limit=None, skip=0, batchsize=SQL_BATCHSIZE):
+        self.conn = conn
+        self.table = table
+        self.table_dtype = dtype
+        self.columns = list(columns or dtype.names)
+        self.conditions = tuple(conditions)
+        self.args = tuple(args)
+        self._limit = limit
+        self._skip = skip
+        self.batchsize = batchsize
+
+    def _replace(self, **kw):
+        attrs = dict(columns=self.columns, conditions=self.conditions,
+                     args=self.args, limit=self._limit, skip=self._skip,
+                     batchsize=self.batchsize)
+        attrs.update(kw)
+        return SqlQuery(self.conn, self.table, self.table_dtype, **attrs)
+
+    @property
+    def dtype(self):
+        """ The record dtype of the rows of the result. """
+        return np.dtype([(name, self.table_dtype.fields[name][0])
+                         for name in self.columns])
+
+    def select(self, outcols):
+        """ Project the columns ``outcols``, a list of names or a string
+        like ``'a b'`` or ``'a, b'``. """
+        outcols = column_list(outcols)
+        missing = set(outcols) - set(self.table_dtype.names)
+        if missing:
+            raise ValueError("not all outcols are real column names: %s" %
+                             ', '.join(sorted(missing)))
+        return self._replace(columns=outcols)
+
+    def where(self, expression, *args):
+        """ Keep the rows where ``expression`` is true, either an
+        expression in the syntax of ``ctable.where`` or a SQL condition
+        with ``args`` bound to its parameters. Expressions that cannot
+        be translated ( e.g. ``'length(sym) > 2'`` ) are taken as SQL.
+        """
+        if not args:
+            try:
+                expression, args = to_sql(expression, self.table_dtype.names)
+            except (SyntaxError, ValueError):
+                # Not a Python expression we can translate, taken as SQL
+                pass
+        return self._replace(conditions=self.conditions + (expression,),
+                             args=self.args + tuple(args))
+
+    def limit(self, limit, skip=0):
+        """ At most ``limit`` rows, after skipping ``skip`` rows. """
+        return self._replace(limit=limit, skip=skip)
+
+    def sql(self):
+        """ The SQL text of the query. """
+        text = 'SELECT %s FROM %s' % (', '.join(map(quote, self.columns)),
+                                      quote(self.table))
+        if self.conditions:
+            text += ' WHERE ' + ' AND '.join('(%s)' % cond
+                                             for cond in self.conditions)
+        if self._limit is not None or self._skip:
+            limit = -1 if self._limit is None else self._limit
+            text += ' LIMIT %d OFFSET %d' % (limit, self._skip)
+        return text
+
+    def read_desc(self):
+        return SqlDataDescriptor('sqlite_dd', self.conn, self.sql(),
+                                 self.dtype, self.args, self.batchsize)
+
+    def iterblocks(self):
+        """ Iterate over the result in structured arrays of at most
+        ``batchsize`` rows. """
+        return iter(self.read_desc().asstream())
+
+    def toarray(self):
+        """ The result as a structured array. """
+        return self.read_desc().asbuffer()
+
+    def toctable(self, **kwargs):
+        """ Stream the result into a new ctable. ``kwargs`` are passed
+        to the ctable constructor ( e.g. ``rootdir`` and ``cparams`` ). """
+        kwargs.setdefault('mode', 'w')
+        out = ctable(np.empty(0, dtype=self.dtype), **kwargs)
+        for block in self.iterblocks():
+            out.append(block)
+        out.flush()
+        return out
+
+    def __iter__(self):
+        for block in self.iterblocks():
+            for row in block:
+                yield row
+
+    def __repr__(self):
+        return 'SqlQuery(%r)' % self.sql()
+
+#------------------------------------------------------------------------
+# Source
+#------------------------------------------------------------------------
+
 class SqliteSource(ByteProvider):
 
     read_capabilities  = STREAM
@@ -16,17 +312,44 @@ class SqliteSource(ByteProvider):
         #assert (data is not None) or (dshape is not None) or \
                #(params.get('storage'))
 
-        if 'storage' in params and params.storage:
-            self.conn = sqlite3.connect(params.storage)
+        if params and 'storage' in params and params.storage:
+            self.conn = connect(params.storage)
         else:
-            self.conn = sqlite3.connect(':memory:')
+            self.conn = connect(':memory:')
+        self.batchsize = (params and params.get('batchsize')) or SQL_BATCHSIZE
 
     def register_custom_types(self, name, ty, con, decon):
         sqlite3.register_adapter(ty, con)
         sqlite3.register_converter(name, decon)
 
-    def read_desc(self, query):
-        return SqlDataDescriptor('sqlite_dd', None, self.conn)
+    def tables(self):
+        """ The names of the tables of the database. """
+        rows = self.conn.execute("SELECT name FROM sqlite_master "
+                                 "WHERE type = 'table' ORDER BY name")
+        return [str(row[0]) for row in rows]
+
+    def table(self, name, dshape=None):
+        """ A query of the whole table ``name``. The type of its rows is
+        given by ``dshape``, or read from the schema ( which scans the
+        table for the width of text columns and the NULLs of integer
+        columns ). """
+        if dshape is None:
+            dtype = table_dtype(self.conn, name)
+        else:
+            dtype = as_dtype(dshape)
+        return SqlQuery(self.conn, name, dtype, batchsize=self.batchsize)
+
+    def read_desc(self, query, dshape=None, args=()):
+        """ The descriptor of a query, either a ``SqlQuery`` or SQL text
+        with ``args`` bound to its parameters and rows of type
+        ``dshape``. """
+        if isinstance(query, SqlQuery):
+            return query.read_desc()
+        if dshape is None:
+            raise ValueError("the dshape of the rows of a SQL query "
+                             "must be given")
+        return SqlDataDescriptor('sqlite_dd', self.conn, query,
+                                 as_dtype(dshape), args, self.batchsize)
 
     def repr_data(self):
         return '<Deferred>'
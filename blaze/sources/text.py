@@ -0,0 +1,329 @@
+"""
+Parallel loading of CSV and other delimited text files into ctables.
+
+The file is split into byte ranges at line boundaries, the ranges are
+parsed by worker processes and the parsed blocks are appended to the
+ctable in the order of the file, as soon as they are ready::
+
+    table = load_csv('drop.csv', rootdir='drop', dtype='i4,f8,S10')
+
+Only a bounded number of blocks is in flight at any time, so files much
+larger than the memory can be loaded. The types of the columns are
+inferred from a sample of the file when no dtype is given, the widths
+of the string columns from a first pass over the whole file.
+
+Fields with embedded newlines are not supported, as the file could not
+be split at arbitrary lines.
+"""
+
+import os
+import re
+import csv
+from collections import deque
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from blaze.carray.ctable import ctable
+
+# The size ( in bytes ) of the ranges parsed by the workers
+BLOCKSIZE = 2**24
+
+# The size ( in bytes ) of the sample the format and types are
+# inferred from
+SAMPLE_SIZE = 2**16
+
+# Strings for true values of boolean columns
+TRUE = ('1', 't', 'true', 'y', 'yes')
+
+#------------------------------------------------------------------------
+# Format
+#------------------------------------------------------------------------
+
+def read_sample(path, size=SAMPLE_SIZE):
+    """ The first complete lines of the file, up to ``size`` bytes. """
+    with open(path, 'rb') as f:
+        sample = f.read(size)
+        if len(sample) == size:
+            # Drop the last partial line
+            sample = sample[:sample.rfind('\n') + 1] or sample
+    return sample
+
+def sniff(sample, delimiter=None, header=None):
+    """ The format of the file ( csv reader keywords ) and whether its
+    first line is a header. """
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=delimiter)
+    except csv.Error:
+        dialect = csv.excel
+    fmt = {
+        'delimiter'        : delimiter or dialect.delimiter,
+        'quotechar'        : dialect.quotechar or '"',
+        'skipinitialspace' : dialect.skipinitialspace,
+    }
+    if header is None:
+        try:
+            header = csv.Sniffer().has_header(sample)
+        except csv.Error:
+            header = False
+    return fmt, header
+
+def column_name(name, i):
+    """ ``name`` as a valid field name, ``f<i>`` if empty. """
+    name = re.sub(r'\W', '_', name.strip())
+    if not name:
+        return 'f%d' % i
+    if name[0].isdigit() or name[0] == '_':
+        name = 'f' + name
+    return name
+
+def read_rows(lines, fmt):
+    """ The non empty rows of ``lines``. """
+    return [row for row in csv.reader(lines, **fmt) if row]
+
+#------------------------------------------------------------------------
+# Types
+#------------------------------------------------------------------------
+
+def column_type(values):
+    """ The narrowest of int64, float64 and string fitting ``values``.
+    Columns of numbers with empty fields are float64, the empty fields
+    being missing values. """
+    blank = False
+    for kind in (int, float):
+        try:
+            for value in values:
+                if value.strip():
+                    kind(value)
+                else:
+                    blank = True
+            if kind is int and blank:
+                continue
+            return np.dtype(kind)
+        except ValueError:
+            pass
+    width = max([len(value) for value in values] or [1])
+    return np.dtype('S%d' % max(width, 1))
+
+def infer_dtype(rows, names):
+    """ The record dtype of ``rows``, with the fields ``names``. """
+    columns = zip(*rows) if rows else [()] * len(names)
+    return np.dtype([(name, column_type(values))
+                     for name, values in zip(names, columns)])
+
+def record_dtype(dtype, names):
+    """ ``dtype`` as a record, a plain dtype is used for every column. """
+    dtype = np.dtype(dtype)
+    if dtype.names is None:
+        dtype = np.dtype([(name, dtype) for name in names])
+    elif len(dtype.names) != len(names):
+        raise ValueError("the file has %d columns, the dtype %d" %
+                         (len(names), len(dtype.names)))
+    return dtype
+
+def convert(values, dtype):
+    """ The array of type ``dtype`` of a column of strings. """
+    if dtype.kind == 'b':
+        return np.array([value.strip().lower() in TRUE for value in values])
+    if dtype.kind in 'SU':
+        # Never truncate, the width may be given too narrow
+        width = max([len(value) for value in values] or [0])
+        if width > dtype.itemsize // np.dtype(dtype.kind + '1').itemsize:
+            raise ValueError("a value of %d characters does not fit in %s, "
+                             "give a wider dtype" % (width, dtype))
+        return np.array(values, dtype=dtype)
+    values = [value.strip() for value in values]
+    if dtype.kind == 'f':
+        # Empty fields are missing values
+        values = [value or 'nan' for value in values]
+    elif not all(values):
+        raise ValueError("missing value in a column of %s, give a float "
+                         "dtype" % dtype)
+    return np.array(values).astype(dtype)
+
+def parse(lines, fmt, dtype):
+    """ The structured array of type ``dtype`` of the rows in ``lines``. """
+    rows = read_rows(lines, fmt)
+    out = np.empty(len(rows), dtype=dtype)
+    if not rows:
+        return out
+
+    ncols = len(dtype.names)
+    for row in rows:
+        if len(row) != ncols:
+            raise ValueError("expected %d fields, got %d in row %r" %
+                             (ncols, len(row), fmt['delimiter'].join(row)))
+    for name, values in zip(dtype.names, zip(*rows)):
+        try:
+            out[name] = convert(values, dtype.fields[name][0])
+        except ValueError as e:
+            raise ValueError("column %r: %s" % (name, e))
+    return out
+
+#------------------------------------------------------------------------
+# Ranges
+#------------------------------------------------------------------------
+
+def line_ranges(path, start=0, blocksize=BLOCKSIZE):
+    """ The ( start, stop ) byte ranges of about ``blocksize`` bytes the
+    file is split into, from ``start``, ending at line boundaries. """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while start < size:
+            stop = start + blocksize
+            if stop < size:
+                f.seek(stop)
+                f.readline()
+                stop = f.tell()
+            stop = min(stop, size)
+            yield start, stop
+            start = stop
+
+def parse_range(path, start, stop, fmt, dtype):
+    """ Parse the lines in the ``start:stop`` byte range of the file. """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    return parse(data.splitlines(), fmt, dtype)
+
+def _parse_worker(args):
+    return parse_range(*args)
+
+def range_widths(path, start, stop, fmt, columns):
+    """ The length of the longest value of each of the ``columns`` in the
+    ``start:stop`` byte range of the file. """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    widths = [0] * len(columns)
+    for row in read_rows(data.splitlines(), fmt):
+        for i, column in enumerate(columns):
+            if column < len(row):
+                widths[i] = max(widths[i], len(row[column]))
+    return widths
+
+def _widths_worker(args):
+    return range_widths(*args)
+
+def imap_ranges(func, tasks, processes):
+    """ The results of ``func`` over ``tasks``, in order, computed by
+    ``processes`` worker processes with at most two tasks per worker
+    pending. """
+    if processes == 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    pool = Pool(processes)
+    try:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(func, (task,)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+def widen_strings(dtype, path, start, blocksize, fmt, processes):
+    """ ``dtype`` with its string columns as wide as their longest value
+    in the file, rather than in the sample. """
+    columns = [i for i, name in enumerate(dtype.names)
+               if dtype.fields[name][0].kind in 'SU']
+    if not columns:
+        return dtype
+
+    widths = [0] * len(columns)
+    tasks = ((path, begin, end, fmt, columns)
+             for begin, end in line_ranges(path, start, blocksize))
+    for block in imap_ranges(_widths_worker, tasks, processes):
+        widths = map(max, widths, block)
+
+    fields = [(name, dtype.fields[name][0]) for name in dtype.names]
+    for column, width in zip(columns, widths):
+        name, kind = fields[column]
+        fields[column] = (name, np.dtype('%s%d' % (kind.kind, max(width, 1))))
+    return np.dtype(fields)
+
+#------------------------------------------------------------------------
+# Loading
+#------------------------------------------------------------------------
+
+def load_csv(path, dtype=None, delimiter=None, header=None, processes=None,
+             blocksize=BLOCKSIZE, **kwargs):
+    """
+    Load a delimited text file into a ctable.
+
+    Parameters
+    ----------
+    path : str
+        The file to load.
+    dtype : numpy.dtype, optional
+        The record type of the rows, or the type of every column. Inferred
+        from a sample of the file if not given, the string columns being
+        sized by a first parallel pass over the file. Values that do not
+        fit a given dtype ( longer strings, or empty fields in an integer
+        column ) raise a ValueError rather than being truncated.
+    delimiter : str, optional
+        The field delimiter, sniffed from the sample if not given.
+    header : bool, optional
+        Whether the first line holds the names of the columns, sniffed
+        from the sample if not given.
+    processes : int, optional
+        The number of worker processes, one per core by default. With a
+        single process the file is parsed in the calling process.
+    blocksize : int
+        The size in bytes of the ranges the workers parse.
+    kwargs : list of parameters or dictionary
+        Any parameter supported by the ctable constructor ( e.g.
+        ``rootdir`` and ``cparams`` ).
+
+    Returns
+    -------
+    out : a ctable object
+    """
+    sample = read_sample(path)
+    fmt, header = sniff(sample, delimiter, header)
+    lines = sample.splitlines()
+
+    first = read_rows(lines[:1], fmt)
+    ncols = len(first[0]) if first else 0
+    if header and first:
+        names = [column_name(name, i) for i, name in enumerate(first[0])]
+        lines = lines[1:]
+        start = len(sample.split('\n', 1)[0]) + 1
+    else:
+        names = ['f%d' % i for i in xrange(ncols)]
+        start = 0
+
+    processes = processes or cpu_count()
+    if dtype is None:
+        dtype = infer_dtype(read_rows(lines, fmt), names)
+        # The longest strings may be past the sample
+        dtype = widen_strings(dtype, path, start, blocksize, fmt, processes)
+    else:
+        dtype = record_dtype(dtype, names)
+
+    # Assume the lines of the sample are representative
+    if lines:
+        linesize = float(len('\n'.join(lines))) / len(lines)
+        kwargs.setdefault('expectedlen',
+                          int((os.path.getsize(path) - start) / linesize))
+    kwargs.setdefault('mode', 'w')
+    table = ctable(np.empty(0, dtype=dtype), **kwargs)
+
+    # The blocks are appended in the order of the file
+    tasks = ((path, begin, end, fmt, dtype)
+             for begin, end in line_ranges(path, start, blocksize))
+    for block in imap_ranges(_parse_worker, tasks, processes):
+        if len(block):
+            table.append(block)
+
+    table.flush()
+    return table
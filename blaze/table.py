@@ -301,7 +301,7 @@ class NDArray(Indexable, ArrayNode):
         # possible arguments to the first argument which result
         # in different behavior for the values.
 
-        if isinstance(obj, CArraySource):
+        if isinstance(obj, ByteProvider):
             self.data = obj
         else:
             self.data = CArraySource(obj, params)
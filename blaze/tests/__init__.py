@@ -0,0 +1,4 @@
+import os
+
+# Keep the cost model constants of the test runs in memory
+os.environ.setdefault('BLAZE_COSTS', '')
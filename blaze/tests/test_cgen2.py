@@ -1,3 +1,6 @@
+import os
+from types import ModuleType
+
 import numpy as np
 
 from blaze.cgen.blirgen import *
@@ -5,6 +8,13 @@ from blaze.cgen.blirgen import *
 from blaze.blir import compile, assembly, bitcode, Context, execute
 from blaze.cgen.kernels import *
 from blaze.cgen.utils import namesupply
+from threading import Thread
+
+from blaze.blir import cache as blircache
+from blaze.blir.cache import BitcodeCache
+from blaze.blir.bind import wrap_llvm_bitcode
+from blaze.blir.exc import load_libs, wrap_arguments
+from blaze.test_utils import temp_dir
 
 #------------------------------------------------------------------------
 # Code Generation ( Level 2 )
@@ -59,3 +69,199 @@ def test_cgen2_add():
 
         execute(ctx, args=(a,b,c), fname='kernel0', timing=False)
         assert np.allclose(c, a + b)
+
+def test_cgen2_cache():
+    with namesupply():
+
+        krn = ElementwiseKernel(
+            [
+                (IN  , VectorArg((300,), 'array[int]')),
+                (IN  , VectorArg((300,), 'array[int]')),
+                (OUT , VectorArg((300,), 'array[int]')),
+            ],
+            '_out0[i0] = _in0[i0] * _in1[i0]',
+        )
+
+        with temp_dir() as cachedir:
+            cache = BitcodeCache(cachedir)
+            bitcode = cache.compile(str(krn))
+            assert cache.misses == 1
+            assert cache.compile(str(krn)) == bitcode
+            assert cache.hits == 1
+
+            # Other optimization levels are other entries
+            cache.compile(str(krn), O=0)
+            assert cache.misses == 2
+
+            # A new process would find the bitcode on disk
+            cache = BitcodeCache(cachedir)
+            assert cache.compile(str(krn)) == bitcode
+            assert cache.misses == 0
+
+        load_libs()
+        mod = ModuleType('blir_wrapper')
+        wrap_llvm_bitcode(bitcode, mod)
+
+        a = np.array(xrange(300), dtype='int32')
+        b = np.array(xrange(300), dtype='int32')
+        c = np.empty_like(b)
+
+        mod.kernel0(*wrap_arguments(mod.kernel0, (a,b,c)))
+        assert np.allclose(c, a * b)
+
+def test_cgen2_cachedir():
+    with temp_dir() as temp:
+        cachedir = os.path.join(temp, 'blir')
+        cache = BitcodeCache(cachedir)
+        # Created on the first write only
+        assert not os.path.exists(cachedir)
+        cache.put('key', 'bitcode')
+        assert os.listdir(cachedir) == ['key.bc']
+        assert BitcodeCache(cachedir).get('key') == 'bitcode'
+
+def test_cgen2_concurrent():
+    with namesupply():
+        sources = [str(ElementwiseKernel(
+            [
+                (IN  , VectorArg((300,), 'array[float]')),
+                (OUT , VectorArg((300,), 'array[float]')),
+            ],
+            '_out0[i0] = _in0[i0] %s 2.0' % op,
+        )) for op in '+-*/']
+
+    # Distinct kernels compiled from several threads at once
+    results = {}
+    def worker(i):
+        ast, env = compile(sources[i])
+        results[i] = env['lmodule']
+    threads = [Thread(target=worker, args=(i,)) for i in range(len(sources))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == range(len(sources))
+
+    # The batch API compiles them in worker processes
+    with temp_dir() as cachedir:
+        saved = blircache.bitcode_cache
+        blircache.bitcode_cache = BitcodeCache(cachedir)
+        try:
+            bitcodes = blircache.compile_many(sources, processes=2)
+            assert len(bitcodes) == len(sources)
+            assert len(os.listdir(cachedir)) == len(sources)
+            assert blircache.compile_many(sources) == bitcodes
+        finally:
+            blircache.bitcode_cache = saved
+
+def test_cgen2_vectorize():
+    with namesupply():
+
+        krn = ElementwiseKernel(
+            [
+                (IN  , VectorArg((301,), 'array[float]')),
+                (IN  , VectorArg((301,), 'array[float]')),
+                (OUT , VectorArg((301,), 'array[float]')),
+            ],
+            '_out0[i0] = _in0[i0] * _in1[i0] + 1.0',
+        )
+
+        krn.verify()
+        # 301 iterations: 75 unrolled ones plus a remainder
+        ast, env = krn.compile(O=3, vectorize=True, unroll=4,
+                               noalias=True, align=8)
+
+        ctx = Context(env)
+
+        a = np.array(xrange(301), dtype='double')
+        b = np.array(xrange(301), dtype='double')
+        c = np.empty_like(b)
+
+        execute(ctx, args=(a,b,c), fname='kernel0', timing=False)
+        assert np.allclose(c, a * b + 1.0)
+
+def test_cgen2_chunked():
+    from blaze.carray import carray
+    from blaze.blir import chunked_execute
+    from blaze.desc.datadescriptor import (CArrayDataDescriptor,
+                                           NumPyDataDescriptor)
+
+    with namesupply():
+
+        krn = ElementwiseKernel(
+            [
+                (IN  , ScalarArg('int', 'n')),
+                (IN  , VectorArg(('n',), 'array[float]')),
+                (IN  , VectorArg(('n',), 'array[float]')),
+                (OUT , VectorArg(('n',), 'array[float]')),
+            ],
+            '_out0[i0] = _in1[i0] * _in2[i0]',
+        )
+
+        krn.verify()
+        ast, env = krn.compile()
+        ctx = Context(env)
+
+        a = np.arange(10007, dtype='double')
+        b = np.arange(10007, dtype='double') / 3
+
+        # chunks of the inputs and the output do not line up
+        dd_a = CArrayDataDescriptor('a', a.nbytes, None, carray(a, chunklen=1000))
+        dd_b = NumPyDataDescriptor('b', b.nbytes, None, b)
+        out = carray(np.empty(0, dtype='double'), chunklen=768)
+        dd_out = CArrayDataDescriptor('out', 0, None, out)
+
+        chunked_execute(ctx, 'kernel0', [dd_a, dd_b], dd_out)
+        assert len(out) == len(a)
+        assert np.allclose(out[:], a * b)
+
+def test_cgen2_fusion():
+    with namesupply():
+        a, b, c, t = [VectorArg((300,), 'array[float]') for i in range(4)]
+
+        mul = ElementwiseKernel(
+            [(IN, a), (IN, b), (OUT, t)],
+            '_out0[i0] = _in0[i0] * _in1[i0]',
+        )
+        total = ReductionKernel('float', '0.0', 'a+b', '_in0[i0] + _in1[i0]',
+                                [(IN, t), (IN, c)])
+
+        # sum(a*b + c) in a single loop, a*b is held in a register
+        krn = mul + total
+        assert krn.intermediates == [t]
+        assert len(krn.params) == 3
+
+        krn.verify()
+        ast, env = krn.compile()
+        ctx = Context(env)
+
+        x = np.arange(300, dtype='double')
+        y = np.arange(300, dtype='double') / 7
+        z = np.ones(300, dtype='double')
+
+        res = execute(ctx, args=(x,y,z), fname='kernel0', timing=False)
+        assert np.allclose(res, (x * y + z).sum())
+
+def test_cgen2_fusion_refused():
+    with namesupply():
+        a, t = VectorArg((300,), 'array[float]'), VectorArg((300,), 'array[float]')
+        c = VectorArg((200,), 'array[float]')
+
+        mul = ElementwiseKernel([(IN, a), (OUT, t)], '_out0[i0] = _in0[i0] * 2')
+
+        # different dimensions
+        other = ElementwiseKernel([(IN, c), (OUT, c)], '_out0[i0] = _in0[i0]')
+        try:
+            mul + other
+        except FusionError:
+            pass
+        else:
+            raise AssertionError("fused kernels of different dimensions")
+
+        # not elementwise
+        shift = ElementwiseKernel([(IN, t), (OUT, a)], '_out0[i0] = _in0[i0+1]')
+        try:
+            mul + shift
+        except FusionError:
+            pass
+        else:
+            raise AssertionError("fused a non elementwise intermediate")
@@ -1,11 +1,14 @@
+import numpy as np
+
 from blaze.aterm import parse
-from blaze.funcs import lookup
+from blaze.funcs import lookup, applied, Dispatcher, DispatchTree, zerocost
+from blaze.error import NoDispatch
+from blaze import cost
+from blaze.cost import Operand, InMemory, Chunked, DISK
 
 from blaze import NDArray, Array
 from blaze import add, multiply
 
-from unittest import skip
-
 def test_match1():
     expr = parse('Add(1,2)')
     fn, cost = lookup(expr)
@@ -16,17 +19,110 @@ def test_match2():
     fn, cost = lookup(expr)
     #assert fn.fn == multiply.fn.im_func
 
-@skip
+def test_dispatch_tree():
+    tree = DispatchTree()
+    tree.insert(parse('Add(<term>,<term>)'), 'add')
+    tree.insert(parse('Add(1,<term>)'), 'add1')
+    tree.insert(parse('Mul(<term>,<term>)'), 'mul')
+
+    assert sorted(tree.retrieve(parse('Add(1,Mul(2,3))'))) == ['add', 'add1']
+    assert tree.retrieve(parse('Mul(Add(1,2),3)')) == ['mul']
+    assert tree.retrieve(parse('Mul(1,2,3)')) == []
+    assert tree.retrieve(parse('Sub(1,2)')) == []
+
+def test_lookup_cache():
+    dispatcher = Dispatcher()
+    add = lambda a, b: a + b
+    dispatcher.install('Add(<term>,<term>)', add, zerocost)
+
+    expr = parse('Add(1,2)')
+    assert dispatcher.lookup(expr) == (add, 0)
+    assert expr in dispatcher.cache
+    assert dispatcher.lookup(expr) == (add, 0)
+
+    # Installing functions invalidates the cache
+    cheap = lambda a, b: a + b
+    dispatcher.install('Add(<int>,<int>)', cheap, lambda term: -1)
+    assert len(dispatcher.cache) == 0
+    assert dispatcher.lookup(expr) == (cheap, -1)
+
+    try:
+        dispatcher.lookup(parse('Sub(1,2)'))
+    except NoDispatch:
+        pass
+    else:
+        raise AssertionError('NoDispatch not raised')
+
+def test_cost_model():
+    c = dict(cost.DEFAULTS, ram=2**30)
+    inmemory, chunked = InMemory(flops=1), Chunked(flops=1)
+
+    small = [Operand(1000, 8000), Operand(1000, 8000)]
+    assert inmemory.estimate(small, c) < chunked.estimate(small, c)
+
+    # Bigger than memory, compressed on disk
+    n = 10**9
+    big = [Operand(n, 8*n, 2*n, DISK, 2**16), Operand(n, 8*n, 2*n, DISK, 2**16)]
+    assert chunked.estimate(big, c) < inmemory.estimate(big, c)
+
+def test_dispatch_on_cost():
+    dispatcher = Dispatcher()
+    numpy_add = lambda a, b: a + b
+    ooc_add = lambda a, b: a + b
+    dispatcher.install('Add(<term>,<term>)', numpy_add, InMemory(flops=1))
+    dispatcher.install('Add(<term>,<term>)', ooc_add, Chunked(flops=1))
+
+    saved, cost._constants = cost._constants, dict(cost.DEFAULTS, ram=2**30)
+    try:
+        expr = parse('Add(x,y)')
+        n = 10**9
+        small = [Operand(10, 80), Operand(10, 80)]
+        big = [Operand(n, 8*n, 2*n, DISK), Operand(n, 8*n, 2*n, DISK)]
+
+        assert dispatcher.lookup(expr, small)[0] is numpy_add
+        assert dispatcher.lookup(expr, big)[0] is ooc_add
+    finally:
+        cost._constants = saved
+
+def test_term_lookup_does_not_calibrate():
+    saved, cost._constants = cost._constants, None
+    try:
+        lookup(parse('Add(x,y)'))
+        assert cost._constants is None
+    finally:
+        cost._constants = saved
+
+def test_manifest_chunked():
+    # Nothing fits in memory, so the out-of-core implementation is used
+    c = dict(cost.DEFAULTS, ram=0, chunk=0, compress=0)
+    saved, cost._constants = cost._constants, c
+    try:
+        x = Array(np.arange(1000.))
+        y = Array(np.arange(1000.) * 2)
+        impl, _ = lookup(applied('Add(<term>,<term>)', 2), [x, y])
+        assert impl.name == 'add_chunked'
+
+        val = add(x, y)
+        assert np.all(val.data.ca[:] == np.arange(1000.) * 3)
+    finally:
+        cost._constants = saved
+
 def test_manifest_func():
     x = Array([1,2,3])
     y = Array([1,2,3])
 
+    impl, _ = lookup(applied('Add(<term>,<term>)', 2), [x, y])
+    assert impl.name == 'add'
+
     val = add(x,y)
 
     assert val[0] == 2
     assert val[1] == 4
     assert val[2] == 6
 
+    val = multiply(x,y)
+    assert list(val) == [1, 4, 9]
+
 def test_deferred_func():
     x = NDArray([1,2,3])
     y = NDArray([1,2,3])
@@ -0,0 +1,61 @@
+import numpy as np
+
+import blaze
+from blaze import NDArray
+from blaze.carray import carray
+from blaze.sources.chunked import CArraySource
+from blaze.expr.evaluate import evaluate, toposort, unwrap
+from blaze.test_utils import assert_raises
+
+def chunked(arr, chunklen=1000):
+    return NDArray(CArraySource(carray(arr, chunklen=chunklen)))
+
+x = np.arange(10007, dtype='double')
+y = np.arange(10007, dtype='double') / 3
+
+def test_eval_elementwise():
+    a, b = chunked(x), chunked(y)
+
+    res = ((a + b) * a + 2).eval()
+    assert isinstance(res, np.ndarray)
+    assert np.allclose(res, (x + y) * x + 2)
+
+    res = abs(a * -1).eval()
+    assert np.allclose(res, x)
+    assert np.allclose(blaze.abs(a * -1).eval(), x)
+
+    # The result of a deferred expression cannot be written to out
+    with assert_raises(NotImplementedError):
+        blaze.abs(a, out=np.empty_like(x))
+
+def test_eval_reduction():
+    a, b = chunked(x), chunked(y)
+
+    res = (a * b + a).sum().eval()
+    assert np.allclose(res, (x * y + x).sum())
+
+    # A reduction used by an elementwise expression
+    res = (a + a.sum()).eval()
+    assert np.allclose(res, x + x.sum())
+
+def test_eval_shared():
+    a, b = chunked(x), chunked(y)
+
+    t = a * b
+    expr = t + t
+    # t is scheduled once
+    assert len(toposort(unwrap(expr))) == 4
+    assert np.allclose(expr.eval(), 2 * x * y)
+
+def test_eval_carray_result():
+    a, b = chunked(x), chunked(y)
+
+    res = evaluate(a * b, small=0)
+    assert isinstance(res, blaze.Array)
+    assert np.allclose(res.data.ca[:], x * y)
+
+def test_eval_lifted():
+    a, b = chunked(x), chunked(y)
+
+    res = blaze.multiply(a + b, b).eval()
+    assert np.allclose(res, (x + y) * y)
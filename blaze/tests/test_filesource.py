@@ -0,0 +1,95 @@
+import os.path
+
+import numpy as np
+
+from blaze import Array, NDArray, Table
+from blaze.algo import stats
+from blaze.test_utils import temp_dir
+from blaze.sources.canonical import FileSource
+
+records = np.array([(i, i * 0.5) for i in xrange(1000)],
+                   dtype=[('a', np.int32), ('b', np.float64)])
+
+def dump(temp, arr, name='data.bin'):
+    fname = os.path.join(temp, name)
+    arr.tofile(fname)
+    return fname
+
+def test_records():
+    with temp_dir() as temp:
+        fname = dump(temp, records)
+        src = FileSource(fname, 'x, {a: int32; b: float64}', chunklen=300)
+        assert len(src.na) == 1000
+        assert src.nchunks == 4
+        assert src.partitions[-1] == (900, 1000)
+
+        view = src.read(src, slice(10, 20))
+        assert np.all(view == records[10:20])
+        # A view of the mapping, not a copy
+        assert np.may_share_memory(view, src.na)
+        assert not view.flags.writeable
+
+        chunks = list(src.iterchunks())
+        assert np.all(np.concatenate(chunks) == records)
+
+def test_shape_and_offset():
+    with temp_dir() as temp:
+        data = np.arange(60, dtype=np.float64)
+        fname = os.path.join(temp, 'data.bin')
+        with open(fname, 'wb') as f:
+            f.write('HEADER!!')
+            data.tofile(f)
+        src = FileSource(fname, 'x, 6, float64', offset=8)
+        assert src.na.shape == (10, 6)
+        assert np.all(src.na == data.reshape(10, 6))
+
+        try:
+            FileSource(fname, 'x, 7, float64', offset=8)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('a partial row is not rejected')
+
+def test_write():
+    with temp_dir() as temp:
+        fname = dump(temp, np.arange(100, dtype=np.float64))
+        src = FileSource(fname, 'x, float64', mode='r+')
+        a = Array(src, dshape=src.dshape)
+        a[5] = -1
+        src.flush()
+        assert np.fromfile(fname, dtype=np.float64)[5] == -1
+
+        src = FileSource(fname, 'x, float64', mode='r')
+        try:
+            src.write(src, 5, 0)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('a read-only file is modified')
+
+def test_where():
+    with temp_dir() as temp:
+        fname = dump(temp, records)
+        src = FileSource(fname, 'x, {a: int32; b: float64}', chunklen=128)
+        rows = list(src.where('(a > 100) & (b < 60)', outcols='a'))
+        assert [row[0] for row in rows] == range(101, 120)
+
+        rows = list(src.where('a >= 0', limit=5, skip=500))
+        assert [row['a'] for row in rows] == range(500, 505)
+
+def test_eval():
+    with temp_dir() as temp:
+        data = np.arange(10007, dtype=np.float64)
+        fname = dump(temp, data)
+        src = FileSource(fname, 'x, float64')
+        a = NDArray(src, dshape=src.dshape)
+        res = (a * 2 + 1).eval()
+        assert np.allclose(res, data * 2 + 1)
+
+def test_stats():
+    with temp_dir() as temp:
+        fname = dump(temp, records)
+        src = FileSource(fname, 'x, {a: int32; b: float64}')
+        table = Table(src, dshape=src.dshape)
+        assert np.allclose(stats.mean(table, 'b'), records['b'].mean())
+        assert np.allclose(stats.std(table, 'b'), records['b'].std())
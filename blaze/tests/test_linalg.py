@@ -1,7 +1,9 @@
 # adapted from samples/dot_example.py
 
+import numpy as np
+
 import blaze
-from blaze.algo.linalg import dot
+from blaze.algo.linalg import dot, linalg
 from blaze.test_utils import assert_raises
 
 def test_dot():
@@ -42,3 +44,22 @@ def test_dot_out_exception():
 
     with assert_raises(ValueError):
         dot(a, b, out=out)
+
+def test_dot_tiled():
+    '''Test of 2D dot product with several tiles and threads'''
+    # Non-square operands with dimensions that are not a multiple of
+    # the tile size, so that the edge tiles are partial
+    npa = np.arange(23 * 37, dtype='float64').reshape(23, 37) / 100
+    npb = (np.arange(37 * 13, dtype='float64') % 11).reshape(37, 13)
+    a = blaze.Array(npa)
+    b = blaze.Array(npb)
+    old_size = linalg.OOC_BUFFER_SIZE
+    try:
+        for nthreads in (1, 2):
+            # Force tiles of 4x4 elements
+            linalg.OOC_BUFFER_SIZE = 2 * 4 * nthreads * 8 * 4**2
+            out = dot(a, b, outname=None, nthreads=nthreads)
+            assert out.datashape._equal(blaze.dshape('23, 13, float64'))
+            assert np.allclose(out.data.ca[:], np.dot(npa, npb))
+    finally:
+        linalg.OOC_BUFFER_SIZE = old_size
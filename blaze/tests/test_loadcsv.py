@@ -0,0 +1,102 @@
+import os.path
+
+import numpy as np
+
+from blaze import loadcsv, dshape
+from blaze.params import params
+from blaze.test_utils import temp_dir
+from blaze.carray import ctable
+from blaze.sources.text import load_csv, line_ranges, parse, read_rows, \
+     infer_dtype, SAMPLE_SIZE
+
+csvfile = os.path.join(os.path.dirname(__file__), 'test.csv')
+expected = np.loadtxt(csvfile, skiprows=1, dtype='i8')
+
+def check(table):
+    assert list(table.names) == ['S', 'X', 'E', 'M']
+    assert len(table) == len(expected)
+    for i, name in enumerate(table.names):
+        assert np.all(table[name][:] == expected[:, i])
+
+def test_line_ranges():
+    data = open(csvfile, 'rb').read()
+    ranges = list(line_ranges(csvfile, blocksize=32))
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+        assert stop == start
+        assert data[stop-1] == '\n'
+
+def test_parse():
+    fmt = {'delimiter': ','}
+    dtype = np.dtype('i4,f8,S3,?')
+    out = parse(['1,2.5,abc,true', '', '2,,de,0'], fmt, dtype)
+    assert len(out) == 2
+    assert list(out['f0']) == [1, 2]
+    assert out['f1'][0] == 2.5 and np.isnan(out['f1'][1])
+    assert list(out['f2']) == ['abc', 'de']
+    assert list(out['f3']) == [True, False]
+
+def test_blanks():
+    fmt = {'delimiter': ','}
+    rows = read_rows(['1,a', ',bb', '3,c'], fmt)
+    dtype = infer_dtype(rows, ['x', 'y'])
+    assert dtype['x'] == np.float64
+    out = parse(['1,a', ',bb', '3,c'], fmt, dtype)
+    assert out['x'][0] == 1 and np.isnan(out['x'][1])
+
+    try:
+        parse(['1,a', ',b'], fmt, np.dtype('i8,S1'))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('a blank int field is not rejected')
+
+def test_overflow():
+    fmt = {'delimiter': ','}
+    try:
+        parse(['1,abc', '2,abcdef'], fmt, np.dtype('i8,S3'))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('a long string is truncated')
+
+def test_wide_strings():
+    # The longest value is past the sample the types are inferred from
+    with temp_dir() as temp:
+        path = os.path.join(temp, 'wide.csv')
+        with open(path, 'wb') as f:
+            f.write('x,name\n')
+            for i in xrange(SAMPLE_SIZE // 4):
+                f.write('%d,ab\n' % i)
+            f.write('0,%s\n' % ('z' * 100))
+        for processes in (1, 2):
+            table = load_csv(path, processes=processes, blocksize=2**14)
+            assert table['name'].dtype == np.dtype('S100')
+            assert table['name'][len(table) - 1] == 'z' * 100
+
+def test_infer():
+    table = load_csv(csvfile, processes=1)
+    assert isinstance(table, ctable)
+    assert all(table[name].dtype == np.int64 for name in table.names)
+    check(table)
+
+def test_parallel():
+    with temp_dir() as temp:
+        rootdir = os.path.join(temp, 'ctable')
+        table = load_csv(csvfile, processes=2, blocksize=64, rootdir=rootdir)
+        check(table)
+        check(ctable(rootdir=rootdir, mode='r'))
+
+def test_dshape():
+    table = load_csv(csvfile, dtype='f4', processes=1)
+    assert all(table[name].dtype == np.float32 for name in table.names)
+
+    t = loadcsv(csvfile, 'x, int32', processes=1)
+    check(t.data.ca)
+
+def test_storage():
+    with temp_dir() as temp:
+        rootdir = os.path.join(temp, 'ctable')
+        t = loadcsv(csvfile, params=params(storage=rootdir), blocksize=100)
+        check(t.data.ca)
+        assert os.path.isdir(rootdir)
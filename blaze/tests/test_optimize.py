@@ -0,0 +1,73 @@
+import numpy as np
+
+from blaze import NDArray
+from blaze.carray import carray
+from blaze.expr import ops
+from blaze.expr.graph import IntNode
+from blaze.expr.evaluate import toposort, unwrap
+from blaze.expr.optimize import (optimize, cse, constant_fold,
+                                 sink_transpose, split_sums)
+from blaze.sources.chunked import CArraySource
+
+def chunked(arr, chunklen=1000):
+    return NDArray(CArraySource(carray(arr, chunklen=chunklen)))
+
+x = np.arange(1000, dtype='double')
+y = np.arange(1000, dtype='double') / 3
+
+def test_cse():
+    a, b = chunked(x), chunked(y)
+
+    # a*b is built three times, once with the operands swapped
+    expr = (a * b + b * a) * (a * b)
+    assert len(toposort(unwrap(expr))) == 7
+
+    opt = cse(expr)
+    assert len(toposort(opt)) == 5
+    assert np.allclose(expr.eval(), (2 * x * y) * (x * y))
+
+def test_constant_fold():
+    a = chunked(x)
+
+    two = IntNode(1) + IntNode(1)
+    opt = constant_fold(a * two)
+    lit = [n for n in toposort(opt) if isinstance(n, IntNode)]
+    assert len(lit) == 1 and lit[0].val == 2
+
+def test_sink_transpose():
+    a, b = chunked(x), chunked(y)
+
+    opt = sink_transpose(a.T + b.T)
+    assert isinstance(opt, ops.Transpose)
+    assert len([n for n in toposort(opt) if isinstance(n, ops.Transpose)]) == 1
+    assert np.allclose((a.T + b.T).eval(), x + y)
+
+def test_split_sums():
+    a, b = chunked(x), chunked(y)
+
+    opt = split_sums((a + b).sum())
+    assert isinstance(opt, ops.Add)
+    assert np.allclose((a + b).sum().eval(), (x + y).sum())
+
+    # Not when the addition is needed anyway
+    t = a + b
+    opt = split_sums(t.sum() + t)
+    sums = [n for n in toposort(opt) if isinstance(n, ops.Sum)]
+    assert len(sums) == 1
+
+    # Not with scalar operands
+    opt = split_sums((a + 2).sum())
+    assert isinstance(opt, ops.Sum)
+    assert np.allclose((a + 2).sum().eval(), (x + 2).sum())
+
+    # Not when the operands broadcast
+    m = np.arange(3000, dtype='double').reshape(1000, 3)
+    c, d = chunked(m), chunked(x.reshape(1000, 1))
+    opt = split_sums((c + d).sum())
+    assert isinstance(opt, ops.Sum)
+    assert np.allclose((c + d).sum().eval(), (m + x.reshape(1000, 1)).sum())
+
+    # But through a transpose of the same shape
+    e = chunked(m * 2)
+    opt = split_sums((c.T + e.T).sum())
+    assert isinstance(opt, ops.Add)
@@ -0,0 +1,143 @@
+import numpy as np
+
+from blaze.blir import compile, CompileError, Context, execute, \
+    parallel_for, parallel_reduce, use_runtime
+from blaze.test_utils import assert_raises
+from blaze.rts.wrapper import Runtime
+
+source = """
+def scale(start : int, stop : int, x : array[float]) -> void {
+    var int i;
+    for i in range(start, stop) {
+        x[i] = x[i] * 2.0;
+    }
+}
+
+def total(start : int, stop : int, x : array[float]) -> float {
+    var float acc = 0.0;
+    var int i;
+    for i in range(start, stop) {
+        acc = acc + x[i];
+    }
+    return acc;
+}
+"""
+
+def test_parallel_for():
+    ast, env = compile(source)
+    ctx = Context(env)
+    rts = Runtime(4)
+
+    x = np.arange(100003, dtype='double')
+    parallel_for(ctx, 'scale', 0, len(x), x, rts=rts)
+    assert np.allclose(x, 2 * np.arange(100003))
+
+    # Explicit chunks and partial ranges
+    x = np.arange(1000, dtype='double')
+    parallel_for(ctx, 'scale', 10, 990, x, chunk=7, rts=rts)
+    assert np.allclose(x[10:990], 2 * np.arange(10, 990))
+    assert np.allclose(x[:10], np.arange(10))
+
+    rts.close()
+
+def test_parallel_reduce():
+    ast, env = compile(source)
+    ctx = Context(env)
+    rts = Runtime(4)
+
+    x = np.arange(100003, dtype='double')
+    assert parallel_reduce(ctx, 'total', 0, len(x), x, rts=rts) == x.sum()
+    assert parallel_reduce(ctx, 'total', 5, 5, x, rts=rts) == 0.0
+
+    rts.close()
+
+intrinsic_source = """
+def scale(x : array[float], n : int) -> void {
+    var int i;
+    for i in parallel_range(0, n) {
+        x[i] = x[i] * 3.0;
+    }
+}
+"""
+
+def test_parallel_range():
+    ast, env = compile(intrinsic_source)
+    ctx = Context(env)
+
+    x = np.arange(100003, dtype='double')
+    execute(ctx, args=(x, len(x)), fname='scale')
+    assert np.allclose(x, 3 * np.arange(100003))
+
+    # On a given runtime, over part of the array
+    use_runtime(Runtime(2))
+    x = np.arange(1000, dtype='double')
+    execute(ctx, args=(x, 10), fname='scale')
+    assert np.allclose(x[:10], 3 * np.arange(10))
+    assert np.allclose(x[10:], np.arange(10, 1000))
+    use_runtime()
+
+reduction_source = """
+def stats(x : array[float], n : int, out : array[float]) -> void {
+    var float s = 0.0;
+    var float p = 1.0;
+    var int i;
+    for i in parallel_range(0, n) {
+        var float t = x[i];
+        s = s + t * t;
+        p = p * (1.0 + t);
+    }
+    out[0] = s;
+    out[1] = p;
+}
+
+def count(n : int) -> int {
+    var int c = 0;
+    var int i;
+    for i in parallel_range(0, n) {
+        c = c + 1;
+    }
+    return c;
+}
+"""
+
+def test_parallel_range_reduction():
+    ast, env = compile(reduction_source)
+    ctx = Context(env)
+    use_runtime(Runtime(4))
+
+    x = np.arange(100003, dtype='double') / 1e7
+    out = np.zeros(2)
+    execute(ctx, args=(x, len(x), out), fname='stats')
+    assert np.allclose(out, [(x * x).sum(), np.prod(1 + x)])
+
+    # the neutral elements for an empty range
+    execute(ctx, args=(x, 0, out), fname='stats')
+    assert np.all(out == [0.0, 1.0])
+
+    assert execute(ctx, args=(100003,), fname='count') == 100003
+    use_runtime()
+
+def test_parallel_range_shared_store():
+    # Assignments to the variables of the enclosing function race
+    # between the workers, only reductions are accepted
+    for body in ('s = x[i];', 's = s - x[i];', 's = s + x[i]; x[i] = s;',
+                 's = s + x[i]; s = s * 2.0;'):
+        source = """
+        def f(x : array[float], n : int) -> float {
+            var float s = 0.0;
+            var int i;
+            for i in parallel_range(0, n) {
+                %s
+            }
+            return s;
+        }
+        """ % body
+        with assert_raises(CompileError):
+            compile(source)
+
+def test_runtime_nthreads():
+    rts = Runtime(1000)
+    # The runtime caps the number of threads it starts
+    assert rts.nthreads <= 1000
+    assert rts.nthreads == 128
+    rts.close()
@@ -32,6 +32,9 @@ def test_fromiter():
     from blaze import fromiter, params
 
     a = fromiter(xrange(10), 'x, float64', params=params(clevel=5))
+    assert list(a.data.ca[:]) == range(10)
+    a = fromiter(range(10), '10, float64')
+    assert list(a.data.ca[:]) == range(10)
 
 @skip
 def test_custom_dshape():
@@ -0,0 +1,129 @@
+import os.path
+import sqlite3
+import threading
+
+import numpy as np
+
+import blaze.toplevel as toplevel
+from blaze.params import params
+from blaze.test_utils import temp_dir
+from blaze.sources.sql import SqliteSource, to_sql, close_connections
+
+N = 1000
+
+def create(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE trades (id INTEGER, price REAL, sym TEXT)')
+    conn.executemany('INSERT INTO trades VALUES (?, ?, ?)',
+                     ((i, i * 0.5, 'S%d' % (i % 7)) for i in xrange(N)))
+    conn.commit()
+    conn.close()
+
+def test_to_sql():
+    cond, args = to_sql('(price > 1) & ~(sym == "x")', ['price', 'sym'])
+    assert cond == '(("price" > ?) AND (NOT ("sym" = ?)))'
+    assert args == [1, 'x']
+
+    cond, args = to_sql('0 < price <= 2.5', ['price'])
+    assert cond == '(? < "price" AND "price" <= ?)'
+    assert args == [0, 2.5]
+
+    try:
+        to_sql('bogus > 1', ['price'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('unknown columns are not rejected')
+
+def test_pushdown():
+    with temp_dir() as temp:
+        path = os.path.join(temp, 'trades.db')
+        create(path)
+        source = SqliteSource(params=params(storage=path))
+        assert source.tables() == ['trades']
+
+        trades = source.table('trades')
+        assert trades.dtype.names == ('id', 'price', 'sym')
+        assert trades.dtype['sym'].kind == 'U'
+
+        q = trades.select('id, price').where('price >= 100').limit(10, 5)
+        assert q.sql() == ('SELECT "id", "price" FROM "trades" '
+                           'WHERE ("price" >= ?) LIMIT 10 OFFSET 5')
+        result = q.toarray()
+        assert list(result['id']) == range(205, 215)
+
+        # Raw SQL conditions are passed through
+        result = trades.select('sym').where('id BETWEEN ? AND ?', 0, 6)
+        assert sorted(result.toarray()['sym']) == ['S%d' % i for i in range(7)]
+
+        # And so are the conditions that cannot be translated
+        result = trades.select('id').where('id in (1, 2)')
+        assert result.sql() == ('SELECT "id" FROM "trades" '
+                                'WHERE (id in (1, 2))')
+        assert list(result.toarray()['id']) == [1, 2]
+        result = trades.select('sym').where('length(sym) >= 2')
+        assert len(result.toarray()) == N
+        close_connections()
+
+def test_batches():
+    with temp_dir() as temp:
+        path = os.path.join(temp, 'trades.db')
+        create(path)
+        source = SqliteSource(params=params(storage=path, batchsize=300))
+        trades = source.table('trades', dshape='x, {id: int64; price: float64}'
+                              ).select('id price')
+
+        blocks = list(trades.iterblocks())
+        assert [len(block) for block in blocks] == [300, 300, 300, 100]
+
+        ct = trades.toctable(rootdir=os.path.join(temp, 'ctable'))
+        assert len(ct) == N
+        assert np.all(ct['price'][:] == np.arange(N) * 0.5)
+        close_connections()
+
+def test_nulls():
+    with temp_dir() as temp:
+        path = os.path.join(temp, 'nulls.db')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE t (id INTEGER, qty INTEGER, price REAL, '
+                     'sym TEXT)')
+        conn.executemany('INSERT INTO t VALUES (?, ?, ?, ?)',
+                         [(0, 5, 1.5, 'a'), (1, None, None, None)])
+        conn.commit()
+        conn.close()
+
+        source = SqliteSource(params=params(storage=path, batchsize=1))
+        t = source.table('t')
+        # The integer columns holding NULLs are read as floats
+        assert t.dtype['id'].kind == 'i'
+        assert t.dtype['qty'] == np.float64
+
+        result = t.toarray()
+        assert list(result['id']) == [0, 1]
+        assert result['qty'][0] == 5 and np.isnan(result['qty'][1])
+        assert result['price'][0] == 1.5 and np.isnan(result['price'][1])
+        assert list(result['sym']) == ['a', '']
+
+        # A given integer type reads NULLs as its minimum
+        t = source.table('t', dshape='x, {id: int64; qty: int32}')
+        result = t.select('qty').toarray()
+        assert list(result['qty']) == [5, np.iinfo(np.int32).min]
+        close_connections()
+
+def test_pooled_connections():
+    with temp_dir() as temp:
+        path = os.path.join(temp, 'trades.db')
+        create(path)
+        a = toplevel.open('sqlite://' + path)
+        b = toplevel.open('sqlite://' + path)
+        assert a.data.conn is b.data.conn
+
+        # Other threads get their own connections
+        conns = []
+        thread = threading.Thread(
+            target=lambda: conns.append(toplevel.open('sqlite://' + path)
+                                        .data.conn))
+        thread.start()
+        thread.join()
+        assert conns[0] is not a.data.conn
+        close_connections()
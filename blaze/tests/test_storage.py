@@ -1,6 +1,6 @@
 from ctypes import c_char
 from blaze.rts.heap import Heap, Arena, address_of_buffer,\
-    allocate_numpy, allocate_raw, finalize
+    allocate_numpy, allocate_raw, finalize, size_class, LARGE_BLOCK
 
 import numpy as np
 
@@ -43,6 +43,67 @@ def test_free():
     # Blocks get merged when free'd so that align blocks
     assert addr3 == addr2
 
+def test_size_classes():
+    for size in [1, 63, 64, 65, 511, 513, 1000, 4097, 10**5]:
+        cls = size_class(size)
+        assert cls >= size
+        assert cls % 64 == 0
+        assert cls - size <= max(63, cls // 4)
+
+def test_alignment():
+    h = Heap()
+
+    for size in [1, 24, 100, 3000]:
+        addr, arr = allocate_numpy(h, np.float64, size)
+        assert addr % 64 == 0
+        assert arr.shape == (size,)
+
+    addr, _, _ = allocate_raw(h, 10)
+    assert addr % 64 == 0
+
+    block = h.malloc(5000, align=4096)
+    arena, start, stop = block
+    assert (arena.address + start) % 4096 == 0
+
+def test_numpy_freed():
+    h = Heap()
+
+    addr, arr = allocate_numpy(h, np.int32, (10, 10))
+    arr[:] = 1
+    view = arr[2:]
+    assert h.stats()['blocks'] == 1
+
+    # The views keep the block alive
+    del arr
+    assert h.stats()['blocks'] == 1
+    assert view.sum() == 80
+
+    del view
+    assert h.stats()['blocks'] == 0
+
+    # Freed blocks are reused
+    addr2, arr = allocate_numpy(h, np.int32, (10, 10))
+    assert addr2 == addr
+
+def test_trim():
+    h = Heap()
+
+    blocks = [h.malloc(1000) for i in range(1000)]
+    large = h.malloc(LARGE_BLOCK + 1)
+    mapped = h.stats()['mapped']
+
+    for block in blocks + [large]:
+        h.free(block)
+
+    stats = h.stats()
+    assert stats['blocks'] == 0
+    assert stats['large'] == 0
+    assert stats['mallocs'] == stats['frees'] == 1001
+
+    assert h.trim() > 0
+    assert h.stats()['mapped'] < mapped
+    assert h.stats()['slabs'] == 0
+
 #------------------------------------------------------------------------
 # IOPro Prototype
 #------------------------------------------------------------------------
@@ -65,6 +126,6 @@ def test_iopro():
     assert block.ctypes.data == addr
 
     assert len(h._arenas) == 1
-    assert block.nbytes < h._lengths[0]
+    assert block.nbytes <= h.stats()['allocated']
 
     finalize(h)
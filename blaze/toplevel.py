@@ -5,6 +5,7 @@ from params import params, to_cparams
 from params import params as _params
 from sources.sql import SqliteSource
 from sources.chunked import CArraySource, CTableSource
+from sources.text import load_csv
 
 from table import NDArray, Array, NDTable, Table
 from blaze.datashape import from_numpy, to_numpy, TypeVar, Fixed
@@ -157,7 +158,9 @@ def fromiter(iterable, dshape, params=None):
     Parameters
     ----------
     iterable : iterable object
-        An iterable object providing data for the carray.
+        An iterable object providing data for the carray.  It can yield
+        either items or blocks of items (NumPy arrays or lists), and it
+        is consumed one chunk at a time.
     dshape : str, blaze.dshape instance
         Specifies the datashape of the outcome object.  Only 1d shapes
         are supported right now. When the `iterator` should return an
@@ -195,6 +198,43 @@ def fromiter(iterable, dshape, params=None):
         source = CArraySource(ica, params=params)
         return Array(source)
 
+def loadcsv(filename, dshape=None, params=None, **kwargs):
+    """ Load a CSV (or other delimited text) file into a Table.
+
+    The file is parsed in parallel worker processes and streamed into
+    a chunked table, so files larger than memory can be loaded when a
+    storage is given.
+
+    Parameters
+    ----------
+    filename : str
+        The file to load.
+    dshape : str, blaze.dshape instance
+        The datashape of the rows, e.g. ``'x, {a: int32; b: float64}'``.
+        A plain measure is used for every column.  If not given, the
+        types are inferred from a sample of the file.
+    params : blaze.params object
+        Any parameter supported by the backend library.
+    kwargs : list of parameters or dictionary
+        Options of the reader: `delimiter`, `header`, `processes` and
+        `blocksize` (see ``blaze.sources.text.load_csv``).
+
+    Returns
+    -------
+    out : a Table object.
+
+    """
+    dtype = None
+    if dshape is not None:
+        if isinstance(dshape, basestring):
+            dshape = _dshape(dshape)
+        shape, dtype = to_numpy(dshape)
+    cparams, rootdir, format_flavor = to_cparams(params or _params())
+    table = load_csv(filename, dtype, rootdir=rootdir, cparams=cparams,
+                     **kwargs)
+    return Table(CTableSource(table, params=params),
+                 dshape=from_numpy((len(table),), table.dtype))
+
 def loadtxt(filetxt, storage):
     """ Convert txt file into Blaze native format """
     Array(np.loadtxt(filetxt), params=params(storage=storage))
@@ -281,11 +321,13 @@ def blaze_any(a, axis=None, out=None):
 
 def blaze_abs(a, axis=None, out=None):
     """
-    Returns the absolute value element-wise.
+    Returns the absolute value element-wise. The result is a deferred
+    expression, so ``out`` is not supported.
     """
+    if out is not None:
+        raise NotImplementedError("blaze.abs does not support out")
     a = lazy(a)
-    op = ops.Abs('Abs', [a], {'out': out})
-    return op
+    return graph.App(ops.Abs('Abs', [a]))
 
 def blaze_sum(a, axis=None, out=None):
     """
@@ -177,6 +177,7 @@ descriptor_depends = [
     desc_path + "lldescriptors.pxd",
     desc_path + "lldescriptors.pyx",
     desc_path + "llindexers.pyx",
+    desc_path + "llexecutor.pyx",
 ]
 
 extensions = [
@@ -214,6 +215,12 @@ extensions = [
        include_dirs = [],
        depends=descriptor_depends,
    ),
+   Extension(
+       "blaze.desc.llexecutor",
+       ["blaze/desc/llexecutor.pyx"],
+       include_dirs = [],
+       depends=descriptor_depends,
+   ),
 
    Extension(
         "blaze.cutils", ["blaze/cutils.pyx"],